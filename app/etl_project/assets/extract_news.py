@@ -1,11 +1,19 @@
 import requests
 import pandas as pd
+import numpy as np
 from pathlib import Path
-import boto3
 from io import StringIO
 import json
+import copy
+import threading
+from concurrent.futures import Executor, ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
 from sqlalchemy import Table, MetaData
 from etl_project.connectors.postgresql import PostgreSqlClient
+from etl_project.assets.vocabulary_matcher import VocabularyMatcher
+from etl_project.assets.rate_limiter import RequestScheduler
+from etl_project.assets.frequency_cache import WordFrequencyCache
+from etl_project.assets.readability import readability_features, readability_df
 
 # need to add boto3 to requirements later
 
@@ -14,7 +22,8 @@ class News:
     def __init__(self, api_key:str, which_news:str = 'news', language:str = 'en', timeframe:int = 8, size:int = 10, 
         country:str='us', domainurl:str=['ibtimes.com','latimes.com','investorplace.com','popsci.com','thehill.com'],
         prioritydomain:str=None, q:str=None, qInTitle:str=None, qInMeta:str=None, category:str=None, domain:str=None,
-         excludedomain:str=None, timezone:str=None, full_content:bool=None, image:bool=None, video:bool=None):
+         excludedomain:str=None, timezone:str=None, full_content:bool=None, image:bool=None, video:bool=None,
+         pool_size:int = 10, scheduler:RequestScheduler = None, landing_zone = None, timeout:tuple = (10, 30)):
 
         self.base_url = 'https://newsdata.io/api/1/'
         self.api_key = api_key
@@ -35,9 +44,24 @@ class News:
         self.full_content = full_content
         self.image = image
         self.video = video
+        self.scheduler = scheduler
+        # (connect, read) timeouts in seconds of every request, a stalled connection raises requests.Timeout (retried by the scheduler)
+        self.timeout = timeout
+        # a landing.LandingZone keeping a copy of every response received
+        self.landing_zone = landing_zone
+        # size of the response bodies received by get_news, and by the copies made by with_params, for instrumentation
+        self.bytes_received = 0
+        self._parent = None
+        self._bytes_lock = threading.Lock()
 
         if api_key is None:
             raise Exception('Please enter a valid API key. A valid key cannot be None.')
+
+        # one pooled session per client so consecutive and concurrent requests reuse connections
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
         
     def _build_params(self, param:str, value) -> dict:
 
@@ -77,7 +101,7 @@ class News:
             A dictionary of articles and set parameters for a given api request
 
         Raises:
-            Exception if response code is not 200
+            Exception if response code is not 200 (after the retries of the scheduler, if the client has one)
 
         """
         
@@ -100,9 +124,14 @@ class News:
 
         headers = {'X-ACCESS-KEY': self.api_key}
         
-        response = requests.get(url = base_url, params = params, headers = headers)
+        send_request = lambda: self.session.get(url = base_url, params = params, headers = headers, timeout = self.timeout)
+        response = self.scheduler.send(send_request) if self.scheduler is not None else send_request()
+        self._count_bytes(len(response.content))
         if response.status_code == 200:
-            return response.json()
+            data = response.json()
+            if self.landing_zone is not None:
+                self.landing_zone.write(data, params = params)
+            return data
         else:
             raise Exception(f"Request to {base_url} failed. Status code: {response.status_code} Response: {response.text}")
         
@@ -121,6 +150,96 @@ class News:
         """
         return self.get_news(page = str(response['nextPage']))
 
+    def iter_pages(self, max_pages:int = None, max_articles:int = None):
+        """
+        Follows the "nextPage" cursor of the API responses, starting from the first page.
+
+        Args:
+            max_pages: stop after this many pages
+            max_articles: stop once this many articles have been received
+
+        Returns:
+            A generator of json responses, one per page
+        """
+        page = None
+        pages = 0
+        articles = 0
+        while True:
+            response = self.get_news(page = page)
+            pages += 1
+            articles += len(response.get('results') or [])
+            yield response
+
+            page = response.get('nextPage')
+            if page is None or (max_pages is not None and pages >= max_pages) or (max_articles is not None and articles >= max_articles):
+                break
+            page = str(page)
+
+    def fetch_all(self, max_pages:int = None, max_articles:int = None) -> dict:
+        """
+        Gets every page of a request (see iter_pages) and merges their results.
+
+        Returns:
+            A dictionary shaped like a single API response, with the results of all pages and the last "nextPage" cursor
+        """
+        results = []
+        response = {'status': 'success', 'totalResults': 0, 'results': results, 'nextPage': None}
+        for page in self.iter_pages(max_pages = max_pages, max_articles = max_articles):
+            results.extend(page.get('results') or [])
+            response['totalResults'] = page.get('totalResults', response['totalResults'])
+            response['nextPage'] = page.get('nextPage')
+        if max_articles is not None:
+            del results[max_articles:]
+        return response
+
+    def _count_bytes(self, size: int) -> None:
+        """Adds received bytes to this client and to the clients it was copied from, copies may run in threads."""
+        with self._bytes_lock:
+            news = self
+            while news is not None:
+                news.bytes_received += size
+                news = news._parent
+
+    def with_params(self, **params):
+        """
+        Returns a copy of the client with some request parameters changed (e.g. domainurl, category, country).
+        The copy shares the connection pool of this client, and the bytes it receives also count for this client.
+        """
+        news = copy.copy(self)
+        news.bytes_received = 0
+        news._parent = self
+        for param, value in params.items():
+            if not hasattr(news, param):
+                raise TypeError(f'{param} is not a valid News parameter.')
+            setattr(news, param, value)
+        return news
+
+
+def fetch_news_concurrently(
+        news: News,
+        queries: list[dict],
+        max_workers: int = 4,
+        max_pages: int = None,
+        max_articles: int = None
+    ) -> list[dict]:
+    """
+    Runs independent queries concurrently on a bounded thread pool. Each query is a dictionary of parameters
+    that override the ones of the base News client, and follows its own "nextPage" cursor (see News.fetch_all).
+
+    Args:
+        news: base News client
+        queries: list of parameter overrides, e.g. [{'domainurl': ['latimes.com']}, {'category': 'science'}]
+        max_workers: maximum number of requests in flight
+        max_pages: maximum number of pages per query
+        max_articles: maximum number of articles per query
+
+    Returns:
+        One merged response per query, in the same order as queries
+    """
+    clients = [news.with_params(**query) for query in queries]
+    with ThreadPoolExecutor(max_workers = max_workers) as executor:
+        return list(executor.map(lambda client: client.fetch_all(max_pages = max_pages, max_articles = max_articles), clients))
+
 
 def json_news_to_df(
         data: json,
@@ -157,11 +276,49 @@ def rename_and_select_columns_news(
     # keep only 'title', 'article_link', 'keywords', 'author', 'keywords', 'publish_date', 'article', 'category', 'country', 'language'
     return df_news_selected
 
+# NewsData.io article field -> column, for the columns of news_raw_table
+NEWS_FIELDS = {
+    'title': 'title',
+    'link': 'article_link',
+    'keywords': 'keywords',
+    'creator': 'author',
+    'pubDate': 'publish_date',
+    'content': 'article_contents',
+    'category': 'category',
+    'country': 'country',
+    'language': 'language'
+}
+# fields holding a list of strings (or sometimes a single string)
+NEWS_LIST_FIELDS = {'keywords', 'creator', 'category', 'country'}
+
+def normalize_news(
+        data: json
+    ) -> pd.DataFrame:
+    """
+    Builds the article dataframe straight from an API response, without json_normalize: only the fields of
+    NEWS_FIELDS are read, each into one column, named like the columns of rename_and_select_columns_news (without
+    the duplicated keywords column).
+
+    List fields (keywords, author, category, country) are always a list or None, as expected by the ARRAY columns and
+    the COPY loads of the connector; other fields are kept as returned (strings or None).
+    """
+    results = data.get('results') or []
+    columns = {}
+    for field, column in NEWS_FIELDS.items():
+        if field in NEWS_LIST_FIELDS:
+            columns[column] = [value if value is None or isinstance(value, list) else [value]
+                               for value in (article.get(field) for article in results)]
+        else:
+            columns[column] = [article.get(field) for article in results]
+    return pd.DataFrame(columns, columns=list(NEWS_FIELDS.values()), dtype=object)
+
 def download_from_s3(
         s3_bucket: str,
         key: str
     ) -> pd.DataFrame:
     """Downloads a CSV from an S3 bucket"""
+    # boto3 is only imported by the runs that download from S3
+    import boto3
     # Initialize the S3 client without specifying access keys
     s3 = boto3.client('s3', region_name='us-east-1')
     try:
@@ -179,7 +336,9 @@ def loaded(
         postgresql_client: PostgreSqlClient, 
         table: Table, 
         metadata: MetaData, 
-        load_method: str = "overwrite"
+        load_method: str = "overwrite",
+        bulk: bool = False,
+        batch_size: int = None
     ) -> None:
     """
     Load dataframe to a database.
@@ -190,24 +349,36 @@ def loaded(
         table: sqlalchemy table
         metadata: sqlalchemy metadata
         load_method: supports one of: [insert, upsert, overwrite]
+        bulk: stream the dataframe with COPY FROM STDIN instead of building an insert statement from a list of dicts
+        batch_size: maximum number of rows sent per statement, all batches are written in one transaction
     """
-    if load_method == "insert":
+    if bulk and load_method in {"insert", "upsert", "overwrite"}:
+        bulk_load = {
+            "insert": postgresql_client.bulk_insert,
+            "upsert": postgresql_client.bulk_upsert,
+            "overwrite": postgresql_client.bulk_overwrite
+        }[load_method]
+        bulk_load(df=df, table=table, metadata=metadata, batch_size=batch_size)
+    elif load_method == "insert":
         postgresql_client.insert(
             data=df.to_dict(orient='records'),
             table=table,
-            metadata=metadata
+            metadata=metadata,
+            batch_size=batch_size
         )
     elif load_method == "upsert":
         postgresql_client.upsert(
             data=df.to_dict(orient='records'),
             table=table,
-            metadata=metadata
+            metadata=metadata,
+            batch_size=batch_size
         )
     elif load_method == "overwrite": 
         postgresql_client.overwrite(
             data=df.to_dict(orient='records'),
             table=table,
-            metadata=metadata
+            metadata=metadata,
+            batch_size=batch_size
         )
     else: 
         raise Exception("Please specify a correct load method: [insert, upsert, overwrite]")
@@ -229,30 +400,69 @@ def calculate_word_frequency(article_contents, word):
 
 def process_articles(
         word_by_grade_level_df: pd.DataFrame, 
-        newspaper_articles_df: pd.DataFrame
+        newspaper_articles_df: pd.DataFrame,
+        matcher: VocabularyMatcher = None,
+        sparse: bool = False,
+        cache: WordFrequencyCache = None,
+        executor: Executor = None,
+        match_mode: str = 'substring',
+        readability: bool = False
     ) -> pd.DataFrame:
-    """Processs article and returns a data frame that has article title and word frequency"""
-
-    results = []
-
-    for index, row in newspaper_articles_df.iterrows():
-        article = row['article_contents']
-        title = row['title']
-
-        for _, word_row in word_by_grade_level_df.iterrows():
-            word = word_row['Word']
-            grade_level = word_row['Grade_Lv']
-
-            frequency = int(calculate_word_frequency(article, word))
-            
-            # Append data with correct data types
-            results.append({
-                'title': title,
-                'word': str(word),  # Convert word to string
-                'frequency': frequency,
-                'grade_level': float(grade_level),  # Convert grade_level to float
-                'article_link': str(row['article_link'])  # Convert article_link to string
-            })
-
-    results_df = pd.DataFrame(results)
-    return results_df
+    """
+    Processs article and returns a data frame that has article title and word frequency
+
+    Args:
+        word_by_grade_level_df: vocabulary with 'Word' and 'Grade_Lv' columns
+        newspaper_articles_df: articles with 'title', 'article_contents' and 'article_link' columns
+        matcher: a VocabularyMatcher compiled from word_by_grade_level_df, built on the fly if not given
+        sparse: only emit the (article, word) pairs with a non-zero frequency, using compact dtypes
+            (categorical word, int32 frequency, float32 grade_level)
+        cache: reuse the counts of articles whose contents were already processed with the same vocabulary
+        executor: a process pool from matcher.process_pool() to count the articles on several cores
+        match_mode: 'substring' (calculate_word_frequency semantics), 'word' or 'stem' (whole words, and their
+            inflections), used when the matcher is built on the fly
+        readability: also reduce the counts to per-article readability features (see assets/readability.py)
+
+    Returns:
+        One row per (article, vocabulary word) pair with columns title, word, frequency, grade_level and article_link.
+        With readability, a (frequencies, readability) tuple where readability has one row per article with the
+        columns of article_readability
+    """
+    if matcher is None:
+        matcher = VocabularyMatcher(words=word_by_grade_level_df['Word'], mode=match_mode)
+
+    words = np.array([str(word) for word in word_by_grade_level_df['Word']], dtype=object)
+    grade_levels = word_by_grade_level_df['Grade_Lv'].to_numpy(dtype=float)
+    titles = newspaper_articles_df['title'].to_numpy()
+    article_links = np.array([str(link) for link in newspaper_articles_df['article_link']], dtype=object)
+
+    if sparse:
+        article_index, word_index, frequencies, token_counts = matcher.count_sparse(newspaper_articles_df['article_contents'], cache=cache,
+                                                                                   executor=executor, token_counts=True)
+        results_df = pd.DataFrame({
+            'title': titles[article_index],
+            'word': pd.Categorical(words[word_index], categories=pd.unique(words)),
+            'frequency': frequencies,
+            'grade_level': grade_levels[word_index].astype(np.float32),
+            'article_link': article_links[article_index]
+        })
+    else:
+        # articles x words matrix, every article is scanned only once
+        frequency_matrix, token_counts = matcher.count_matrix(newspaper_articles_df['article_contents'], cache=cache,
+                                                              executor=executor, token_counts=True)
+        n_articles, n_words = frequency_matrix.shape
+        results_df = pd.DataFrame({
+            'title': np.repeat(titles, n_words),
+            'word': np.tile(words, n_articles),
+            'frequency': frequency_matrix.ravel(),
+            'grade_level': np.tile(grade_levels, n_articles),
+            'article_link': np.repeat(article_links, n_words)
+        })
+        if readability:
+            article_index, word_index = np.nonzero(frequency_matrix)
+            frequencies = frequency_matrix[article_index, word_index]
+
+    if not readability:
+        return results_df
+    features = readability_features(article_index, word_index, frequencies, grade_levels=grade_levels, token_counts=token_counts)
+    return results_df, readability_df(features, titles=titles, article_links=article_links)
@@ -0,0 +1,147 @@
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import pandas as pd
+from etl_project.assets.extract_news import News, normalize_news
+from etl_project.assets.incremental import ExtractionWatermark
+from etl_project.assets.rate_limiter import RequestBudgetExceeded
+
+
+CATALOG_PATH = Path(__file__).resolve().parent.parent / 'data' / 'list_of_newspaper_businesses.csv'
+# NewsData.io accepts at most 5 domains in the domainurl parameter of a request
+MAX_DOMAINS_PER_REQUEST = 5
+
+DOMAIN_PATTERN = re.compile(r'^[a-z0-9-]+(\.[a-z0-9-]+)+$')
+
+
+def normalize_domain(website) -> str:
+    """
+    Reduces a website of the catalog to the domain NewsData.io expects (e.g. 'https://www.latimes.com/' -> 'latimes.com').
+
+    Returns:
+        The domain, or None if the website is missing or is not a domain name
+    """
+    if not isinstance(website, str):
+        return None
+    domain = website.strip().lower()
+    domain = re.sub(r'^[a-z]+://', '', domain).split('/')[0].split('?')[0].split(':')[0].rstrip('.')
+    if domain.startswith('www.'):
+        domain = domain[len('www.'):]
+    return domain if DOMAIN_PATTERN.match(domain) else None
+
+def _size_lower_bound(size) -> int:
+    """Lower bound of a LinkedIn company size range ('51-200' -> 51, '10001+' -> 10001), 0 if unknown."""
+    match = re.match(r'^\s*(\d+)', str(size))
+    return int(match.group(1)) if match else 0
+
+def load_catalog(path: str = CATALOG_PATH) -> pd.DataFrame:
+    """Reads the newspaper businesses catalog (country, name, size, website, ...)."""
+    return pd.read_csv(path)
+
+def plan_queries(
+        catalog_df: pd.DataFrame,
+        countries: list[str] = None,
+        max_domains_per_request: int = MAX_DOMAINS_PER_REQUEST,
+        max_queries: int = None
+    ) -> list[dict]:
+    """
+    Groups the websites of the catalog into as few requests as possible.
+
+    Websites are normalized to domains and deduplicated, then ordered by company size (largest first) and by the
+    position of their country in countries, so a max_queries budget is spent on the biggest publishers first.
+
+    Args:
+        catalog_df: the catalog, see load_catalog
+        countries: only keep publishers of these countries (as written in the catalog, e.g. 'united states'), in
+            order of priority; all countries if None
+        max_domains_per_request: domains per request
+        max_queries: maximum number of requests in the plan
+
+    Returns:
+        One parameter override per request, e.g. [{'domainurl': ['nytimes.com', ...]}], see fetch_news_concurrently
+    """
+    catalog = catalog_df.assign(domain=catalog_df['website'].map(normalize_domain))
+    catalog = catalog[catalog['domain'].notna()]
+    if countries is not None:
+        country_rank = {country: rank for rank, country in enumerate(countries)}
+        catalog = catalog[catalog['country'].isin(country_rank.keys())]
+        catalog = catalog.assign(country_rank=catalog['country'].map(country_rank))
+    else:
+        catalog = catalog.assign(country_rank=0)
+    catalog = catalog.assign(size_rank=-catalog['size'].map(_size_lower_bound))
+
+    # stable ordering, so the same catalog always gives the same plan
+    catalog = catalog.sort_values(['size_rank', 'country_rank', 'domain'], kind='mergesort')
+    domains = catalog['domain'].drop_duplicates().tolist()
+
+    queries = [{'domainurl': domains[start:start + max_domains_per_request]}
+               for start in range(0, len(domains), max_domains_per_request)]
+    return queries[:max_queries] if max_queries is not None else queries
+
+def run_query_plan(
+        news: News,
+        queries: list[dict],
+        max_workers: int = 4,
+        max_pages: int = None,
+        watermark: ExtractionWatermark = None
+    ) -> tuple:
+    """
+    Runs the queries of a plan concurrently, each following its own "nextPage" cursor, and merges their articles.
+
+    With a watermark, a query stops at its first page without any new article (like the extract stage of the pipeline) and the
+    watermark is updated with the articles returned, once every query is done. A query that fails does not stop the
+    others and the articles of its pages received before the failure are still returned; once the request budget of
+    the scheduler is exhausted the remaining queries are skipped.
+
+    Args:
+        news: base News client, its other parameters (language, country, ...) apply to every query
+        queries: parameter overrides, see plan_queries
+        max_workers: maximum number of queries in flight
+        max_pages: maximum number of pages per query
+        watermark: skip the articles already ingested
+
+    Returns:
+        (articles, failed_queries): the articles with the columns of normalize_news, deduplicated by
+        article_link, and a list of (query, exception) for the queries that failed
+    """
+    budget_exceeded = threading.Event()
+
+    def run_query(query: dict, frames: list) -> None:
+        # pages are filtered against the watermark as it was before the plan, it is only read until every query is done
+        if budget_exceeded.is_set():
+            return
+        try:
+            for response in news.with_params(**query).iter_pages(max_pages=max_pages):
+                if not response.get('results'):
+                    break
+                df = normalize_news(response)
+                if watermark is not None:
+                    df = watermark.filter_new(df)
+                    if df.empty:
+                        break
+                frames.append(df)
+        except RequestBudgetExceeded:
+            budget_exceeded.set()
+            raise
+
+    frames = []
+    failed_queries = []
+    query_frames = [[] for _ in queries]
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(run_query, query, frames) for query, frames in zip(queries, query_frames)]
+        # results are collected in plan order, so the output does not depend on which query finished first
+        for query, future, partial_frames in zip(queries, futures, query_frames):
+            try:
+                future.result()
+            except Exception as exception:
+                failed_queries.append((query, exception))
+            frames.extend(partial_frames)
+
+    if not frames:
+        return normalize_news({'results': []}), failed_queries
+    articles = pd.concat(frames, ignore_index=True)
+    articles = articles[~articles['article_link'].duplicated()].reset_index(drop=True)
+    if watermark is not None:
+        watermark.update(articles)
+    return articles, failed_queries
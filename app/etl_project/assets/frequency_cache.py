@@ -0,0 +1,157 @@
+import time
+import sqlite3
+import hashlib
+import threading
+from pathlib import Path
+import numpy as np
+
+
+def content_hash(article_contents: str) -> str:
+    """Hash of an article text, missing contents hash like an empty article."""
+    text = article_contents if isinstance(article_contents, str) else ''
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()
+
+
+class WordFrequencyCache:
+    """
+    Persistent cache of per-article word counts (and number of words), stored in a local SQLite file.
+
+    Entries are keyed by (article content hash, vocabulary version), so a change to the vocabulary never returns
+    stale counts; entries of other vocabulary versions are dropped on eviction. Eviction also removes entries older
+    than `max_age_seconds` and the least recently used entries above `max_entries`. It runs every `evict_every` puts,
+    when the vocabulary version changes and on close, so the cache can exceed max_entries by a few puts in between.
+
+    A single cache can be shared by several threads.
+    """
+
+    def __init__(self, path: str, max_entries: int = 100_000, max_age_seconds: float = 30 * 24 * 3600, evict_every: int = 100):
+        """
+        Args:
+            path: SQLite file, created if it does not exist
+            max_entries: maximum number of cached articles
+            max_age_seconds: maximum age of a cached article
+            evict_every: number of put_many calls between evictions
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.max_age_seconds = max_age_seconds
+        self.evict_every = evict_every
+        # vocabulary version of the last put, and number of puts since the last eviction
+        self.vocabulary_version = None
+        self.puts_since_eviction = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.RLock()
+
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS word_frequency_cache (
+                content_hash TEXT NOT NULL,
+                vocabulary_version TEXT NOT NULL,
+                word_columns BLOB NOT NULL,
+                word_counts BLOB NOT NULL,
+                token_count INTEGER,
+                created_at REAL NOT NULL,
+                last_used_at REAL NOT NULL,
+                PRIMARY KEY (content_hash, vocabulary_version)
+            )
+        """)
+        # cache files written before token counts were cached, their entries have no token count and are misses
+        if 'token_count' not in [row[1] for row in self.connection.execute("PRAGMA table_info(word_frequency_cache)")]:
+            self.connection.execute("ALTER TABLE word_frequency_cache ADD COLUMN token_count INTEGER")
+        # eviction by age and by last use
+        self.connection.execute("CREATE INDEX IF NOT EXISTS ix_word_frequency_cache_created_at ON word_frequency_cache (created_at)")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS ix_word_frequency_cache_last_used_at ON word_frequency_cache (last_used_at)")
+        self.connection.commit()
+
+    def get_many(self, vocabulary_version: str, content_hashes: list[str]) -> dict:
+        """
+        Looks up cached counts.
+
+        Returns:
+            {content_hash: ({column: count}, number of words)} for the hashes found in the cache
+        """
+        found = {}
+        unique_hashes = list(dict.fromkeys(content_hashes))
+        with self.lock:
+            # stay under SQLite's limit on the number of bind parameters
+            for start in range(0, len(unique_hashes), 500):
+                chunk = unique_hashes[start:start + 500]
+                rows = self.connection.execute(
+                    f"SELECT content_hash, word_columns, word_counts, token_count FROM word_frequency_cache "
+                    f"WHERE vocabulary_version = ? AND token_count IS NOT NULL AND content_hash IN ({','.join('?' * len(chunk))})",
+                    [vocabulary_version, *chunk]
+                ).fetchall()
+                for key, word_columns, word_counts, token_count in rows:
+                    found[key] = (dict(zip(np.frombuffer(word_columns, dtype=np.int32).tolist(),
+                                           np.frombuffer(word_counts, dtype=np.int64).tolist())), token_count)
+
+            if found:
+                self.connection.executemany(
+                    "UPDATE word_frequency_cache SET last_used_at = ? WHERE content_hash = ? AND vocabulary_version = ?",
+                    [(time.time(), key, vocabulary_version) for key in found]
+                )
+                self.connection.commit()
+            self.hits += sum(key in found for key in content_hashes)
+            self.misses += sum(key not in found for key in content_hashes)
+        return found
+
+    def put_many(self, vocabulary_version: str, word_counts: dict) -> None:
+        """
+        Stores counts, and evicts expired entries every evict_every calls or when the vocabulary version changes.
+
+        Args:
+            vocabulary_version: version of the vocabulary the counts were computed with
+            word_counts: {content_hash: ({column: count}, number of words)}
+        """
+        now = time.time()
+        rows = [(key, vocabulary_version, np.asarray(list(counts.keys()), dtype=np.int32).tobytes(),
+                 np.asarray(list(counts.values()), dtype=np.int64).tobytes(), token_count, now, now)
+                for key, (counts, token_count) in word_counts.items()]
+        with self.lock:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO word_frequency_cache "
+                "(content_hash, vocabulary_version, word_columns, word_counts, token_count, created_at, last_used_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)", rows
+            )
+            self.puts_since_eviction += 1
+            if vocabulary_version != self.vocabulary_version or self.puts_since_eviction >= self.evict_every:
+                self.evict(vocabulary_version)
+            else:
+                self.connection.commit()
+            self.vocabulary_version = vocabulary_version
+
+    def evict(self, vocabulary_version: str) -> None:
+        """Removes entries of other vocabulary versions, entries older than max_age_seconds and entries above max_entries."""
+        with self.lock:
+            self.connection.execute("DELETE FROM word_frequency_cache WHERE vocabulary_version != ?", [vocabulary_version])
+            self.connection.execute("DELETE FROM word_frequency_cache WHERE created_at < ?", [time.time() - self.max_age_seconds])
+            self.connection.execute(
+                "DELETE FROM word_frequency_cache WHERE rowid IN "
+                "(SELECT rowid FROM word_frequency_cache ORDER BY last_used_at DESC LIMIT -1 OFFSET ?)",
+                [self.max_entries]
+            )
+            self.connection.commit()
+            self.puts_since_eviction = 0
+
+    def __len__(self) -> int:
+        with self.lock:
+            return self.connection.execute("SELECT count(*) FROM word_frequency_cache").fetchone()[0]
+
+    def stats(self) -> dict:
+        """Number of hits and misses since the cache was opened, and the hit rate."""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'entries': len(self)
+        }
+
+    def close(self) -> None:
+        """Evicts the entries put since the last eviction and closes the SQLite file."""
+        with self.lock:
+            if self.puts_since_eviction:
+                self.evict(self.vocabulary_version)
+            self.connection.close()
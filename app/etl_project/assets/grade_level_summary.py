@@ -0,0 +1,146 @@
+import numpy as np
+import pandas as pd
+from sqlalchemy import Table, Column, String, Text, Float, Integer, BigInteger, MetaData
+from etl_project.connectors.postgresql import PostgreSqlClient
+
+
+ARTICLE_COLUMNS = ['article_link', 'title', 'category', 'publish_date', 'author', 'country']
+
+
+def article_summary_table(metadata: MetaData, name: str = 'article_grade_level_summary') -> Table:
+    """One row per article: sum(frequency x grade_level) and sum(frequency) of its vocabulary words."""
+    return Table(
+        name,
+        metadata,
+        Column('article_link', String, primary_key=True),
+        Column('title', Text),
+        Column('category', String),
+        Column('publish_date', String),
+        Column('author', String),
+        Column('country', String),
+        Column('weighted_grade_sum', Float),
+        Column('frequency_sum', BigInteger),
+        Column('avg_grade_level', Float)
+    )
+
+def category_summary_table(metadata: MetaData, name: str = 'category_grade_level_summary') -> Table:
+    """One row per category: the article sums rolled up, and the number of articles."""
+    return Table(
+        name,
+        metadata,
+        Column('category', String, primary_key=True),
+        Column('weighted_grade_sum', Float),
+        Column('frequency_sum', BigInteger),
+        Column('article_count', Integer),
+        Column('avg_grade_level', Float)
+    )
+
+def summarize_articles(frequencies_df: pd.DataFrame, articles_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Aggregates word frequencies per article.
+
+    Args:
+        frequencies_df: output of process_articles (dense or sparse)
+        articles_df: articles with the columns of normalize_news
+
+    Returns:
+        One row per article_link with the columns of article_grade_level_summary; avg_grade_level is NaN for
+        articles without any vocabulary word
+    """
+    frequencies = frequencies_df['frequency'].to_numpy(dtype=np.int64)
+    weighted = frequencies * frequencies_df['grade_level'].to_numpy(dtype=float)
+    sums = pd.DataFrame({
+        'article_link': frequencies_df['article_link'].to_numpy(),
+        # like sum(frequency * grade_level) in SQL, words without a grade level are left out of the weighted sum
+        'weighted_grade_sum': np.where(np.isnan(weighted), 0.0, weighted),
+        'frequency_sum': frequencies
+    }).groupby('article_link', sort=False).sum()
+
+    articles = articles_df.loc[:, ~articles_df.columns.duplicated()]
+    articles = articles[[column for column in ARTICLE_COLUMNS if column in articles.columns]]
+    summary = articles.drop_duplicates('article_link', keep='last').merge(sums, how='left', left_on='article_link', right_index=True)
+    summary['weighted_grade_sum'] = summary['weighted_grade_sum'].fillna(0.0)
+    summary['frequency_sum'] = summary['frequency_sum'].fillna(0).astype(np.int64)
+    summary['avg_grade_level'] = summary['weighted_grade_sum'] / summary['frequency_sum'].where(summary['frequency_sum'] > 0)
+    return summary.reset_index(drop=True)
+
+def merge_grade_level_summaries(summary_df: pd.DataFrame, postgresql_client: PostgreSqlClient, metadata: MetaData = None,
+                                article_table_name: str = 'article_grade_level_summary',
+                                category_table_name: str = 'category_grade_level_summary') -> None:
+    """
+    Merges per-article summaries into the article (article_grade_level_summary) and category
+    (category_grade_level_summary) summary tables in one transaction.
+
+    Category rollups are updated with a delta instead of being recomputed: the new sums of each article are added
+    and, for articles that were already summarized (same article_link), their previous sums are subtracted.
+    Categories are keyed by the text stored in news_raw_table (e.g. '{business,politics}').
+    """
+    metadata = metadata if metadata is not None else MetaData()
+    article_table = article_summary_table(metadata, name=article_table_name)
+    category_table = category_summary_table(metadata, name=category_table_name)
+    delta_table_name = f"{article_table_name}_delta"
+
+    columns = [column.name for column in article_table.columns if column.name in summary_df.columns]
+    column_list = ', '.join(columns)
+    update_list = ', '.join(f"{column} = EXCLUDED.{column}" for column in columns if column != 'article_link')
+
+    with postgresql_client.transaction() as connection:
+        metadata.create_all(connection, tables=[article_table, category_table])
+        cursor = connection.connection.cursor()
+        cursor.execute(f"DROP TABLE IF EXISTS {delta_table_name}")
+        cursor.execute(
+            f"CREATE TEMPORARY TABLE {delta_table_name} "
+            f"(LIKE {article_table_name} INCLUDING DEFAULTS) ON COMMIT DROP"
+        )
+        postgresql_client.copy_from_df(cursor, summary_df, delta_table_name, columns)
+        cursor.execute(f"""
+            WITH delta AS (
+                SELECT coalesce(category, '') AS category, weighted_grade_sum, frequency_sum, 1 AS article_count
+                FROM {delta_table_name}
+                UNION ALL
+                SELECT coalesce(previous.category, ''), -previous.weighted_grade_sum, -previous.frequency_sum, -1
+                FROM {article_table_name} AS previous
+                JOIN {delta_table_name} USING (article_link)
+            )
+            INSERT INTO {category_table_name} AS rollup (category, weighted_grade_sum, frequency_sum, article_count, avg_grade_level)
+            SELECT category, sum(weighted_grade_sum), sum(frequency_sum), sum(article_count),
+                   sum(weighted_grade_sum) / nullif(sum(frequency_sum), 0)
+            FROM delta
+            GROUP BY category
+            ON CONFLICT (category) DO UPDATE SET
+                weighted_grade_sum = rollup.weighted_grade_sum + EXCLUDED.weighted_grade_sum,
+                frequency_sum = rollup.frequency_sum + EXCLUDED.frequency_sum,
+                article_count = rollup.article_count + EXCLUDED.article_count,
+                avg_grade_level = (rollup.weighted_grade_sum + EXCLUDED.weighted_grade_sum)
+                                  / nullif(rollup.frequency_sum + EXCLUDED.frequency_sum, 0)
+        """)
+        cursor.execute(
+            f"INSERT INTO {article_table_name} ({column_list}) "
+            f"SELECT {column_list} FROM {delta_table_name} "
+            f"ON CONFLICT (article_link) DO UPDATE SET {update_list}"
+        )
+
+def delete_article_summaries(connection, expired_table_name: str, article_table_name: str = 'article_grade_level_summary',
+                             category_table_name: str = 'category_grade_level_summary') -> None:
+    """
+    Deletes the summaries of the articles listed in expired_table_name (an article_link column) and subtracts them
+    from their category rollups, in the transaction of connection. Categories left without any article are deleted.
+    """
+    connection.execute(f"""
+        UPDATE {category_table_name} AS rollup SET
+            weighted_grade_sum = rollup.weighted_grade_sum - expired.weighted_grade_sum,
+            frequency_sum = rollup.frequency_sum - expired.frequency_sum,
+            article_count = rollup.article_count - expired.article_count,
+            avg_grade_level = (rollup.weighted_grade_sum - expired.weighted_grade_sum)
+                              / nullif(rollup.frequency_sum - expired.frequency_sum, 0)
+        FROM (
+            SELECT coalesce(category, '') AS category, sum(weighted_grade_sum) AS weighted_grade_sum,
+                   sum(frequency_sum) AS frequency_sum, count(*) AS article_count
+            FROM {article_table_name}
+            WHERE article_link IN (SELECT article_link FROM {expired_table_name})
+            GROUP BY 1
+        ) AS expired
+        WHERE rollup.category = expired.category
+    """)
+    connection.execute(f"DELETE FROM {category_table_name} WHERE article_count <= 0")
+    connection.execute(f"DELETE FROM {article_table_name} WHERE article_link IN (SELECT article_link FROM {expired_table_name})")
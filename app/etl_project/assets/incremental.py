@@ -0,0 +1,120 @@
+import json
+from pathlib import Path
+import pandas as pd
+from sqlalchemy import Table, Column, String, Text, MetaData
+from etl_project.connectors.postgresql import PostgreSqlClient
+
+
+class ExtractionWatermark:
+    """
+    High-water mark of an incremental extraction: the latest publish date loaded so far, the last "nextPage" cursor
+    and an index of the article links already ingested.
+
+    The index only needs to cover the articles the API can still return, so links published more than
+    `retention_hours` before the high-water mark are pruned, and articles older than that horizon are skipped.
+    """
+
+    def __init__(self, last_publish_date: str = None, next_page: str = None, seen_links: dict = None,
+                 retention_hours: int = 48):
+        """
+        Args:
+            last_publish_date: latest publish date ingested so far
+            next_page: last "nextPage" cursor received
+            seen_links: {article_link: publish_date} of the articles already ingested
+            retention_hours: how long a link is remembered, must be longer than the extraction timeframe
+        """
+        self.last_publish_date = last_publish_date
+        self.next_page = next_page
+        self.seen_links = dict(seen_links or {})
+        self.retention_hours = retention_hours
+
+    def _horizon(self) -> pd.Timestamp:
+        if self.last_publish_date is None:
+            return None
+        return pd.Timestamp(self.last_publish_date) - pd.Timedelta(hours=self.retention_hours)
+
+    def filter_new(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Keeps the articles that were not ingested yet (by article_link), also dropping duplicates within the batch.
+
+        Args:
+            df: articles with 'article_link' and 'publish_date' columns
+
+        Returns:
+            The new articles
+        """
+        is_new = ~df['article_link'].isin(self.seen_links.keys()) & ~df['article_link'].duplicated()
+        horizon = self._horizon()
+        if horizon is not None:
+            is_new &= ~(pd.to_datetime(df['publish_date'], errors='coerce') < horizon)
+        return df[is_new]
+
+    def update(self, df: pd.DataFrame, next_page: str = None) -> None:
+        """
+        Records a batch of ingested articles and moves the high-water mark forward.
+        """
+        publish_dates = pd.to_datetime(df['publish_date'], errors='coerce')
+        for link, publish_date in zip(df['article_link'], publish_dates):
+            self.seen_links[link] = None if pd.isnull(publish_date) else str(publish_date)
+
+        latest = publish_dates.max()
+        if not pd.isnull(latest) and (self.last_publish_date is None or latest > pd.Timestamp(self.last_publish_date)):
+            self.last_publish_date = str(latest)
+        if next_page is not None:
+            self.next_page = next_page
+
+        horizon = self._horizon()
+        if horizon is not None:
+            self.seen_links = {link: publish_date for link, publish_date in self.seen_links.items()
+                               if publish_date is None or pd.Timestamp(publish_date) >= horizon}
+
+    def to_dict(self) -> dict:
+        return {
+            'last_publish_date': self.last_publish_date,
+            'next_page': self.next_page,
+            'seen_links': self.seen_links,
+            'retention_hours': self.retention_hours
+        }
+
+    @classmethod
+    def from_dict(cls, state: dict) -> "ExtractionWatermark":
+        return cls(**state)
+
+    def save(self, path: str) -> None:
+        """Saves the watermark to a local JSON file."""
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        Path(path).write_text(json.dumps(self.to_dict()))
+
+    @classmethod
+    def load(cls, path: str, retention_hours: int = 48) -> "ExtractionWatermark":
+        """Loads the watermark from a local JSON file, or starts a new one if the file does not exist."""
+        if not Path(path).exists():
+            return cls(retention_hours=retention_hours)
+        return cls.from_dict(json.loads(Path(path).read_text()))
+
+
+def extraction_state_table(metadata: MetaData) -> Table:
+    """Table holding one JSON watermark per extraction."""
+    return Table(
+        'extraction_state',
+        metadata,
+        Column('name', String, primary_key=True),
+        Column('state', Text)
+    )
+
+def save_watermark(watermark: ExtractionWatermark, postgresql_client: PostgreSqlClient, name: str) -> None:
+    """Saves the watermark of an extraction to the extraction_state table."""
+    metadata = MetaData()
+    table = extraction_state_table(metadata)
+    postgresql_client.upsert(data=[{'name': name, 'state': json.dumps(watermark.to_dict())}], table=table, metadata=metadata)
+
+def load_watermark(postgresql_client: PostgreSqlClient, name: str, retention_hours: int = 48) -> ExtractionWatermark:
+    """Loads the watermark of an extraction from the extraction_state table, or starts a new one."""
+    metadata = MetaData()
+    table = extraction_state_table(metadata)
+    with postgresql_client.transaction() as connection:
+        metadata.create_all(connection)
+        row = connection.execute(table.select().where(table.c.name == name)).first()
+    if row is None:
+        return ExtractionWatermark(retention_hours=retention_hours)
+    return ExtractionWatermark.from_dict(json.loads(row['state']))
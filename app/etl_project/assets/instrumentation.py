@@ -0,0 +1,180 @@
+import datetime
+import functools
+import json
+import os
+import sys
+import time
+import uuid
+from contextlib import contextmanager
+from sqlalchemy import Table, Column, String, Float, BigInteger, DateTime, MetaData
+from etl_project.connectors.postgresql import PostgreSqlClient
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+
+STAGE_COLUMNS = ['run_id', 'pipeline', 'stage', 'status', 'started_at', 'wall_seconds', 'cpu_seconds', 'rows_in',
+                 'rows_out', 'bytes_transferred', 'retries', 'peak_rss_mb']
+
+
+def peak_rss_mb() -> float:
+    """
+    Peak resident set size of the process so far, in MB (None where the resource module is not available). This is the
+    high-water mark of the whole process lifetime, not the memory used by one stage.
+    """
+    if resource is None:
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return max_rss / 2 ** 20 if sys.platform == 'darwin' else max_rss / 2 ** 10
+
+def run_metrics_table(metadata: MetaData) -> Table:
+    """One row per stage of a pipeline run."""
+    return Table(
+        'pipeline_run_metrics',
+        metadata,
+        Column('run_id', String, primary_key=True),
+        Column('stage', String, primary_key=True),
+        Column('pipeline', String),
+        Column('status', String),
+        Column('started_at', DateTime(timezone=True)),
+        Column('wall_seconds', Float),
+        Column('cpu_seconds', Float),
+        Column('rows_in', BigInteger),
+        Column('rows_out', BigInteger),
+        Column('bytes_transferred', BigInteger),
+        Column('retries', BigInteger),
+        Column('peak_rss_mb', Float)
+    )
+
+
+class RunMetrics:
+    """
+    Records the wall and CPU time, row counts, bytes transferred, retries and peak RSS of each stage of a pipeline run.
+
+    Every finished stage is written as one JSON line to stream:
+
+        metrics = RunMetrics(pipeline='news_etl')
+        with metrics.stage('extract', counters=lambda: {'bytes_transferred': news.bytes_received}) as stage:
+            df = extract()
+            stage['rows_out'] = len(df)
+
+    and the whole run can be exported to a Prometheus textfile or to the pipeline_run_metrics table.
+
+    cpu_seconds is the CPU time of the thread running the stage, so stages running concurrently on a thread pool do not
+    count each other's time; the CPU time of process pool workers (e.g. word counting with WORKERS > 1) is not counted.
+    peak_rss_mb is the peak of the process so far (see peak_rss_mb), not a per-stage figure.
+    """
+
+    def __init__(self, pipeline: str, run_id: str = None, stream=None):
+        """
+        Args:
+            pipeline: name of the pipeline, a label of every metric
+            run_id: identifier of the run, a random one if None
+            stream: file the JSON lines are written to, sys.stdout if None
+        """
+        self.pipeline = pipeline
+        self.run_id = run_id if run_id is not None else uuid.uuid4().hex
+        self.stream = stream
+        self.stages = []
+
+    @contextmanager
+    def stage(self, name: str, rows_in: int = None, counters=None):
+        """
+        Measures the block as one stage. The block can set 'rows_out' (and any other JSON value) on the yielded record.
+
+        Args:
+            name: name of the stage, unique within the run
+            rows_in: number of rows the stage starts from
+            counters: callable returning cumulative counters, e.g. {'bytes_transferred': ..., 'retries': ...}; the
+                record gets the increase of each counter during the stage
+
+        Raises:
+            Re-raises the exception of the block, after recording the stage with status 'failed'
+        """
+        record = {'stage': name, 'status': 'success', 'rows_in': rows_in, 'rows_out': None}
+        counters_before = counters() if counters is not None else {}
+        started_at = datetime.datetime.now(datetime.timezone.utc)
+        wall_start = time.perf_counter()
+        cpu_start = time.thread_time()
+        try:
+            yield record
+        except BaseException as exception:
+            record['status'] = 'failed'
+            record['error'] = f"{type(exception).__name__}: {exception}"
+            raise
+        finally:
+            record['started_at'] = started_at.isoformat()
+            record['wall_seconds'] = time.perf_counter() - wall_start
+            record['cpu_seconds'] = time.thread_time() - cpu_start
+            record['peak_rss_mb'] = peak_rss_mb()
+            for counter, value in (counters() if counters is not None else {}).items():
+                record[counter] = value - counters_before.get(counter, 0)
+            self.stages.append(record)
+            self._emit(record)
+
+    def instrumented(self, name: str = None, counters=None):
+        """
+        Decorator measuring every call of a function as a stage (see stage), rows_out is the length of its result.
+        """
+        def decorator(function):
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                with self.stage(name if name is not None else function.__name__, counters=counters) as record:
+                    result = function(*args, **kwargs)
+                    if hasattr(result, '__len__'):
+                        record['rows_out'] = len(result)
+                    return result
+            return wrapper
+        return decorator
+
+    def _emit(self, record: dict) -> None:
+        line = json.dumps({'event': 'stage', 'pipeline': self.pipeline, 'run_id': self.run_id, **record}, default=str)
+        print(line, file=self.stream if self.stream is not None else sys.stdout, flush=True)
+
+    def to_prometheus(self) -> str:
+        """The stages in the Prometheus text exposition format, one gauge per measurement."""
+        gauges = {
+            'wall_seconds': 'Wall clock time of the stage',
+            'cpu_seconds': 'CPU time of the thread running the stage, worker processes not included',
+            'rows_in': 'Rows the stage started from',
+            'rows_out': 'Rows produced by the stage',
+            'bytes_transferred': 'Bytes received from the API during the stage',
+            'retries': 'Retried requests during the stage',
+            'peak_rss_mb': 'Peak resident set size of the process at the end of the stage'
+        }
+        lines = []
+        for measurement, description in gauges.items():
+            metric = f"etl_stage_{measurement}"
+            lines += [f"# HELP {metric} {description}", f"# TYPE {metric} gauge"]
+            for record in self.stages:
+                if record.get(measurement) is not None:
+                    lines.append(f'{metric}{{pipeline="{self.pipeline}",stage="{record["stage"]}",status="{record["status"]}"}} {record[measurement]}')
+        lines += ["# HELP etl_run_success Whether every stage of the last run succeeded", "# TYPE etl_run_success gauge",
+                  f'etl_run_success{{pipeline="{self.pipeline}"}} {int(all(record["status"] == "success" for record in self.stages))}',
+                  "# HELP etl_run_timestamp_seconds End of the last run", "# TYPE etl_run_timestamp_seconds gauge",
+                  f'etl_run_timestamp_seconds{{pipeline="{self.pipeline}"}} {time.time()}']
+        return '\n'.join(lines) + '\n'
+
+    def write_prometheus_textfile(self, path: str) -> None:
+        """
+        Writes the stages to a textfile for the node_exporter textfile collector. The file is replaced atomically so
+        the collector never reads a partial file.
+        """
+        temporary_path = f"{path}.{os.getpid()}.tmp"
+        with open(temporary_path, 'w') as textfile:
+            textfile.write(self.to_prometheus())
+        os.replace(temporary_path, path)
+
+    def save(self, postgresql_client: PostgreSqlClient, metadata: MetaData = None) -> None:
+        """Upserts the stages into the pipeline_run_metrics table."""
+        metadata = metadata if metadata is not None else MetaData()
+        table = run_metrics_table(metadata)
+        rows = [{column: record.get(column) for column in STAGE_COLUMNS if column not in {'run_id', 'pipeline'}}
+                for record in self.stages]
+        for row in rows:
+            row.update(run_id=self.run_id, pipeline=self.pipeline)
+        if rows:
+            postgresql_client.upsert(data=rows, table=table, metadata=metadata)
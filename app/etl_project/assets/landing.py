@@ -0,0 +1,151 @@
+import datetime
+import gzip
+import json
+import os
+import shutil
+import threading
+import uuid
+from pathlib import Path
+
+
+class LandingZone:
+    """
+    Keeps the raw API responses so articles can be reprocessed (e.g. after a vocabulary change) without calling
+    the API again.
+
+    Every page received by a News client with this landing zone is appended as one JSON line to a gzip file of the
+    run, partitioned by the UTC date it was fetched on: <path>/date=YYYY-MM-DD/<run>.jsonl.gz. Files are written
+    under a .tmp name and renamed when closed, so a replay never reads a partial file. With s3_bucket, closed files
+    are also uploaded to s3://<s3_bucket>/<s3_prefix>/date=YYYY-MM-DD/<run>.jsonl.gz.
+
+    Local partitions are kept until delete_older_than() removes them, the expiry of the S3 copies is left to a
+    lifecycle rule of the bucket.
+    """
+
+    def __init__(self, path: str = 'etl_project/data/landing', s3_bucket: str = None, s3_prefix: str = 'landing',
+                 s3_client=None):
+        """
+        Args:
+            path: local directory of the landing zone
+            s3_bucket: bucket the landed files are mirrored to, local only if None
+            s3_prefix: key prefix of the landed files in the bucket
+            s3_client: boto3 S3 client, created on first use if not given
+        """
+        self.path = Path(path)
+        self.s3_bucket = s3_bucket
+        self.s3_prefix = s3_prefix.strip('/')
+        self.s3_client = s3_client
+        self.run_id = f"{datetime.datetime.utcnow():%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}"
+        self.lock = threading.Lock()
+        self.files = {}
+
+    def _partition(self, date: datetime.date) -> str:
+        return f"date={date.isoformat()}"
+
+    def write(self, response: dict, params: dict = None) -> None:
+        """Appends one API response, and the parameters of the request, to the file of the current date."""
+        fetched_at = datetime.datetime.now(datetime.timezone.utc)
+        line = json.dumps({'fetched_at': fetched_at.isoformat(), 'params': params, 'response': response}) + '\n'
+        with self.lock:
+            partition = self._partition(fetched_at.date())
+            if partition not in self.files:
+                directory = self.path / partition
+                directory.mkdir(parents=True, exist_ok=True)
+                self.files[partition] = gzip.open(directory / f"{self.run_id}.jsonl.gz.tmp", 'wt', encoding='utf-8')
+            self.files[partition].write(line)
+
+    def close(self) -> list[Path]:
+        """
+        Closes the files of the run, and uploads them when the landing zone has an S3 bucket.
+
+        Returns:
+            The landed files
+        """
+        landed = []
+        with self.lock:
+            for partition, file in self.files.items():
+                file.close()
+                temporary_path = Path(file.name)
+                path = temporary_path.with_name(temporary_path.name[:-len('.tmp')])
+                os.replace(temporary_path, path)
+                landed.append(path)
+                if self.s3_bucket is not None:
+                    self._s3().upload_file(str(path), self.s3_bucket, f"{self.s3_prefix}/{partition}/{path.name}")
+            self.files = {}
+        return landed
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _s3(self):
+        if self.s3_client is None:
+            import boto3
+            self.s3_client = boto3.client('s3', region_name='us-east-1')
+        return self.s3_client
+
+    def _in_range(self, partition: str, start_date: datetime.date, end_date: datetime.date) -> bool:
+        try:
+            date = datetime.date.fromisoformat(partition[len('date='):])
+        except ValueError:
+            return False
+        return (start_date is None or date >= start_date) and (end_date is None or date <= end_date)
+
+    def _download(self, start_date: datetime.date, end_date: datetime.date) -> None:
+        """Downloads the landed files of the date range that are not in the local directory yet."""
+        paginator = self._s3().get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self.s3_bucket, Prefix=f"{self.s3_prefix}/"):
+            for s3_object in page.get('Contents', []):
+                partition, name = s3_object['Key'][len(self.s3_prefix) + 1:].split('/', 1)
+                path = self.path / partition / name
+                if self._in_range(partition, start_date, end_date) and not path.exists():
+                    path.parent.mkdir(parents=True, exist_ok=True)
+                    self._s3().download_file(self.s3_bucket, s3_object['Key'], str(path))
+
+    def delete_older_than(self, date: datetime.date) -> list[Path]:
+        """
+        Deletes the local partitions of the dates before date, except the ones the current run is writing to.
+
+        Returns:
+            The deleted partition directories
+        """
+        if not self.path.exists():
+            return []
+        deleted = []
+        with self.lock:
+            for directory in sorted(self.path.iterdir()):
+                if directory.is_dir() and directory.name not in self.files and self._in_range(directory.name, None, date - datetime.timedelta(days=1)):
+                    shutil.rmtree(directory)
+                    deleted.append(directory)
+        return deleted
+
+    def landed_files(self, start_date: datetime.date = None, end_date: datetime.date = None) -> list[Path]:
+        """The closed files of the date range (inclusive), oldest partition first."""
+        if not self.path.exists():
+            return []
+        return sorted(path for directory in self.path.iterdir() if directory.is_dir() and self._in_range(directory.name, start_date, end_date)
+                      for path in directory.glob('*.jsonl.gz'))
+
+    def replay(self, start_date: datetime.date = None, end_date: datetime.date = None):
+        """
+        Reads back the landed responses of a date range, in the order they were fetched within each file.
+
+        Files are streamed line by line, so memory holds a single page. Articles only keep the fields read by
+        normalize_news. With an S3 bucket, missing files are downloaded first.
+
+        Returns:
+            A generator of API responses, to be used like News.iter_pages() (e.g. with run_streaming)
+        """
+        # imported here so that landing pages does not import pandas and the other dependencies of extract_news
+        from etl_project.assets.extract_news import NEWS_FIELDS
+        if self.s3_bucket is not None:
+            self._download(start_date, end_date)
+        for path in self.landed_files(start_date, end_date):
+            with gzip.open(path, 'rt', encoding='utf-8') as file:
+                for line in file:
+                    response = json.loads(line)['response']
+                    response['results'] = [{field: article.get(field) for field in NEWS_FIELDS}
+                                           for article in response.get('results') or []]
+                    yield response
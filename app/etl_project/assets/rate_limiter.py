@@ -0,0 +1,167 @@
+import time
+import random
+import threading
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+import requests
+
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class RequestBudgetExceeded(Exception):
+    """Raised when a run has used all of the requests it is allowed to send."""
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: holds at most `capacity` tokens and refills at `rate` tokens per second.
+    """
+
+    def __init__(self, rate: float, capacity: float, clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.clock = clock
+        self.sleep = sleep
+        self.updated_at = clock()
+        self.lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1) -> float:
+        """
+        Takes tokens from the bucket, sleeping until they are available.
+
+        Returns:
+            The number of seconds spent waiting
+        """
+        waited = 0.0
+        with self.lock:
+            while True:
+                now = self.clock()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return waited
+                delay = (tokens - self.tokens) / self.rate
+                self.sleep(delay)
+                waited += delay
+
+
+class RequestScheduler:
+    """
+    Sends requests within the NewsData.io rate limits and retries throttled or failed requests.
+
+    Requests are spaced out with a token bucket (by default 30 requests per 15 minutes, the limit of the free plan).
+    Responses with a 429 or 5xx status code and connection errors are retried with exponential backoff and full
+    jitter, unless the server sends a Retry-After header, which is followed instead (up to backoff_max). An optional
+    request budget caps the number of requests (API credits) a run may use, retries included; a long-running process
+    calls start_run() at the start of every run to give it a fresh budget.
+
+    A single scheduler can be shared by several News clients and threads.
+    """
+
+    def __init__(self, requests_per_window: int = 30, window_seconds: float = 900, max_retries: int = 5,
+                 backoff_base: float = 1.0, backoff_max: float = 60.0, request_budget: int = None,
+                 clock=time.monotonic, sleep=time.sleep):
+        """
+        Args:
+            requests_per_window: number of requests allowed per window, also the size of a burst
+            window_seconds: length of the rate limit window in seconds
+            max_retries: number of retries of a single request before giving up
+            backoff_base: delay before the first retry, doubled on every retry
+            backoff_max: maximum delay between two retries, Retry-After included
+            request_budget: maximum number of requests sent per run (see start_run), None for no limit
+        """
+        self.bucket = TokenBucket(rate=requests_per_window / window_seconds, capacity=requests_per_window,
+                                  clock=clock, sleep=sleep)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.request_budget = request_budget
+        self.sleep = sleep
+        self.lock = threading.Lock()
+
+        self.requests_sent = 0
+        # requests sent since start_run, counted against request_budget
+        self.run_requests_sent = 0
+        self.retries = 0
+        self.throttled = 0
+        self.rate_limit_wait_seconds = 0.0
+        self.backoff_wait_seconds = 0.0
+
+    def _backoff(self, attempt: int, response: requests.Response = None) -> float:
+        """Delay before the next attempt: the Retry-After header if there is one, else exponential backoff with jitter."""
+        retry_after = response.headers.get('Retry-After') if response is not None else None
+        if retry_after is not None:
+            try:
+                return min(self.backoff_max, max(0.0, float(retry_after)))
+            except ValueError:
+                try:
+                    retry_at = parsedate_to_datetime(retry_after)
+                    return min(self.backoff_max, max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds()))
+                except (TypeError, ValueError):
+                    pass
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def start_run(self) -> None:
+        """Starts a new run: the request budget applies again from zero. The other counters keep accumulating."""
+        with self.lock:
+            self.run_requests_sent = 0
+
+    def _take_budget(self) -> None:
+        with self.lock:
+            if self.request_budget is not None and self.run_requests_sent >= self.request_budget:
+                raise RequestBudgetExceeded(f'Request budget of {self.request_budget} requests exceeded.')
+            self.requests_sent += 1
+            self.run_requests_sent += 1
+
+    def send(self, send_request) -> requests.Response:
+        """
+        Sends a request, waiting for the rate limit and retrying it when needed.
+
+        Args:
+            send_request: function without arguments that sends the request and returns a requests.Response
+
+        Returns:
+            The last response received, which may still be an error if the retries ran out
+
+        Raises:
+            RequestBudgetExceeded if the request budget is used up
+            requests.RequestException if the last attempt failed with a connection error
+        """
+        attempt = 0
+        while True:
+            self._take_budget()
+            waited = self.bucket.acquire()
+            with self.lock:
+                self.rate_limit_wait_seconds += waited
+
+            response = None
+            try:
+                response = send_request()
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt >= self.max_retries:
+                    raise
+            else:
+                if response.status_code not in RETRY_STATUS_CODES or attempt >= self.max_retries:
+                    return response
+
+            delay = self._backoff(attempt, response)
+            with self.lock:
+                self.retries += 1
+                self.throttled += int(response is not None and response.status_code == 429)
+                self.backoff_wait_seconds += delay
+            self.sleep(delay)
+            attempt += 1
+
+    def stats(self) -> dict:
+        """Counters of requests sent, retries and time spent waiting, in seconds."""
+        with self.lock:
+            return {
+                'requests_sent': self.requests_sent,
+                'retries': self.retries,
+                'throttled': self.throttled,
+                'rate_limit_wait_seconds': self.rate_limit_wait_seconds,
+                'backoff_wait_seconds': self.backoff_wait_seconds
+            }
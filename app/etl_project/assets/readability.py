@@ -0,0 +1,93 @@
+import numpy as np
+import pandas as pd
+from sqlalchemy import Table, Column, String, Text, Float, Integer, BigInteger, MetaData
+from sqlalchemy.dialects.postgresql import ARRAY
+from etl_project.connectors.postgresql import PostgreSqlClient
+
+
+# grade levels of the vocabulary (data/vocabulary_by_gradelv.csv), one histogram bin each
+GRADE_LEVELS = np.arange(1, 13)
+
+
+def article_readability_table(metadata: MetaData, name: str = 'article_readability') -> Table:
+    """
+    Readability features, one row per article.
+
+    grade_level_hits[g] (1-based like PostgreSQL arrays) is the number of vocabulary words of grade g in the article.
+    """
+    return Table(
+        name,
+        metadata,
+        Column('article_link', String, primary_key=True),
+        Column('title', Text),
+        Column('token_count', Integer),
+        Column('vocabulary_hits', BigInteger),
+        Column('distinct_vocabulary_hits', Integer),
+        Column('avg_grade_level', Float),
+        Column('grade_level_hits', ARRAY(Integer))
+    )
+
+def readability_features(
+        article_index: np.ndarray,
+        word_index: np.ndarray,
+        frequencies: np.ndarray,
+        grade_levels: np.ndarray,
+        token_counts: np.ndarray
+    ) -> dict:
+    """
+    Reduces the non-zero (article, word, frequency) counts of a batch of articles to per-article features.
+
+    Args:
+        article_index, word_index, frequencies: output of VocabularyMatcher.count_sparse
+        grade_levels: grade level of each vocabulary word (NaN if it has none)
+        token_counts: number of words of each article, the length gives the number of articles
+
+    Returns:
+        {feature: array with one value per article}: token_count, vocabulary_hits, distinct_vocabulary_hits,
+        avg_grade_level (NaN without any vocabulary word, like summarize_articles) and grade_level_hits
+        (articles x GRADE_LEVELS matrix)
+    """
+    n_articles = len(token_counts)
+    frequencies = np.asarray(frequencies, dtype=np.int64)
+    word_grade_levels = grade_levels[word_index]
+    graded = ~np.isnan(word_grade_levels)
+
+    vocabulary_hits = np.bincount(article_index, weights=frequencies, minlength=n_articles).astype(np.int64)
+    distinct_vocabulary_hits = np.bincount(article_index, minlength=n_articles).astype(np.int32)
+    # like sum(frequency * grade_level) / sum(frequency) in SQL, words without a grade level only count in the divisor
+    weighted_grade_sum = np.bincount(article_index[graded], weights=frequencies[graded] * word_grade_levels[graded],
+                                     minlength=n_articles)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        avg_grade_level = np.where(vocabulary_hits > 0, weighted_grade_sum / vocabulary_hits, np.nan)
+
+    # one bincount over (article, grade) cells; grades are rounded to the nearest bin
+    grade_bin = np.clip(np.rint(word_grade_levels[graded]).astype(np.int64), GRADE_LEVELS[0], GRADE_LEVELS[-1]) - GRADE_LEVELS[0]
+    grade_level_hits = np.bincount(article_index[graded] * len(GRADE_LEVELS) + grade_bin, weights=frequencies[graded],
+                                   minlength=n_articles * len(GRADE_LEVELS)).astype(np.int64).reshape(n_articles, len(GRADE_LEVELS))
+
+    return {
+        'token_count': np.asarray(token_counts, dtype=np.int32),
+        'vocabulary_hits': vocabulary_hits,
+        'distinct_vocabulary_hits': distinct_vocabulary_hits,
+        'avg_grade_level': avg_grade_level,
+        'grade_level_hits': grade_level_hits
+    }
+
+def readability_df(features: dict, titles: np.ndarray, article_links: np.ndarray) -> pd.DataFrame:
+    """One row per article_link with the columns of article_readability, the last row wins for a repeated article."""
+    df = pd.DataFrame({
+        'article_link': article_links,
+        'title': titles,
+        'token_count': features['token_count'],
+        'vocabulary_hits': features['vocabulary_hits'],
+        'distinct_vocabulary_hits': features['distinct_vocabulary_hits'],
+        'avg_grade_level': features['avg_grade_level'],
+        'grade_level_hits': list(features['grade_level_hits'].tolist())
+    })
+    return df.drop_duplicates('article_link', keep='last').reset_index(drop=True)
+
+def merge_readability(readability: pd.DataFrame, postgresql_client: PostgreSqlClient, metadata: MetaData = None,
+                      table_name: str = 'article_readability') -> None:
+    """Upserts the readability features of articles, a reprocessed article replaces its previous row."""
+    metadata = metadata if metadata is not None else MetaData()
+    postgresql_client.bulk_upsert(df=readability, table=article_readability_table(metadata, name=table_name), metadata=metadata)
@@ -0,0 +1,173 @@
+import datetime
+import pandas as pd
+from sqlalchemy import Table, Column, Index, ForeignKey, String, Text, Integer, Float, MetaData, TIMESTAMP
+from sqlalchemy.dialects.postgresql import ARRAY
+from etl_project.connectors.postgresql import PostgreSqlClient
+from etl_project.assets.grade_level_summary import delete_article_summaries
+
+
+def news_raw_table(metadata: MetaData, partition_by_publish_date: bool = False, name: str = 'news_raw_table') -> Table:
+    """
+    Articles, one row per article_link.
+
+    With partition_by_publish_date the table is range partitioned by month of publish_date. PostgreSQL requires the
+    partition key in every unique constraint, so the primary key becomes (article_link, publish_date).
+    """
+    return Table(
+        name,
+        metadata,
+        Column('title', String),
+        Column('article_link', String, primary_key=True),
+        Column('keywords', ARRAY(Text)),
+        Column('author', ARRAY(Text)),
+        Column('publish_date', TIMESTAMP(timezone=True), primary_key=partition_by_publish_date),
+        Column('article_contents', Text),
+        Column('category', String),
+        Column('country', String),
+        Column('language', String),
+        Index(f'ix_{name}_title', 'title'),
+        Index(f'ix_{name}_publish_date', 'publish_date'),
+        Index(f'ix_{name}_category', 'category'),
+        **({'postgresql_partition_by': 'RANGE (publish_date)'} if partition_by_publish_date else {})
+    )
+
+def grade_level_word_frequency_table(metadata: MetaData, partition_by_publish_date: bool = False,
+                                     name: str = 'grade_level_word_frequency', news_table_name: str = 'news_raw_table') -> Table:
+    """
+    Word frequencies, one row per (article, vocabulary word).
+
+    article_link references the news table and frequencies are deleted with their article. A partitioned
+    news_raw_table has no unique key on article_link alone, so the foreign key is left out in that case.
+    """
+    article_link_references = [] if partition_by_publish_date else [ForeignKey(f'{news_table_name}.article_link', ondelete='CASCADE')]
+    return Table(
+        name,
+        metadata,
+        Column('title', Text),
+        Column('word', String),
+        Column('frequency', Integer),
+        Column('grade_level', Float),
+        Column('article_link', String, *article_link_references),
+        Index(f'ix_{name}_article_link', 'article_link'),
+        Index(f'ix_{name}_title', 'title')
+    )
+
+def create_schema(postgresql_client: PostgreSqlClient, metadata: MetaData, partition_by_publish_date: bool = False,
+                  news_table_name: str = 'news_raw_table', frequency_table_name: str = 'grade_level_word_frequency') -> dict:
+    """
+    Creates the news and frequency tables, their keys and indexes if they do not exist yet. Existing tables are
+    left untouched, this does not migrate tables created with another definition.
+
+    Tables already defined in metadata (e.g. a news table shared by several frequency tables) are reused.
+
+    Returns:
+        {'news': news_raw_table, 'frequency': grade_level_word_frequency_table}
+    """
+    news_table = metadata.tables.get(news_table_name)
+    if news_table is None:
+        news_table = news_raw_table(metadata, partition_by_publish_date=partition_by_publish_date, name=news_table_name)
+    frequency_table = metadata.tables.get(frequency_table_name)
+    if frequency_table is None:
+        frequency_table = grade_level_word_frequency_table(metadata, partition_by_publish_date=partition_by_publish_date,
+                                                           name=frequency_table_name, news_table_name=news_table_name)
+    tables = {'news': news_table, 'frequency': frequency_table}
+    with postgresql_client.transaction() as connection:
+        metadata.create_all(connection, tables=list(tables.values()))
+        if partition_by_publish_date:
+            today = datetime.date.today()
+            connection.execute(f"CREATE TABLE IF NOT EXISTS {news_table_name}_default PARTITION OF {news_table_name} DEFAULT")
+            ensure_monthly_partitions(postgresql_client, start=today.replace(day=1), months=2, table_name=news_table_name)
+    return tables
+
+def ensure_monthly_partitions(postgresql_client: PostgreSqlClient, start: datetime.date, months: int = 2,
+                              table_name: str = 'news_raw_table') -> None:
+    """
+    Creates the monthly partitions of a news table from the month of start, for the given number of months.
+    Run it ahead of time: rows of a month without partition land in the default partition.
+    """
+    month = datetime.date(start.year, start.month, 1)
+    with postgresql_client.transaction() as connection:
+        for _ in range(months):
+            next_month = datetime.date(month.year + month.month // 12, month.month % 12 + 1, 1)
+            connection.execute(
+                f"CREATE TABLE IF NOT EXISTS {table_name}_{month:%Y_%m} PARTITION OF {table_name} "
+                f"FOR VALUES FROM ('{month.isoformat()}') TO ('{next_month.isoformat()}')"
+            )
+            month = next_month
+
+def delete_news_older_than(postgresql_client: PostgreSqlClient, cutoff: datetime.datetime, news_table_name: str = 'news_raw_table',
+                           frequency_table_names: list[str] = ('grade_level_word_frequency',),
+                           article_summary_table_name: str = 'article_grade_level_summary',
+                           category_summary_table_name: str = 'category_grade_level_summary',
+                           readability_table_name: str = 'article_readability') -> None:
+    """
+    Retention: deletes the articles of a news table published before cutoff, their word frequencies, summaries and
+    readability features, and subtracts them from the category rollups, in one transaction. Monthly partitions that
+    end before cutoff are dropped as a whole instead of being deleted row by row.
+
+    Args:
+        frequency_table_names: every frequency table of the news table, a partitioned news table has no foreign key
+            deleting them with their article
+        article_summary_table_name, category_summary_table_name, readability_table_name: tables shared by every news
+            table (see grade_level_summary and readability), skipped if they do not exist yet
+    """
+    cutoff = pd.Timestamp(cutoff)
+    if cutoff.tz is None:
+        cutoff = cutoff.tz_localize('UTC')
+
+    with postgresql_client.transaction() as connection:
+        # the expired links are listed before any partition is dropped
+        connection.execute("DROP TABLE IF EXISTS expired_news")
+        connection.execute(
+            f"CREATE TEMPORARY TABLE expired_news ON COMMIT DROP AS "
+            f"SELECT DISTINCT article_link FROM {news_table_name} WHERE publish_date < %s", (cutoff.to_pydatetime(),)
+        )
+        exists = lambda table_name: connection.execute("SELECT to_regclass(%s)", (table_name,)).scalar() is not None
+        if exists(article_summary_table_name) and exists(category_summary_table_name):
+            delete_article_summaries(connection, 'expired_news', article_table_name=article_summary_table_name,
+                                     category_table_name=category_summary_table_name)
+        if exists(readability_table_name):
+            connection.execute(f"DELETE FROM {readability_table_name} WHERE article_link IN (SELECT article_link FROM expired_news)")
+        partitions = connection.execute("""
+            SELECT child.relname, pg_get_expr(child.relpartbound, child.oid)
+            FROM pg_inherits
+            JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE parent.relname = %s
+        """, (news_table_name,)).all()
+        for partition_name, bound in partitions:
+            if partition_name.startswith(f'{news_table_name}_') and bound != 'DEFAULT':
+                partition_end = pd.Timestamp(bound.split("TO ('")[1].split("'")[0])
+                if partition_end.tz is None:
+                    partition_end = partition_end.tz_localize('UTC')
+                if partition_end <= cutoff:
+                    for frequency_table_name in frequency_table_names:
+                        connection.execute(
+                            f"DELETE FROM {frequency_table_name} WHERE article_link IN (SELECT article_link FROM {partition_name})"
+                        )
+                    connection.execute(f"DROP TABLE {partition_name}")
+        if partitions:
+            for frequency_table_name in frequency_table_names:
+                connection.execute(
+                    f"DELETE FROM {frequency_table_name} WHERE article_link IN "
+                    f"(SELECT article_link FROM {news_table_name} WHERE publish_date < %s)", (cutoff.to_pydatetime(),)
+                )
+        connection.execute(f"DELETE FROM {news_table_name} WHERE publish_date < %s", (cutoff.to_pydatetime(),))
+
+def prepare_news_df(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Converts articles to the column types of news_raw_table: publish_date (UTC in the NewsData.io API) becomes a
+    timezone-aware timestamp and keywords/author become lists.
+    """
+    df = df.loc[:, ~df.columns.duplicated()]
+    return df.assign(
+        publish_date=pd.to_datetime(df['publish_date'], utc=True, errors='coerce'),
+        **{column: df[column].map(_to_list) for column in ['keywords', 'author'] if column in df.columns}
+    )
+
+def _to_list(value) -> list:
+    if isinstance(value, list) or value is None:
+        return value
+    if not isinstance(value, str) and pd.isnull(value):
+        return None
+    return [value]
@@ -0,0 +1,201 @@
+import queue
+import threading
+from concurrent.futures import Executor
+import pandas as pd
+from sqlalchemy import Table, MetaData, String, any_, bindparam
+from sqlalchemy.dialects.postgresql import ARRAY
+from etl_project.connectors.postgresql import PostgreSqlClient
+from etl_project.assets.extract_news import normalize_news, process_articles, loaded
+from etl_project.assets.vocabulary_matcher import VocabularyMatcher
+from etl_project.assets.frequency_cache import WordFrequencyCache
+from etl_project.assets.incremental import ExtractionWatermark
+from etl_project.assets.grade_level_summary import summarize_articles, merge_grade_level_summaries
+from etl_project.assets.readability import merge_readability
+from etl_project.assets.schema import prepare_news_df
+
+
+def prefetch(iterable, max_prefetch: int = 2):
+    """
+    Consumes an iterable in a background thread, keeping at most max_prefetch items ahead of the consumer, so the
+    next pages are fetched while the current one is being processed. Exceptions are re-raised in the consumer.
+    """
+    items = queue.Queue(maxsize=max_prefetch)
+    done = object()
+    stop = threading.Event()
+
+    def produce():
+        try:
+            for item in iterable:
+                while not stop.is_set():
+                    try:
+                        items.put((item, None), timeout=0.1)
+                        break
+                    except queue.Full:
+                        continue
+                if stop.is_set():
+                    return
+            items.put((done, None))
+        except Exception as e:
+            items.put((done, e))
+
+    thread = threading.Thread(target=produce, daemon=True)
+    thread.start()
+    try:
+        while True:
+            item, error = items.get()
+            if error is not None:
+                raise error
+            if item is done:
+                return
+            yield item
+    finally:
+        stop.set()
+
+def stream_articles(pages, chunk_size: int = 500):
+    """
+    Normalizes API responses into chunks of at most chunk_size articles.
+
+    Args:
+        pages: iterable of json responses, e.g. News.iter_pages()
+        chunk_size: maximum number of articles per chunk
+
+    Returns:
+        A generator of dataframes with the columns of normalize_news
+    """
+    buffered = []
+    buffered_articles = 0
+    for response in pages:
+        results = response.get('results') or []
+        if not results:
+            continue
+        buffered.append(normalize_news({'results': results}))
+        buffered_articles += len(results)
+        while buffered_articles >= chunk_size:
+            chunk = pd.concat(buffered, ignore_index=True)
+            yield chunk.iloc[:chunk_size]
+            rest = chunk.iloc[chunk_size:]
+            buffered = [rest] if len(rest) else []
+            buffered_articles = len(rest)
+    if buffered_articles:
+        yield pd.concat(buffered, ignore_index=True)
+
+def new_pages(pages, seen_links: set, cursor: dict):
+    """
+    Pages of an incremental extraction: stops at the first page without any article that is not in seen_links, like
+    the extract stage of the pipeline, so no more pages (API credits) are requested once the stored articles are reached.
+
+    Args:
+        pages: iterable of json responses, newest first
+        seen_links: links of the articles already ingested
+        cursor: the "nextPage" of the last page yielded is kept in cursor['next_page']
+    """
+    for response in pages:
+        results = response.get('results') or []
+        if not results or all(article.get('link') in seen_links for article in results):
+            return
+        cursor['next_page'] = response.get('nextPage')
+        yield response
+
+def delete_frequencies(postgresql_client: PostgreSqlClient, frequency_table: Table, article_links: list[str]) -> None:
+    """Deletes the word frequencies of some articles, the article links are sent as a single array parameter."""
+    with postgresql_client.transaction() as connection:
+        frequency_table.create(connection, checkfirst=True)
+        connection.execute(frequency_table.delete().where(
+            frequency_table.c.article_link == any_(bindparam('article_links', article_links, type_=ARRAY(String)))))
+
+def run_streaming(
+        pages,
+        word_by_grade_level_df: pd.DataFrame,
+        postgresql_client: PostgreSqlClient,
+        news_table: Table,
+        frequency_table: Table,
+        metadata: MetaData,
+        chunk_size: int = 500,
+        frequency_load_method: str = "insert",
+        watermark: ExtractionWatermark = None,
+        cache: WordFrequencyCache = None,
+        max_prefetch: int = 2,
+        matcher: VocabularyMatcher = None,
+        update_summaries: bool = False,
+        executor: Executor = None,
+        replace_frequencies: bool = False,
+        article_summary_table_name: str = 'article_grade_level_summary',
+        category_summary_table_name: str = 'category_grade_level_summary',
+        readability_table_name: str = 'article_readability'
+    ) -> dict:
+    """
+    Streams pages through normalize -> select -> word count -> load, one chunk of articles at a time, while the
+    following pages are fetched in the background. Peak memory depends on chunk_size, not on the number of pages.
+
+    Args:
+        pages: iterable of json responses, e.g. News.iter_pages()
+        word_by_grade_level_df: vocabulary with 'Word' and 'Grade_Lv' columns
+        postgresql_client: postgresql client
+        news_table: table the articles are upserted into (see schema.news_raw_table)
+        frequency_table: table the sparse word frequencies are loaded into
+        metadata: sqlalchemy metadata of both tables
+        chunk_size: maximum number of articles per chunk
+        frequency_load_method: load method of the first frequency chunk, the following chunks are inserted
+        watermark: skip articles already ingested, stop at the first page without any new article (see new_pages) and
+            record the new ones (save it after the run)
+        cache: word frequency cache passed to process_articles
+        max_prefetch: number of pages fetched ahead of processing
+        matcher: a VocabularyMatcher compiled from word_by_grade_level_df, built on the fly if not given
+        update_summaries: merge every chunk into the grade level summary tables (see grade_level_summary) and the
+            article_readability table (see readability)
+        executor: a process pool from matcher.process_pool() to count the articles of each chunk on several cores
+        replace_frequencies: delete the frequencies already loaded for the articles of each chunk before loading the
+            new ones, so articles can be reprocessed (e.g. replayed from a landing zone) without duplicating them
+        article_summary_table_name, category_summary_table_name, readability_table_name: tables merged into with
+            update_summaries
+
+    Without a watermark an article is loaded once per run all the same: a repeated article_link keeps its last copy
+    within a chunk and is skipped in the following chunks, e.g. when replaying landed files of overlapping runs.
+
+    Returns:
+        Counts of chunks, articles and frequency rows loaded
+    """
+    if matcher is None:
+        matcher = VocabularyMatcher(words=word_by_grade_level_df['Word'])
+    counts = {'chunks': 0, 'articles': 0, 'frequency_rows': 0}
+    load_method = frequency_load_method
+    loaded_links = set()
+    cursor = {'next_page': None}
+    if watermark is not None:
+        pages = new_pages(pages, seen_links=set(watermark.seen_links), cursor=cursor)
+
+    for articles_df in stream_articles(prefetch(pages, max_prefetch=max_prefetch), chunk_size=chunk_size):
+        if watermark is not None:
+            articles_df = watermark.filter_new(articles_df)
+        else:
+            articles_df = articles_df.drop_duplicates('article_link', keep='last')
+            articles_df = articles_df[~articles_df['article_link'].isin(loaded_links)]
+        if articles_df.empty:
+            continue
+
+        frequencies_df = process_articles(word_by_grade_level_df=word_by_grade_level_df, newspaper_articles_df=articles_df,
+                                          matcher=matcher, sparse=True, cache=cache, executor=executor, readability=update_summaries)
+        if update_summaries:
+            frequencies_df, article_readability = frequencies_df
+        # each chunk is committed at once: its articles, frequencies and summaries
+        with postgresql_client.transaction():
+            loaded(df=prepare_news_df(articles_df), postgresql_client=postgresql_client, table=news_table, metadata=metadata,
+                   load_method="upsert", bulk=True)
+            if replace_frequencies:
+                delete_frequencies(postgresql_client, frequency_table, articles_df['article_link'].tolist())
+            loaded(df=frequencies_df, postgresql_client=postgresql_client, table=frequency_table, metadata=metadata,
+                   load_method=load_method, bulk=True)
+            if update_summaries:
+                merge_grade_level_summaries(summarize_articles(frequencies_df, articles_df), postgresql_client=postgresql_client,
+                                            article_table_name=article_summary_table_name, category_table_name=category_summary_table_name)
+                merge_readability(article_readability, postgresql_client=postgresql_client, table_name=readability_table_name)
+        load_method = "insert"
+
+        if watermark is not None:
+            watermark.update(articles_df, next_page=cursor['next_page'])
+        else:
+            loaded_links.update(articles_df['article_link'])
+        counts['chunks'] += 1
+        counts['articles'] += len(articles_df)
+        counts['frequency_rows'] += len(frequencies_df)
+    return counts
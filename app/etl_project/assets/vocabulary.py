@@ -0,0 +1,117 @@
+import pickle
+import hashlib
+from io import BytesIO
+from pathlib import Path
+import pandas as pd
+from etl_project.assets.vocabulary_matcher import VocabularyMatcher
+
+
+BUNDLED_VOCABULARY_PATH = Path(__file__).resolve().parent.parent / 'data' / 'vocabulary_by_gradelv.csv'
+
+
+class VocabularyProvider:
+    """
+    Provides the grade level vocabulary and its compiled VocabularyMatcher.
+
+    The parsed vocabulary and the compiled matcher are pickled to a local cache file together with the S3 ETag they
+    came from. A load starts from that cache (or from the CSV bundled with the package) and, when an S3 location is
+    configured, only revalidates it with a conditional GET (If-None-Match), downloading the CSV again only if it
+    changed. When S3 cannot be reached the cached or bundled copy is used, so runs also work offline.
+    """
+
+    def __init__(self, local_path: str = BUNDLED_VOCABULARY_PATH, s3_bucket: str = None, key: str = None,
+                 cache_path: str = 'etl_project/data/cache/vocabulary.pickle', s3_client=None, match_mode: str = 'substring'):
+        """
+        Args:
+            local_path: vocabulary CSV used when there is no cache and S3 is not configured or unreachable
+            s3_bucket: S3 bucket of the reference vocabulary, None to only use the local copy
+            key: S3 key of the reference vocabulary
+            cache_path: file holding the parsed vocabulary and compiled matcher
+            s3_client: boto3 S3 client, created on first use if not given
+            match_mode: match mode of the compiled VocabularyMatcher, see vocabulary_matcher.MATCH_MODES
+        """
+        self.local_path = local_path
+        self.s3_bucket = s3_bucket
+        self.key = key
+        self.cache_path = cache_path
+        self.s3_client = s3_client
+        self.match_mode = match_mode
+        self.source = None
+
+    def _read_cache(self) -> dict:
+        try:
+            with open(self.cache_path, 'rb') as cache_file:
+                return pickle.load(cache_file)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+            return None
+
+    def _write_cache(self, entry: dict) -> None:
+        Path(self.cache_path).parent.mkdir(parents=True, exist_ok=True)
+        temporary_path = Path(f'{self.cache_path}.tmp')
+        with open(temporary_path, 'wb') as cache_file:
+            pickle.dump(entry, cache_file, protocol=pickle.HIGHEST_PROTOCOL)
+        temporary_path.replace(self.cache_path)
+
+    def _compile(self, csv_bytes: bytes, etag: str = None, source: str = None) -> dict:
+        df = pd.read_csv(BytesIO(csv_bytes))
+        return {
+            'etag': etag,
+            'source': source,
+            'sha256': hashlib.sha256(csv_bytes).hexdigest(),
+            'vocabulary': df,
+            'matcher': VocabularyMatcher(words=df['Word'], mode=self.match_mode)
+        }
+
+    def _revalidate(self, cached: dict) -> dict:
+        """Conditional GET against S3. Returns a new cache entry if the vocabulary changed, None if not."""
+        from botocore.exceptions import ClientError
+        if self.s3_client is None:
+            import boto3
+            self.s3_client = boto3.client('s3', region_name='us-east-1')
+        request = {'Bucket': self.s3_bucket, 'Key': self.key}
+        if cached is not None and cached.get('etag') is not None:
+            request['IfNoneMatch'] = cached['etag']
+        try:
+            s3_object = self.s3_client.get_object(**request)
+        except ClientError as e:
+            if e.response.get('ResponseMetadata', {}).get('HTTPStatusCode') == 304 or e.response['Error']['Code'] in {'304', 'NotModified'}:
+                return None
+            raise
+        return self._compile(s3_object['Body'].read(), etag=s3_object.get('ETag'), source=f's3://{self.s3_bucket}/{self.key}')
+
+    def load(self) -> tuple:
+        """
+        Loads the vocabulary.
+
+        Returns:
+            A (vocabulary dataframe with 'Word' and 'Grade_Lv' columns, compiled VocabularyMatcher) tuple
+        """
+        cached = self._read_cache()
+
+        if self.s3_bucket is None:
+            # the local copy is the reference, the cache is only valid for the same file contents
+            csv_bytes = Path(self.local_path).read_bytes()
+            if cached is None or cached.get('sha256') != hashlib.sha256(csv_bytes).hexdigest():
+                cached = self._compile(csv_bytes, source=str(self.local_path))
+                self._write_cache(cached)
+        else:
+            # boto3 is only imported when the vocabulary has an S3 location
+            from botocore.exceptions import BotoCoreError, ClientError
+            try:
+                fresh = self._revalidate(cached)
+                if fresh is not None:
+                    self._write_cache(fresh)
+                    cached = fresh
+            except (BotoCoreError, ClientError) as e:
+                print(f"Could not revalidate the vocabulary against S3, using the local copy: {str(e)}")
+            if cached is None:
+                cached = self._compile(Path(self.local_path).read_bytes(), source=str(self.local_path))
+                self._write_cache(cached)
+
+        if cached['matcher'].mode != self.match_mode:
+            # same vocabulary, compiled for another match mode
+            cached = {**cached, 'matcher': VocabularyMatcher(words=cached['vocabulary']['Word'], mode=self.match_mode)}
+            self._write_cache(cached)
+
+        self.source = cached['source']
+        return cached['vocabulary'], cached['matcher']
@@ -0,0 +1,384 @@
+import re
+import hashlib
+from collections import Counter
+from concurrent.futures import Executor, ProcessPoolExecutor
+from itertools import repeat
+import numpy as np
+from etl_project.assets.frequency_cache import WordFrequencyCache, content_hash
+
+
+# articles per task sent to a process pool, and the batch size below which counting stays in-process
+SHARD_SIZE = 64
+MIN_PARALLEL_ARTICLES = 2 * SHARD_SIZE
+
+# substring: str.count semantics of calculate_word_frequency, word: whole words, stem: whole words and their inflections
+MATCH_MODES = ('substring', 'word', 'stem')
+# words of an article in the whole word modes: letters and digits, possibly joined by hyphens or apostrophes
+WORD_REGEX = re.compile(r"[^\W_]+(?:[-'’][^\W_]+)*")
+WORD_SEPARATOR_REGEX = re.compile(r"[-'’]")
+VOWELS = set('aeiou')
+VOWEL_GROUP_REGEX = re.compile(r'[aeiou]+|(?<=[^aeiou])y')
+
+
+def _inflected_forms(word: str) -> set:
+    """
+    Regular inflections of an English word: plural / third person (-s, -es, -ies), past (-ed, -d, -ied) and
+    present participle (-ing), with the final consonant doubled or the final e dropped where English does.
+
+    A one-syllable word ending in consonant-vowel-consonant always doubles (stop -> stopped, never stoped), so
+    'hop' does not generate the forms of 'hope'. Longer words double when their last syllable is stressed
+    (admit -> admitted, visit -> visited), which the spelling does not tell, so they keep both spellings.
+    """
+    forms = set()
+    if len(word) < 2 or not word.isalpha():
+        return forms
+    consonant_y = word.endswith('y') and word[-2] not in VOWELS
+    doubles = (len(word) >= 3 and word[-1] not in VOWELS | set('wxy') and word[-2] in VOWELS
+               and (word[-3] not in VOWELS or word[-4:-2] == 'qu'))
+    monosyllable = len(VOWEL_GROUP_REGEX.findall(word)) == 1
+    # plural and third person
+    if consonant_y:
+        forms.add(word[:-1] + 'ies')
+    elif word.endswith(('s', 'x', 'z', 'ch', 'sh', 'o')):
+        forms.add(word + 'es')
+    else:
+        forms.add(word + 's')
+    # past
+    if consonant_y:
+        forms.add(word[:-1] + 'ied')
+    elif word.endswith('e'):
+        forms.add(word + 'd')
+    elif not (doubles and monosyllable):
+        forms.add(word + 'ed')
+    # present participle
+    if word.endswith('ie'):
+        forms.add(word[:-2] + 'ying')
+    elif word.endswith('e') and not word.endswith(('ee', 'ye', 'oe')):
+        forms.add(word[:-1] + 'ing')
+    elif not (doubles and monosyllable):
+        forms.add(word + 'ing')
+    # stop -> stopped, stopping (consonant-vowel-consonant ending)
+    if doubles:
+        forms.update({word + word[-1] + 'ed', word + word[-1] + 'ing'})
+    return forms
+
+
+class VocabularyMatcher:
+    """
+    Counts every vocabulary word in an article with a single pass over the text.
+
+    By default (mode 'substring') counts follow the same substring semantics as `calculate_word_frequency`: the
+    article and the words are lowercased and each word is counted like `str.count` (non-overlapping occurrences),
+    so 'art' is also counted inside 'start'.
+
+    A vocabulary word can only ever match inside a run of characters that appear in the vocabulary
+    itself, so each lowercased article is split once into such runs. Every distinct run is matched
+    against all words with an Aho-Corasick automaton and the result is kept in a lookup table, which
+    means a run that was already seen (in this or any earlier article) costs a single dict lookup.
+
+    The whole word modes tokenize each article once and look every distinct word up in a hash index of the
+    vocabulary, so counting is linear in the length of the article whatever the size of the vocabulary. Mode 'word'
+    only counts exact words. Mode 'stem' also counts the regular inflections of the vocabulary words ('surprised' and
+    'surprises' count for 'surprise'): the index holds the inflected forms generated from the vocabulary, so only
+    vocabulary words can match. A hyphenated or possessive word that is not in the index is looked up part by part
+    ("nation's" counts for 'nation'). Vocabulary entries that are not a single word never match in these modes.
+    """
+
+    # matchers pickled before the whole word modes existed are substring matchers
+    mode = 'substring'
+
+    def __init__(self, words: list, max_cached_tokens: int = 500_000, mode: str = 'substring'):
+        """
+        Compile the matcher for a list of vocabulary words.
+
+        Args:
+            words: vocabulary words, one column of the output matrix per word (duplicates allowed)
+            max_cached_tokens: maximum number of distinct text runs kept in the lookup table
+            mode: 'substring', 'word' or 'stem', see MATCH_MODES
+
+        Raises:
+            Exception if the mode is not one of MATCH_MODES
+        """
+        if mode not in MATCH_MODES:
+            raise Exception(f"Unknown match mode {mode}, options: {MATCH_MODES}")
+        self.mode = mode
+        self.words = [str(word).lower() for word in words]
+        self.max_cached_tokens = max_cached_tokens
+        # identifies the vocabulary (and the match mode) the counts were computed with, e.g. to key cached results
+        version_text = '\n'.join(self.words) if mode == 'substring' else f'{mode}\n' + '\n'.join(self.words)
+        self.version = hashlib.sha256(version_text.encode('utf-8')).hexdigest()
+
+        if mode != 'substring':
+            self._build_index()
+            return
+
+        # several vocabulary rows may share the same word, they all get the same count
+        self._patterns = []
+        self._pattern_columns = []
+        pattern_ids = {}
+        self._empty_columns = []
+        for column, word in enumerate(self.words):
+            if word == '':
+                self._empty_columns.append(column)
+                continue
+            if word not in pattern_ids:
+                pattern_ids[word] = len(self._patterns)
+                self._patterns.append(word)
+                self._pattern_columns.append([])
+            self._pattern_columns[pattern_ids[word]].append(column)
+
+        # runs of word characters and of the characters of the patterns: every occurrence of a pattern and every word
+        # of WORD_REGEX lies within a single run, so the runs give both the counts and the number of words
+        alphabet = sorted(set(''.join(self._patterns)))
+        self._token_regex = re.compile(r"[\w'’\-" + ''.join(re.escape(char) for char in alphabet) + ']+')
+        self._build_automaton()
+        self._token_cache = {}
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    def __getstate__(self) -> dict:
+        # the lookup table of text runs is a per-process memo, it is rebuilt on the fly
+        state = self.__dict__.copy()
+        state['_token_cache'] = {}
+        return state
+
+    def _build_index(self) -> None:
+        """
+        Builds the {word: columns} index of the whole word modes. Exact vocabulary words win over inflections, and an
+        inflection generated from two vocabulary words (e.g. 'does' from 'do' and 'doe') is left out as ambiguous.
+        """
+        index = {}
+        for column, word in enumerate(self.words):
+            word = word.strip()
+            if word:
+                index.setdefault(word, []).append(column)
+        if self.mode == 'stem':
+            lemmas = {}
+            for word in index:
+                for form in _inflected_forms(word):
+                    if form not in index:
+                        lemmas.setdefault(form, []).append(word)
+            index.update({form: index[words[0]] for form, words in lemmas.items() if len(words) == 1})
+        self._index = index
+
+    def _build_automaton(self) -> None:
+        """Builds the Aho-Corasick goto, failure and output tables for all patterns."""
+        goto = [{}]
+        outputs = [[]]
+        for pattern_id, pattern in enumerate(self._patterns):
+            state = 0
+            for char in pattern:
+                next_state = goto[state].get(char)
+                if next_state is None:
+                    next_state = len(goto)
+                    goto[state][char] = next_state
+                    goto.append({})
+                    outputs.append([])
+                state = next_state
+            outputs[state].append(pattern_id)
+
+        fail = [0] * len(goto)
+        queue = list(goto[0].values())
+        for state in queue:
+            for char, next_state in goto[state].items():
+                queue.append(next_state)
+                fallback = fail[state]
+                while fallback and char not in goto[fallback]:
+                    fallback = fail[fallback]
+                fail[next_state] = goto[fallback].get(char, 0)
+                outputs[next_state] = outputs[next_state] + outputs[fail[next_state]]
+
+        self._goto = goto
+        self._fail = fail
+        self._outputs = outputs
+        self._pattern_lengths = [len(pattern) for pattern in self._patterns]
+
+    def _match_token(self, token: str) -> tuple:
+        """Returns the (columns, counts) of every vocabulary word found in a single text run."""
+        goto, fail, outputs, lengths = self._goto, self._fail, self._outputs, self._pattern_lengths
+        counts = {}
+        next_free = {}
+        state = 0
+        for position, char in enumerate(token):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for pattern_id in outputs[state]:
+                # str.count semantics: an occurrence only counts if it does not overlap the previous one
+                if position - lengths[pattern_id] + 1 >= next_free.get(pattern_id, 0):
+                    counts[pattern_id] = counts.get(pattern_id, 0) + 1
+                    next_free[pattern_id] = position + 1
+
+        columns = []
+        column_counts = []
+        for pattern_id, count in counts.items():
+            for column in self._pattern_columns[pattern_id]:
+                columns.append(column)
+                column_counts.append(count)
+        return columns, column_counts
+
+    def _lookup_token(self, token: str) -> tuple:
+        """Returns the (columns, counts, number of words) of a text run, memoized."""
+        hit = self._token_cache.get(token)
+        if hit is None:
+            # str.isalnum() is the [^\W_] of WORD_REGEX: most runs are a single word
+            hit = (*self._match_token(token), 1 if token.isalnum() else len(WORD_REGEX.findall(token)))
+            if len(self._token_cache) >= self.max_cached_tokens:
+                self._token_cache.clear()
+            self._token_cache[token] = hit
+        return hit
+
+    def _word_counts(self, article_contents: str) -> tuple:
+        """
+        Returns ({column: count} for every vocabulary word found at least once in the article, number of words of the
+        article), from the same scan of the text.
+        """
+        text = article_contents.lower() if isinstance(article_contents, str) else ''
+        if self.mode != 'substring':
+            return self._whole_word_counts(text)
+        word_counts = {}
+        token_count = 0
+        for token, occurrences in Counter(self._token_regex.findall(text)).items():
+            token_columns, token_counts, token_words = self._lookup_token(token)
+            token_count += token_words * occurrences
+            for column, count in zip(token_columns, token_counts):
+                word_counts[column] = word_counts.get(column, 0) + count * occurrences
+        for column in self._empty_columns:
+            word_counts[column] = len(text) + 1
+        return word_counts, token_count
+
+    def _whole_word_counts(self, text: str) -> tuple:
+        index = self._index
+        word_counts = {}
+        tokens = WORD_REGEX.findall(text)
+        for token, occurrences in Counter(tokens).items():
+            columns = index.get(token)
+            if columns is None:
+                if token.isalnum():
+                    continue
+                columns = [column for part in WORD_SEPARATOR_REGEX.split(token) for column in index.get(part, ())]
+            for column in columns:
+                word_counts[column] = word_counts.get(column, 0) + occurrences
+        return word_counts, len(tokens)
+
+    def _word_counts_many(self, articles, cache: WordFrequencyCache = None, executor: Executor = None) -> list[tuple]:
+        """Returns ({column: count}, number of words) for every article, reusing and filling the cache when one is given."""
+        articles = list(articles)
+        if cache is None:
+            return self._compute_word_counts(articles, executor=executor)
+
+        keys = [content_hash(article_contents) for article_contents in articles]
+        cached = cache.get_many(self.version, keys)
+        missing = {}
+        for key, article_contents in zip(keys, articles):
+            if key not in cached and key not in missing:
+                missing[key] = article_contents
+        computed = dict(zip(missing, self._compute_word_counts(list(missing.values()), executor=executor)))
+        if computed:
+            cache.put_many(self.version, computed)
+        return [cached[key] if key in cached else computed[key] for key in keys]
+
+    def _compute_word_counts(self, articles: list, executor: Executor = None) -> list[tuple]:
+        """Counts the articles in this process, or in shards of SHARD_SIZE articles on the workers of process_pool()."""
+        if executor is None or len(articles) < MIN_PARALLEL_ARTICLES:
+            return [self._word_counts(article_contents) for article_contents in articles]
+        shards = [articles[start:start + SHARD_SIZE] for start in range(0, len(articles), SHARD_SIZE)]
+        # map returns the shards in submission order, so the output order does not depend on scheduling
+        return [counts for shard in executor.map(_count_shard, repeat(self.version), shards) for counts in shard]
+
+    def process_pool(self, max_workers: int = None) -> ProcessPoolExecutor:
+        """
+        Starts a process pool to count articles on several cores, see the executor argument of count_matrix and
+        count_sparse. Each worker receives a copy of this matcher once, when it starts, and keeps its lookup table
+        warm across calls, so reuse the pool for all the batches of a run and shut it down at the end.
+
+        Args:
+            max_workers: number of worker processes, the number of CPUs if None
+        """
+        return ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker, initargs=(self,))
+
+    def count(self, article_contents: str) -> np.ndarray:
+        """
+        Counts every vocabulary word in one article.
+
+        Args:
+            article_contents: article text, missing contents (None/NaN) count as an empty article
+
+        Returns:
+            An int64 array with one count per vocabulary word
+        """
+        return self._to_row(self._word_counts(article_contents)[0])
+
+    def _to_row(self, word_counts: dict) -> np.ndarray:
+        row = np.zeros(len(self.words), dtype=np.int64)
+        if word_counts:
+            row[list(word_counts.keys())] = list(word_counts.values())
+        return row
+
+    def count_matrix(self, articles, cache: WordFrequencyCache = None, executor: Executor = None,
+                     token_counts: bool = False):
+        """
+        Counts every vocabulary word in every article.
+
+        Args:
+            articles: iterable of article texts
+            cache: optional cache of per-article counts, looked up by content hash and vocabulary version
+            executor: a pool from process_pool() to count the articles on several cores
+            token_counts: also return the number of words (see WORD_REGEX) of every article
+
+        Returns:
+            An int64 matrix of shape (articles, words), and with token_counts an int32 array of the number of words
+            of every article
+        """
+        all_counts = self._word_counts_many(articles, cache=cache, executor=executor)
+        matrix = np.zeros((len(all_counts), len(self.words)), dtype=np.int64)
+        for index, (word_counts, _) in enumerate(all_counts):
+            matrix[index] = self._to_row(word_counts)
+        if token_counts:
+            return matrix, np.asarray([token_count for _, token_count in all_counts], dtype=np.int32)
+        return matrix
+
+    def count_sparse(self, articles, cache: WordFrequencyCache = None, executor: Executor = None,
+                     token_counts: bool = False) -> tuple:
+        """
+        Counts every vocabulary word in every article, keeping only the non-zero counts.
+
+        Args:
+            articles: iterable of article texts
+            cache: optional cache of per-article counts, looked up by content hash and vocabulary version
+            executor: a pool from process_pool() to count the articles on several cores
+            token_counts: also return the number of words (see WORD_REGEX) of every article
+
+        Returns:
+            A COO triplet (article_index, word_index, counts) of int32 arrays, ordered by article then word, and
+            with token_counts an int32 array of the number of words of every article
+        """
+        article_index = []
+        word_index = []
+        counts = []
+        all_counts = self._word_counts_many(articles, cache=cache, executor=executor)
+        for index, (word_counts, _) in enumerate(all_counts):
+            for column in sorted(word_counts):
+                if word_counts[column]:
+                    article_index.append(index)
+                    word_index.append(column)
+                    counts.append(word_counts[column])
+        coo = (np.asarray(article_index, dtype=np.int32), np.asarray(word_index, dtype=np.int32),
+               np.asarray(counts, dtype=np.int32))
+        if token_counts:
+            return (*coo, np.asarray([token_count for _, token_count in all_counts], dtype=np.int32))
+        return coo
+
+
+# matcher of a process_pool() worker, set once when the worker starts
+_worker_matcher = None
+
+def _init_worker(matcher: VocabularyMatcher) -> None:
+    global _worker_matcher
+    _worker_matcher = matcher
+
+def _count_shard(version: str, articles: list) -> list[tuple]:
+    if _worker_matcher is None or _worker_matcher.version != version:
+        raise Exception("The process pool was started by another vocabulary matcher, use matcher.process_pool()")
+    return [_worker_matcher._word_counts(article_contents) for article_contents in articles]
@@ -1,7 +1,12 @@
-from sqlalchemy import create_engine, Table, MetaData
+from sqlalchemy import create_engine, event, text, Table, MetaData
 from sqlalchemy.engine import URL, CursorResult
 from sqlalchemy.dialects import postgresql
+from contextlib import contextmanager
+from io import StringIO
+import threading
 
+# pg8000 sends the number of bind parameters as a 16-bit signed integer
+MAX_BIND_PARAMETERS = 32767
 
 
 
@@ -10,9 +15,16 @@ class PostgreSqlClient:
     A client for querying a PostgreSQL database.
     """
 
-    def __init__(self, server_name: str, database_name: str, username: str, password: str, port: int = 5432):
+    def __init__(self, server_name: str, database_name: str, username: str, password: str, port: int = 5432,
+                 pool_size: int = 5, max_overflow: int = 5, pool_pre_ping: bool = True, statement_timeout_ms: int = None):
         """
         Initialize the client with the database connection parameters.
+
+        Args:
+            pool_size: number of connections kept open in the pool
+            max_overflow: number of connections opened on top of pool_size when the pool is exhausted
+            pool_pre_ping: check that a pooled connection is still alive before handing it out
+            statement_timeout_ms: statement_timeout of every connection, no timeout if None
         """
         self.server_name = server_name
         self.database_name = database_name
@@ -29,34 +41,310 @@ class PostgreSqlClient:
             database=self.database_name
         )
 
-        self.engine = create_engine(connect_url)
+        self.statement_timeout_ms = statement_timeout_ms
+        self.engine = create_engine(connect_url, pool_size=pool_size, max_overflow=max_overflow, pool_pre_ping=pool_pre_ping)
+        if statement_timeout_ms is not None:
+            event.listen(self.engine, 'connect', self._set_statement_timeout)
+        self._local = threading.local()
+
+    def _set_statement_timeout(self, dbapi_connection, connection_record) -> None:
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f"SET statement_timeout = {int(self.statement_timeout_ms)}")
+        cursor.close()
+        # pg8000 opened a transaction for the SET, the pool would roll it back on checkin
+        dbapi_connection.commit()
+
+    @contextmanager
+    def transaction(self):
+        """
+        Runs the client calls made inside the block, in the same thread, on one pooled connection and in a single
+        transaction, committed when the block exits and rolled back if it raises. Nested blocks join the outer one.
+
+            with postgresql_client.transaction() as connection:
+                postgresql_client.bulk_upsert(...)
+                postgresql_client.bulk_insert(...)
+
+        Outside of a block, every call runs in a transaction of its own.
+        """
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None:
+            yield connection
+            return
+        with self.engine.begin() as connection:
+            self._local.connection = connection
+            try:
+                yield connection
+            finally:
+                self._local.connection = None
+
+    @contextmanager
+    def advisory_lock(self, name: str):
+        """
+        Holds the PostgreSQL session advisory lock of name for the duration of the block, without waiting for it.
+
+            with postgresql_client.advisory_lock('news_etl') as acquired:
+                if acquired:
+                    ...
+
+        The lock is held on a dedicated connection in autocommit mode, so it does not keep a transaction open, and
+        it is released if the process dies. It guards against concurrent runs across processes and hosts.
+
+        Yields:
+            True if the lock was acquired, False if another session holds it
+        """
+        with self.advisory_locks([name]) as acquired:
+            yield bool(acquired)
+
+    @contextmanager
+    def advisory_locks(self, names: list[str]):
+        """
+        Same as advisory_lock for several names, all held on a single connection.
+
+        Yields:
+            The names whose lock was acquired
+        """
+        with self.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as connection:
+            acquired = [name for name in names
+                        if connection.execute(text("SELECT pg_try_advisory_lock(hashtext(:name))"), name=name).scalar()]
+            try:
+                yield acquired
+            finally:
+                for name in acquired:
+                    connection.execute(text("SELECT pg_advisory_unlock(hashtext(:name))"), name=name)
 
     def select_all(self, table: Table) -> list[dict[str]]:
-        return [dict(row) for row in self.engine.execute(table.select()).all()]
+        with self.transaction() as connection:
+            return [dict(row) for row in connection.execute(table.select()).all()]
 
     def create_table(self, metadata: MetaData) -> None:
         """
         Creates a table provided in the metadata object.
         """
-        metadata.create_all(self.engine)
+        with self.transaction() as connection:
+            metadata.create_all(connection)
 
     def drop_table(self, table_name: str) -> None:
-        self.engine.execute(f"DROP TABLE IF EXISTS {table_name};")
+        with self.transaction() as connection:
+            connection.execute(f"DROP TABLE IF EXISTS {table_name};")
+
+    def _batches(self, data: list[dict], table: Table, batch_size: int = None, max_batch_bytes: int = None):
+        """
+        Splits rows into batches that stay under the bind parameter limit, batch_size rows and max_batch_bytes
+        (estimated from the text length of the values).
+        """
+        max_rows = max(MAX_BIND_PARAMETERS // max(len(table.columns), 1), 1)
+        if batch_size is not None:
+            max_rows = min(max_rows, batch_size)
+
+        batch = []
+        batch_bytes = 0
+        for row in data:
+            row_bytes = sum(len(str(value)) for value in row.values()) if max_batch_bytes is not None else 0
+            if batch and (len(batch) >= max_rows or (max_batch_bytes is not None and batch_bytes + row_bytes > max_batch_bytes)):
+                yield batch
+                batch = []
+                batch_bytes = 0
+            batch.append(row)
+            batch_bytes += row_bytes
+        if batch:
+            yield batch
+
+    def insert(self, data: list[dict], table: Table, metadata: MetaData, batch_size: int = None, max_batch_bytes: int = None) -> None:
+        """
+        Inserts rows with multi-row insert statements, split into batches (see _batches) sent in a single transaction.
+        """
+        with self.transaction() as connection:
+            metadata.create_all(connection)
+            self._insert_batches(connection, data=data, table=table, batch_size=batch_size, max_batch_bytes=max_batch_bytes)
+
+    def _insert_batches(self, connection, data: list[dict], table: Table, batch_size: int = None, max_batch_bytes: int = None) -> None:
+        for batch in self._batches(data=data, table=table, batch_size=batch_size, max_batch_bytes=max_batch_bytes):
+            insert_statement = postgresql.insert(table).values(batch)
+            connection.execute(insert_statement)
+
+    def overwrite(self, data: list[dict], table: Table, metadata: MetaData, batch_size: int = None, max_batch_bytes: int = None) -> None:
+        """
+        Replaces the rows of the table with multi-row insert statements, atomically (see _overwrite).
+        """
+        self._overwrite(table=table, metadata=metadata, load=lambda connection, target: self._insert_batches(
+            connection, data=data, table=target, batch_size=batch_size, max_batch_bytes=max_batch_bytes))
+
+    def _overwrite(self, table: Table, metadata: MetaData, load) -> None:
+        """
+        Replaces the rows of a table in a single transaction; load(connection, target) writes the new rows into target.
 
-    def insert(self, data: list[dict], table: Table, metadata: MetaData) -> None:
-        metadata.create_all(self.engine)
-        insert_statement = postgresql.insert(table).values(data)
-        self.engine.execute(insert_statement)
+        The rows are loaded into a shadow copy of the table (CREATE TABLE ... LIKE ... INCLUDING ALL, plus its foreign
+        keys) which is renamed over the table right before commit. Readers keep seeing the old rows during the load and
+        are only blocked by the swap itself, and a failed load leaves the table as it was. The swapped table gets back
+        the index names of the old one, privileges granted on the old table are not carried over.
 
-    def overwrite(self, data: list[dict], table: Table, metadata: MetaData) -> None:
-        self.drop_table(table.name)
-        self.insert(data=data, table=table, metadata=metadata)
+        Partitioned tables and tables referenced by foreign keys or views can't be swapped; they are emptied with
+        TRUNCATE (DELETE when referenced by foreign keys, which fires their ON DELETE actions) and reloaded in the
+        same transaction instead, which blocks writers, and with TRUNCATE readers, until commit.
+        """
+        preparer = self.engine.dialect.identifier_preparer
+        table_name = preparer.format_table(table)
+        with self.transaction() as connection:
+            existed = connection.execute("SELECT to_regclass(%s)", (table_name,)).scalar() is not None
+            metadata.create_all(connection)
+            if not existed:
+                load(connection, table)
+                return
+
+            partitioned, referenced, has_views = connection.execute("""
+                SELECT relkind = 'p' OR relispartition,
+                       EXISTS (SELECT 1 FROM pg_constraint WHERE confrelid = pg_class.oid AND contype = 'f'),
+                       EXISTS (SELECT 1 FROM pg_depend JOIN pg_rewrite ON pg_rewrite.oid = pg_depend.objid
+                               WHERE pg_depend.classid = 'pg_rewrite'::regclass AND pg_depend.refobjid = pg_class.oid
+                                 AND pg_rewrite.ev_class <> pg_class.oid)
+                FROM pg_class WHERE oid = %s::regclass
+            """, (table_name,)).one()
+            if partitioned or referenced or has_views:
+                connection.execute(f"DELETE FROM {table_name}" if referenced else f"TRUNCATE {table_name}")
+                load(connection, table)
+                return
+
+            shadow = table.to_metadata(MetaData(), name=f"{table.name}_shadow")
+            shadow_name = preparer.format_table(shadow)
+            connection.execute(f"DROP TABLE IF EXISTS {shadow_name}")
+            connection.execute(f"CREATE TABLE {shadow_name} (LIKE {table_name} INCLUDING ALL)")
+            load(connection, shadow)
+
+            foreign_keys = connection.execute(
+                "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint WHERE conrelid = %s::regclass AND contype = 'f'",
+                (table_name,)).all()
+            for constraint_name, definition in foreign_keys:
+                connection.execute(f"ALTER TABLE {shadow_name} ADD CONSTRAINT {preparer.quote(constraint_name)} {definition}")
+            # serial columns of the shadow table share the sequences of the old table, which are dropped with it
+            serial_sequences = connection.execute("""
+                SELECT attname, pg_get_serial_sequence(%s, attname) FROM pg_attribute
+                WHERE attrelid = %s::regclass AND attnum > 0 AND NOT attisdropped AND attidentity = ''
+            """, (table_name, table_name)).all()
+            for column_name, sequence_name in serial_sequences:
+                if sequence_name is not None:
+                    connection.execute(f"ALTER SEQUENCE {sequence_name} OWNED BY {shadow_name}.{preparer.quote(column_name)}")
+            index_names = self._index_names(connection, table_name)
+            connection.execute(f"DROP TABLE {table_name}")
+            connection.execute(f"ALTER TABLE {shadow_name} RENAME TO {preparer.quote(table.name)}")
+            for definition, shadow_index_name in self._index_names(connection, table_name).items():
+                if definition in index_names:
+                    connection.execute(f"ALTER INDEX {preparer.quote(shadow_index_name)} RENAME TO {preparer.quote(index_names[definition])}")
+
+    def _index_names(self, connection, table_name: str) -> dict:
+        """Index names of a table keyed by their definition without the index and table names."""
+        rows = connection.execute(
+            "SELECT indexrelid::regclass::text, indisunique, pg_get_indexdef(indexrelid) FROM pg_index WHERE indrelid = %s::regclass",
+            (table_name,)).all()
+        return {(unique, definition.split(' USING ', 1)[1]): name.split('.')[-1].strip('"') for name, unique, definition in rows}
+
+    def upsert(self, data: list[dict], table: Table, metadata: MetaData, batch_size: int = None, max_batch_bytes: int = None) -> None:
+        """
+        Upserts rows with multi-row insert ... on conflict statements, split into batches (see _batches) sent in a
+        single transaction.
+        """
+        key_columns = [pk_column.name for pk_column in table.primary_key.columns.values()]
+        with self.transaction() as connection:
+            metadata.create_all(connection)
+            for batch in self._batches(data=data, table=table, batch_size=batch_size, max_batch_bytes=max_batch_bytes):
+                insert_statement = postgresql.insert(table).values(batch)
+                upsert_statement = insert_statement.on_conflict_do_update(
+                    index_elements=key_columns,
+                    set_={c.key: c for c in insert_statement.excluded if c.key not in key_columns})
+                connection.execute(upsert_statement)
+
+    def _copy_columns(self, df, table: Table) -> list[str]:
+        """Columns of the dataframe that exist in the table, without duplicated labels."""
+        columns = []
+        for column in df.columns:
+            if column in table.columns and column not in columns:
+                columns.append(column)
+        return columns
+
+    def copy_from_df(self, cursor, df, table_name: str, columns: list[str], batch_size: int = None) -> None:
+        """
+        Streams a dataframe into a table with COPY FROM STDIN using an in-memory CSV buffer. With batch_size, one
+        COPY is sent per batch_size rows so the buffer never holds more than one batch.
+        """
+        if batch_size is not None and len(df) > batch_size:
+            for start in range(0, len(df), batch_size):
+                self.copy_from_df(cursor, df.iloc[start:start + batch_size], table_name, columns)
+            return
+
+        df = df.loc[:, ~df.columns.duplicated()][columns]
+        list_columns = [column for column in columns
+                        if df[column].dtype == object and df[column].map(lambda value: isinstance(value, (list, tuple))).any()]
+        if list_columns:
+            df = df.assign(**{column: df[column].map(_to_array_literal) for column in list_columns})
+
+        buffer = StringIO()
+        df.to_csv(buffer, index=False, header=False, na_rep=r'\N')
+        buffer.seek(0)
 
-    def upsert(self, data: list[dict], table: Table, metadata: MetaData) -> None:
-        metadata.create_all(self.engine)
+        preparer = self.engine.dialect.identifier_preparer
+        column_list = ', '.join(preparer.quote(column) for column in columns)
+        cursor.execute(f"COPY {table_name} ({column_list}) FROM STDIN WITH (FORMAT csv, NULL '\\N')", stream=buffer)
+
+    def bulk_insert(self, df, table: Table, metadata: MetaData, batch_size: int = None) -> None:
+        """
+        Inserts a dataframe with COPY FROM STDIN instead of a multi-VALUES insert statement.
+        """
+        columns = self._copy_columns(df, table)
+        table_name = self.engine.dialect.identifier_preparer.format_table(table)
+        with self.transaction() as connection:
+            metadata.create_all(connection)
+            self.copy_from_df(connection.connection.cursor(), df, table_name, columns, batch_size=batch_size)
+
+    def bulk_overwrite(self, df, table: Table, metadata: MetaData, batch_size: int = None) -> None:
+        """
+        Replaces the rows of the table with COPY FROM STDIN, atomically (see _overwrite).
+        """
+        columns = self._copy_columns(df, table)
+        self._overwrite(table=table, metadata=metadata, load=lambda connection, target: self.copy_from_df(
+            connection.connection.cursor(), df, self.engine.dialect.identifier_preparer.format_table(target), columns, batch_size=batch_size))
+
+    def bulk_upsert(self, df, table: Table, metadata: MetaData, batch_size: int = None) -> None:
+        """
+        Upserts a dataframe by copying it into a temporary staging table and merging the staging table into
+        the target table with a single INSERT ... ON CONFLICT statement.
+        """
+        preparer = self.engine.dialect.identifier_preparer
+        columns = self._copy_columns(df, table)
         key_columns = [pk_column.name for pk_column in table.primary_key.columns.values()]
-        insert_statement = postgresql.insert(table).values(data)
-        upsert_statement = insert_statement.on_conflict_do_update(
-            index_elements=key_columns,
-            set_={c.key: c for c in insert_statement.excluded if c.key not in key_columns})
-        self.engine.execute(upsert_statement)
+        table_name = preparer.format_table(table)
+        staging_name = preparer.quote(f"{table.name}_staging")
+
+        column_list = ', '.join(preparer.quote(column) for column in columns)
+        key_list = ', '.join(preparer.quote(column) for column in key_columns)
+        update_list = ', '.join(f"{preparer.quote(column)} = EXCLUDED.{preparer.quote(column)}"
+                                for column in columns if column not in key_columns)
+        conflict_action = f"DO UPDATE SET {update_list}" if update_list else "DO NOTHING"
+
+        with self.transaction() as connection:
+            metadata.create_all(connection)
+            cursor = connection.connection.cursor()
+            # a staging table of an earlier upsert in the same transaction is only dropped on commit
+            cursor.execute(f"DROP TABLE IF EXISTS {staging_name}")
+            cursor.execute(f"CREATE TEMPORARY TABLE {staging_name} (LIKE {table_name} INCLUDING DEFAULTS) ON COMMIT DROP")
+            self.copy_from_df(cursor, df, staging_name, columns, batch_size=batch_size)
+            cursor.execute(
+                f"INSERT INTO {table_name} ({column_list}) SELECT {column_list} FROM {staging_name} "
+                f"ON CONFLICT ({key_list}) {conflict_action}"
+            )
+
+
+def _to_array_literal(value) -> str:
+    """
+    Formats a list as a PostgreSQL array literal ({a,b}), the same text a list gets when inserted into a String column.
+    """
+    if not isinstance(value, (list, tuple)):
+        return value
+    elements = []
+    for element in value:
+        if element is None:
+            elements.append('NULL')
+            continue
+        element = str(element)
+        if element == '' or element.upper() == 'NULL' or any(char in element for char in '{},"\\') or any(char.isspace() for char in element):
+            element = '"' + element.replace('\\', '\\\\').replace('"', '\\"') + '"'
+        elements.append(element)
+    return '{' + ','.join(elements) + '}'
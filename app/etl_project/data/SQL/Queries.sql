@@ -50,3 +50,26 @@ from
 Group by freqgrade.category
 order by freqgrade.category
 
+
+
+--The pipeline also keeps these averages up to date in summary tables (see assets/grade_level_summary.py)
+--Select average grade level by title from the summary table
+select title, avg_grade_level, category, article_link, publish_date, author, country
+from article_grade_level_summary
+where frequency_sum != 0
+order by title
+
+--Select average grade level by category from the summary table
+select category, avg_grade_level
+from category_grade_level_summary
+where frequency_sum != 0
+order by category
+
+
+--Readability features of each article, one row per article (see assets/readability.py)
+--grade_level_hits[g] is the number of vocabulary words of grade g in the article
+select article_readability.title, avg_grade_level, token_count, vocabulary_hits, distinct_vocabulary_hits,
+	grade_level_hits[1] as grade_1_hits, grade_level_hits[12] as grade_12_hits
+from article_readability
+where vocabulary_hits != 0
+order by avg_grade_level desc
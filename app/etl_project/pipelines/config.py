@@ -0,0 +1,84 @@
+from pathlib import Path
+import yaml
+
+
+CONFIG_PATH = Path(__file__).resolve().parent / '.yaml'
+DEFAULT_TABLES = {'news': 'news_raw_table', 'frequency': 'grade_level_word_frequency'}
+# tables shared by every job: the per-article and per-category grade level summaries and the readability features
+DEFAULT_SUMMARY_TABLES = {'article': 'article_grade_level_summary', 'category': 'category_grade_level_summary',
+                          'readability': 'article_readability'}
+
+
+def load_config(path: str = CONFIG_PATH) -> dict:
+    """
+    Reads a pipeline config: the extraction jobs, their target tables and cadences, and the shared settings.
+
+        name: news_etl
+        config:
+          vocabulary_s3_bucket: thesweats-project1
+          vocabulary_s3_key: vocabulary_by_gradelv.csv
+          max_workers: 4
+        schedule:
+          run_seconds: 1800
+        jobs:
+          - name: news
+            params:
+              country: us
+            tables:
+              news: news_raw_table
+              frequency: grade_level_word_frequency
+          - name: business
+            run_seconds: 3600
+            max_pages: 2
+            params:
+              category: business
+
+    params are News parameters (which_news, timeframe, size, country, ...) on top of the News defaults. A job without
+    tables loads into news_raw_table and grade_level_word_frequency, without run_seconds it runs every
+    schedule.run_seconds, without max_pages it follows the MAX_PAGES setting. A config without jobs has a single
+    'news' job. config.summary_tables (article, category, readability) renames the tables shared by every job, see
+    DEFAULT_SUMMARY_TABLES.
+
+    Returns:
+        {'name': ..., 'vocabulary_s3_bucket': ..., 'vocabulary_s3_key': ..., 'max_workers': ...,
+         'summary_tables': {'article': ..., 'category': ..., 'readability': ...},
+         'jobs': [{'name': ..., 'params': {...}, 'tables': {'news': ..., 'frequency': ...}, 'run_seconds': ..., 'max_pages': ...}]}
+
+    Raises:
+        Exception if a job has no name, two jobs have the same name, or a frequency table is given two news tables
+    """
+    with open(path) as config_file:
+        config = yaml.safe_load(config_file) or {}
+    settings = config.get('config') or {}
+    run_seconds = (config.get('schedule') or {}).get('run_seconds', 1800)
+
+    jobs = []
+    for job in config.get('jobs') or [{'name': 'news'}]:
+        if not job.get('name'):
+            raise Exception(f"Job {job} has no name.")
+        jobs.append({
+            'name': str(job['name']),
+            'params': job.get('params') or {},
+            'tables': {**DEFAULT_TABLES, **(job.get('tables') or {})},
+            'run_seconds': job.get('run_seconds', run_seconds),
+            'max_pages': job.get('max_pages')
+        })
+
+    names = [job['name'] for job in jobs]
+    if len(set(names)) != len(names):
+        raise Exception(f"Job names must be unique: {names}")
+    # the frequency table has a foreign key to its news table
+    news_table_of = {}
+    for job in jobs:
+        news_table = news_table_of.setdefault(job['tables']['frequency'], job['tables']['news'])
+        if news_table != job['tables']['news']:
+            raise Exception(f"Frequency table {job['tables']['frequency']} is used with news tables {news_table} and {job['tables']['news']}.")
+
+    return {
+        'name': config.get('name', 'news_etl'),
+        'vocabulary_s3_bucket': settings.get('vocabulary_s3_bucket'),
+        'vocabulary_s3_key': settings.get('vocabulary_s3_key'),
+        'max_workers': int(settings.get('max_workers', 4)),
+        'summary_tables': {**DEFAULT_SUMMARY_TABLES, **(settings.get('summary_tables') or {})},
+        'jobs': jobs
+    }
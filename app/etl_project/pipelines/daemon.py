@@ -0,0 +1,67 @@
+"""
+Runs the news pipeline on a schedule in a long-running process, instead of one container run per pull:
+
+    python -m etl_project.pipelines.daemon
+
+The jobs and their cadences are read from pipelines/.yaml (see config.py), jobs with the same cadence run together
+as one DAG. The pipeline state (database pool, HTTP session, rate limiter, compiled vocabulary, word counting
+processes) is kept warm between runs. The settings are the environment variables of pipeline.py.
+"""
+import signal
+import threading
+import traceback
+import schedule
+from etl_project.pipelines.config import load_config
+from etl_project.pipelines.pipeline import NewsPipeline, settings_from_env
+
+
+def run_jobs(pipeline: NewsPipeline, jobs: list[str], name: str = None) -> None:
+    """Runs jobs once, a failed run is reported and the jobs run again at their next scheduled time."""
+    try:
+        pipeline.run(jobs=jobs, name=name)
+    except Exception:
+        print(f"Run of {jobs} failed:\n{traceback.format_exc()}")
+
+def schedule_jobs(pipeline: NewsPipeline, jobs: list[dict], scheduler: schedule.Scheduler = None) -> schedule.Scheduler:
+    """
+    Schedules the jobs of a config, grouped by cadence, and the creation of the next monthly partitions once a day.
+
+    Scheduled runs happen one at a time in the thread calling run_pending, so runs never overlap within the process
+    (a run that takes longer than its cadence delays the next one instead); NewsPipeline.run skips the jobs already
+    running in another process.
+    """
+    scheduler = scheduler if scheduler is not None else schedule.Scheduler()
+    cadences = {}
+    for job in jobs:
+        cadences.setdefault(job['run_seconds'], []).append(job['name'])
+    for run_seconds, job_names in cadences.items():
+        # with a single cadence the metrics of the run are those of the whole pipeline
+        name = None if len(cadences) == 1 else f"every_{run_seconds}s"
+        scheduler.every(run_seconds).seconds.do(run_jobs, pipeline, job_names, name).tag(*job_names)
+    scheduler.every().day.do(pipeline.ensure_partitions).tag('partitions')
+    return scheduler
+
+def run_forever(scheduler: schedule.Scheduler, stop: threading.Event, max_sleep_seconds: float = 1.0) -> None:
+    """Runs the pending jobs, right away and then as they become due, until stop is set."""
+    scheduler.run_all()
+    while not stop.is_set():
+        scheduler.run_pending()
+        idle_seconds = scheduler.idle_seconds
+        stop.wait(max(0.0, min(idle_seconds, max_sleep_seconds)) if idle_seconds is not None else max_sleep_seconds)
+
+def main() -> None:
+    stop = threading.Event()
+    # ECS and docker stop send SIGTERM, the current run finishes before the process exits
+    signal.signal(signal.SIGTERM, lambda signum, frame: stop.set())
+    signal.signal(signal.SIGINT, lambda signum, frame: stop.set())
+
+    config = load_config()
+    pipeline = NewsPipeline(settings_from_env(), config=config)
+    try:
+        run_forever(schedule_jobs(pipeline, config['jobs']), stop)
+    finally:
+        pipeline.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+
+class Dag:
+    """
+    Tasks with dependencies, run concurrently on a bounded thread pool as soon as their dependencies are done.
+
+        dag = Dag()
+        dag.add('extract', extract)
+        dag.add('count', lambda results: count(results['extract']), dependencies=['extract'])
+        results, failed = dag.run(max_workers=4)
+
+    A task is added after its dependencies, so the graph cannot have a cycle. Tasks sharing a lock (e.g. writes to the
+    same tables) never run at the same time. When a task fails, the tasks depending on it are skipped and the
+    independent ones still run.
+    """
+
+    def __init__(self):
+        self.tasks = {}
+
+    def add(self, name: str, function, dependencies: list[str] = (), lock: str = None) -> str:
+        """
+        Args:
+            name: unique name of the task
+            function: called with the {name: result} of its dependencies if it has any, without arguments otherwise
+            dependencies: names of the tasks that must succeed first
+            lock: name of a resource the task holds while it runs
+
+        Returns:
+            name, to be used as a dependency
+
+        Raises:
+            Exception if the name is already used or a dependency was not added yet
+        """
+        if name in self.tasks:
+            raise Exception(f"Task {name} is already in the DAG.")
+        missing = [dependency for dependency in dependencies if dependency not in self.tasks]
+        if missing:
+            raise Exception(f"Dependencies of task {name} must be added first: {missing}")
+        self.tasks[name] = {'function': function, 'dependencies': list(dependencies), 'lock': lock}
+        return name
+
+    def run(self, max_workers: int = 4) -> tuple:
+        """
+        Runs every task. Ready tasks start in the order they were added.
+
+        Returns:
+            (results, failed): the {name: result} of the tasks that succeeded, and the {name: exception} of the tasks
+            that failed or were skipped because a dependency failed
+        """
+        results = {}
+        failed = {}
+        pending = list(self.tasks)
+        running = {}
+        held_locks = set()
+
+        def call(task: dict):
+            function = task['function']
+            if not task['dependencies']:
+                return function()
+            return function({dependency: results[dependency] for dependency in task['dependencies']})
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            while pending or running:
+                for name in list(pending):
+                    task = self.tasks[name]
+                    failed_dependencies = [dependency for dependency in task['dependencies'] if dependency in failed]
+                    if failed_dependencies:
+                        pending.remove(name)
+                        failed[name] = Exception(f"Skipped, task {failed_dependencies[0]} failed.")
+                    elif (all(dependency in results for dependency in task['dependencies'])
+                          and task['lock'] not in held_locks and len(running) < max_workers):
+                        pending.remove(name)
+                        if task['lock'] is not None:
+                            held_locks.add(task['lock'])
+                        running[executor.submit(call, task)] = name
+                if not running:
+                    continue
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    held_locks.discard(self.tasks[name]['lock'])
+                    try:
+                        results[name] = future.result()
+                    except Exception as exception:
+                        failed[name] = exception
+        return results, failed
@@ -1,48 +1,404 @@
+"""
+The news ETL pipeline, run once with:
+
+    python -m etl_project.pipelines.pipeline
+
+pandas, SQLAlchemy, requests and boto3 are imported by the stages that use them rather than at the top of this
+module, so a run that is skipped (or a process that only reads the settings) does not pay for importing them.
+"""
 from dotenv import load_dotenv
 import os
-from etl_project.connectors.postgresql import *
-from etl_project.assets.extract_news import *
-from sqlalchemy import *
+import time
+import datetime
+from pathlib import Path
+from etl_project.pipelines.config import load_config
+
+
+def settings_from_env() -> dict:
+    """The settings of the pipeline, read from the environment (and the .env file)."""
+    load_dotenv()
+    return {
+        'api_key': os.environ.get("API_KEY"),
+        'db_username': os.environ.get("DB_USERNAME"),
+        'db_password': os.environ.get("DB_PASSWORD"),
+        'server_name': os.environ.get("SERVER_NAME"),
+        'database_name': os.environ.get("DATABASE_NAME"),
+        'port': os.environ.get("PORT"),
+        # incremental runs skip the articles ingested by earlier runs and append to grade_level_word_frequency
+        'incremental': os.environ.get("INCREMENTAL", "true").lower() == "true",
+        'frequency_cache_path': os.environ.get("FREQUENCY_CACHE_PATH", "etl_project/data/cache/word_frequency.sqlite"),
+        # streaming runs follow up to MAX_PAGES pages and load them in chunks of CHUNK_SIZE articles while paging
+        'streaming': os.environ.get("STREAMING", "false").lower() == "true",
+        'max_pages': int(os.environ.get("MAX_PAGES", "10")),
+        'chunk_size': int(os.environ.get("CHUNK_SIZE", "500")),
+        # worker processes counting the vocabulary words, 1 counts in the pipeline process
+        'workers': int(os.environ.get("WORKERS", "1")),
+        # CATALOG_QUERIES > 0 extracts the publishers of data/list_of_newspaper_businesses.csv, 5 domains per query
+        'catalog_queries': int(os.environ.get("CATALOG_QUERIES", "0")),
+        'catalog_countries': os.environ.get("CATALOG_COUNTRIES", "united states").split(","),
+        'partition_by_publish_date': os.environ.get("PARTITION_BY_PUBLISH_DATE", "false").lower() == "true",
+        'db_pool_size': int(os.environ.get("DB_POOL_SIZE", "5")),
+        'statement_timeout_ms': int(os.environ["STATEMENT_TIMEOUT_MS"]) if os.environ.get("STATEMENT_TIMEOUT_MS") else None,
+        # per-stage metrics are printed as JSON lines, and optionally exported for node_exporter and to pipeline_run_metrics
+        'metrics_textfile': os.environ.get("METRICS_TEXTFILE"),
+        'metrics_table': os.environ.get("METRICS_TABLE", "false").lower() == "true",
+        # every page received from the API is kept in the landing zone (and mirrored to LANDING_S3_BUCKET if set) unless LANDING=false
+        'landing': os.environ.get("LANDING", "true").lower() == "true",
+        'landing_path': os.environ.get("LANDING_PATH", "etl_project/data/landing"),
+        'landing_s3_bucket': os.environ.get("LANDING_S3_BUCKET"),
+        # LANDING_RETENTION_DAYS deletes the local landing partitions of the days before that many days ago after every run
+        'landing_retention_days': int(os.environ["LANDING_RETENTION_DAYS"]) if os.environ.get("LANDING_RETENTION_DAYS") else None,
+        # REPLAY=true reloads the pages landed between REPLAY_FROM and REPLAY_TO (YYYY-MM-DD, inclusive) without calling the API
+        'replay': os.environ.get("REPLAY", "false").lower() == "true",
+        'replay_from': datetime.date.fromisoformat(os.environ["REPLAY_FROM"]) if os.environ.get("REPLAY_FROM") else None,
+        'replay_to': datetime.date.fromisoformat(os.environ["REPLAY_TO"]) if os.environ.get("REPLAY_TO") else None,
+        # a long-running process revalidates the vocabulary against S3 at most every VOCABULARY_REFRESH_SECONDS
+        'vocabulary_refresh_seconds': float(os.environ.get("VOCABULARY_REFRESH_SECONDS", "3600")),
+        # a NewsData.io request fails (and is retried) when connecting or waiting for data takes longer than this
+        'http_connect_timeout_seconds': float(os.environ.get("HTTP_CONNECT_TIMEOUT_SECONDS", "10")),
+        'http_read_timeout_seconds': float(os.environ.get("HTTP_READ_TIMEOUT_SECONDS", "30")),
+        # maximum number of NewsData.io requests (API credits) of a run, retries included, no limit if not set
+        'request_budget': int(os.environ["REQUEST_BUDGET"]) if os.environ.get("REQUEST_BUDGET") else None,
+        # RETENTION_DAYS deletes the articles (with their word frequencies and summaries) published more than that many days ago after every run
+        'retention_days': float(os.environ["RETENTION_DAYS"]) if os.environ.get("RETENTION_DAYS") else None,
+        # MATCH_MODE=word counts whole words only, stem also their inflections, substring counts words inside words
+        'match_mode': os.environ.get("MATCH_MODE", "substring"),
+    }
+
+
+class NewsPipeline:
+    """
+    The news ETL pipeline: extract from NewsData.io, count the vocabulary words by grade level and load to PostgreSQL.
+
+    The extraction jobs of the pipeline config (see config.py) run as a DAG: the stages of a job run one after the
+    other, the jobs run concurrently (see Dag), so one process can serve every feed.
+
+    What does not change between runs is set up once and kept warm: the database connection pool, the HTTP session
+    and rate limiter of the API client, the schema, the compiled vocabulary, the word frequency cache and the word
+    counting processes. A long-running process (see daemon.py) calls run() on the same instance for every run.
+    """
+
+    def __init__(self, settings: dict, config: dict = None):
+        """
+        Args:
+            settings: see settings_from_env
+            config: see load_config, pipelines/.yaml if None
+        """
+        from sqlalchemy import MetaData
+        from etl_project.connectors.postgresql import PostgreSqlClient
+
+        self.settings = settings
+        self.config = config if config is not None else load_config()
+        self.postgresql_client = PostgreSqlClient(server_name=settings['server_name'], database_name=settings['database_name'],
+                                                  username=settings['db_username'], password=settings['db_password'], port=settings['port'],
+                                                  pool_size=settings['db_pool_size'], statement_timeout_ms=settings['statement_timeout_ms'])
+        self.metadata = MetaData()
+        # created by the first run, see setup
+        self.news = None
+        self.vocabulary_provider = None
+        self.frequency_cache = None
+        # {(news table name, frequency table name): tables}, see create_schema
+        self.tables = {}
+        self.vocabulary = None
+        self.vocabulary_matcher = None
+        self.vocabulary_loaded_at = None
+        self.executor = None
+
+    def setup(self, jobs: list[dict]) -> None:
+        """
+        Creates the API client, the tables of the jobs and the word frequency cache on first use, and reloads the
+        vocabulary when it is older than the refresh interval.
+        """
+        from etl_project.assets.extract_news import News
+        from etl_project.assets.rate_limiter import RequestScheduler
+        from etl_project.assets.vocabulary import VocabularyProvider
+        from etl_project.assets.frequency_cache import WordFrequencyCache
+        from etl_project.assets.schema import create_schema
+
+        if self.news is None and not self.settings['replay']:
+            # every job shares the session and the rate limiter of this client
+            self.news = News(api_key=self.settings['api_key'], scheduler=RequestScheduler(request_budget=self.settings['request_budget']),
+                             timeout=(self.settings['http_connect_timeout_seconds'], self.settings['http_read_timeout_seconds']))
+        if self.frequency_cache is None:
+            self.frequency_cache = WordFrequencyCache(path=self.settings['frequency_cache_path'])
+        if self.vocabulary_provider is None:
+            # bundled vocabulary, revalidated against the S3 copy and cached with its compiled matcher
+            self.vocabulary_provider = VocabularyProvider(s3_bucket=self.config['vocabulary_s3_bucket'], key=self.config['vocabulary_s3_key'],
+                                                          match_mode=self.settings['match_mode'])
+        for job in jobs:
+            table_names = (job['tables']['news'], job['tables']['frequency'])
+            if table_names not in self.tables:
+                # tables, keys and indexes are owned by assets/schema.py
+                self.tables[table_names] = create_schema(postgresql_client=self.postgresql_client, metadata=self.metadata,
+                                                         partition_by_publish_date=self.settings['partition_by_publish_date'],
+                                                         news_table_name=table_names[0], frequency_table_name=table_names[1])
+
+        if self.vocabulary_loaded_at is None or time.monotonic() - self.vocabulary_loaded_at >= self.settings['vocabulary_refresh_seconds']:
+            vocabulary, vocabulary_matcher = self.vocabulary_provider.load()
+            self.vocabulary_loaded_at = time.monotonic()
+            # the loaded matcher is a fresh copy, the warm one (and its worker processes) is kept if the words did not change
+            if self.vocabulary_matcher is None or vocabulary_matcher.version != self.vocabulary_matcher.version:
+                self.vocabulary, self.vocabulary_matcher = vocabulary, vocabulary_matcher
+                if self.executor is not None:
+                    self.executor.shutdown()
+                self.executor = vocabulary_matcher.process_pool(max_workers=self.settings['workers']) if self.settings['workers'] > 1 else None
+
+    def ensure_partitions(self) -> None:
+        """Creates the monthly partitions of the current and next month, for a process running across months."""
+        if self.settings['partition_by_publish_date']:
+            from etl_project.assets.schema import ensure_monthly_partitions
+            for news_table_name in dict.fromkeys(job['tables']['news'] for job in self.config['jobs']):
+                ensure_monthly_partitions(self.postgresql_client, start=datetime.date.today().replace(day=1), months=2,
+                                          table_name=news_table_name)
+
+    def metrics_textfile(self, name: str = None) -> str:
+        """The Prometheus textfile of a run, METRICS_TEXTFILE for an unnamed run."""
+        path = Path(self.settings['metrics_textfile'])
+        return str(path) if name is None else str(path.with_name(f"{path.stem}_{name}{path.suffix}"))
+
+    def run(self, jobs: list[str] = None, name: str = None) -> "RunMetrics":
+        """
+        Runs jobs of the config once. A job is skipped if another process is running it.
+
+        Args:
+            jobs: names of the jobs to run, every job if None
+            name: name of the run in the metrics (e.g. the cadence of the jobs), None for the whole pipeline
+
+        Returns:
+            The metrics of the run, None if every job was skipped
+
+        Raises:
+            Exception if a job failed, after the other jobs ran
+        """
+        config_jobs = {job['name']: job for job in self.config['jobs']}
+        jobs = [config_jobs[job_name] for job_name in (jobs if jobs is not None else config_jobs)]
+        if not self.settings['incremental'] and len({job['tables']['frequency'] for job in jobs}) < len(jobs):
+            raise Exception("With INCREMENTAL=false every job overwrites its frequency table, the jobs of a run cannot share one.")
+        pipeline_name = self.config['name']
+        with self.postgresql_client.advisory_locks([f"{pipeline_name}:{job['name']}" for job in jobs]) as acquired:
+            skipped = [job['name'] for job in jobs if f"{pipeline_name}:{job['name']}" not in acquired]
+            if skipped:
+                print(f"Jobs {skipped} are already running in another process, skipping them in this run")
+            jobs = [job for job in jobs if job['name'] not in skipped]
+            if not jobs:
+                return None
+            from etl_project.assets.instrumentation import RunMetrics
+            from etl_project.assets.landing import LandingZone
+
+            metrics = RunMetrics(pipeline=pipeline_name if name is None else f"{pipeline_name}.{name}")
+            # a replay reads the landing zone even when the pages of the run are not landed
+            landing_zone = (LandingZone(path=self.settings['landing_path'], s3_bucket=self.settings['landing_s3_bucket'])
+                            if self.settings['landing'] or self.settings['replay'] else None)
+            try:
+                self._run(metrics, landing_zone, jobs=jobs)
+            finally:
+                if landing_zone is not None:
+                    landing_zone.close()
+                if self.settings['metrics_textfile']:
+                    metrics.write_prometheus_textfile(self.metrics_textfile(name))
+                if self.settings['metrics_table']:
+                    metrics.save(self.postgresql_client)
+            return metrics
+
+    def _run(self, metrics: "RunMetrics", landing_zone: "LandingZone", jobs: list[dict]) -> None:
+        from etl_project.assets.incremental import load_watermark
+        from etl_project.pipelines.dag import Dag
+
+        with metrics.stage('setup'):
+            self.setup(jobs)
+            if self.news is not None and self.news.scheduler is not None:
+                self.news.scheduler.start_run()
+            watermarks = {job['name']: load_watermark(postgresql_client=self.postgresql_client, name=job['name']) if self.settings['incremental'] else None
+                          for job in jobs}
+
+        if self.settings['replay']:
+            self._replay(metrics, landing_zone, tables=self.tables[(jobs[0]['tables']['news'], jobs[0]['tables']['frequency'])])
+        else:
+            dag = Dag()
+            for job in jobs:
+                self._add_job(dag, metrics, job, news=self.news.with_params(landing_zone=landing_zone, **job['params']),
+                              watermark=watermarks[job['name']])
+            _, failed = dag.run(max_workers=self.config['max_workers'])
+            for task, exception in failed.items():
+                print(f"Task {task} failed: {exception}")
+            if failed:
+                raise Exception(f"{len(failed)} tasks of the run failed: {sorted(failed)}")
+
+        if self.settings['retention_days'] is not None:
+            with metrics.stage('retention'):
+                self.delete_expired_news(news_table_names={job['tables']['news'] for job in jobs})
+
+        if landing_zone is not None and self.settings['landing_retention_days'] is not None:
+            with metrics.stage('landing_retention') as stage:
+                today = datetime.datetime.now(datetime.timezone.utc).date()
+                deleted = landing_zone.delete_older_than(today - datetime.timedelta(days=self.settings['landing_retention_days']))
+                stage.update(partitions=len(deleted))
+
+        print(f"Word frequency cache: {self.frequency_cache.stats()}")
+
+    def delete_expired_news(self, news_table_names: set) -> None:
+        """
+        Deletes the articles published more than retention_days ago from news tables, with their word frequencies in
+        every frequency table set up with them by this process, their summaries and their readability features.
+        """
+        from etl_project.assets.schema import delete_news_older_than
+
+        cutoff = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(days=self.settings['retention_days'])
+        for news_table_name in sorted(news_table_names):
+            delete_news_older_than(self.postgresql_client, cutoff, news_table_name=news_table_name,
+                                   frequency_table_names=[frequency for news, frequency in self.tables if news == news_table_name],
+                                   **self.summary_table_names())
+
+    def summary_table_names(self) -> dict:
+        """The summary tables of the config, as the table name arguments of run_streaming and delete_news_older_than."""
+        summary_tables = self.config['summary_tables']
+        return {'article_summary_table_name': summary_tables['article'], 'category_summary_table_name': summary_tables['category'],
+                'readability_table_name': summary_tables['readability']}
+
+    def _replay(self, metrics: "RunMetrics", landing_zone: "LandingZone", tables: dict) -> None:
+        """Reprocesses the landed pages into the tables of the first job, the frequencies of replayed articles are replaced."""
+        from etl_project.assets.streaming import run_streaming
+
+        settings = self.settings
+        with metrics.stage('replay') as stage:
+            counts = run_streaming(pages=landing_zone.replay(start_date=settings['replay_from'], end_date=settings['replay_to']), word_by_grade_level_df=self.vocabulary,
+                                   postgresql_client=self.postgresql_client, news_table=tables['news'], frequency_table=tables['frequency'],
+                                   metadata=self.metadata, chunk_size=settings['chunk_size'], frequency_load_method="insert", cache=self.frequency_cache,
+                                   matcher=self.vocabulary_matcher, update_summaries=True, executor=self.executor, replace_frequencies=True,
+                                   **self.summary_table_names())
+            stage.update(rows_out=counts['frequency_rows'], articles=counts['articles'], chunks=counts['chunks'])
+
+    def _add_job(self, dag, metrics: "RunMetrics", job: dict, news, watermark) -> None:
+        """
+        Adds the stages of a job to the DAG: extract -> normalize -> word_count -> aggregate -> load.
+
+        Loads write the summary tables shared by every job (category rollups are updated in place), so the load
+        stages of the jobs take the same lock and run one at a time; extraction and word counting run concurrently.
+        """
+        from etl_project.assets.extract_news import normalize_news, process_articles, loaded
+        from etl_project.assets.grade_level_summary import summarize_articles, merge_grade_level_summaries
+        from etl_project.assets.incremental import save_watermark
+        from etl_project.assets.readability import merge_readability
+        from etl_project.assets.schema import prepare_news_df
+
+        settings = self.settings
+        postgresql_client = self.postgresql_client
+        metadata = self.metadata
+        incremental = settings['incremental']
+        tables = self.tables[(job['tables']['news'], job['tables']['frequency'])]
+        max_pages = job['max_pages'] if job['max_pages'] is not None else settings['max_pages']
+        api_counters = lambda: {'bytes_transferred': news.bytes_received, 'retries': news.scheduler.stats()['retries']}
+        stage_name = lambda stage: f"{job['name']}.{stage}"
+
+        if settings['streaming']:
+            from etl_project.assets.streaming import run_streaming
+
+            # Pulling, processing and loading the newspaper api data one chunk at a time
+            def stream():
+                with metrics.stage(stage_name('streaming'), counters=api_counters) as stage:
+                    counts = run_streaming(pages=news.iter_pages(max_pages=max_pages), word_by_grade_level_df=self.vocabulary,
+                                           postgresql_client=postgresql_client, news_table=tables['news'], frequency_table=tables['frequency'],
+                                           metadata=metadata, chunk_size=settings['chunk_size'], frequency_load_method="insert" if incremental else "overwrite",
+                                           watermark=watermark, cache=self.frequency_cache, matcher=self.vocabulary_matcher, update_summaries=True,
+                                           executor=self.executor, **self.summary_table_names())
+                    stage.update(rows_out=counts['frequency_rows'], articles=counts['articles'], chunks=counts['chunks'])
+                if incremental:
+                    save_watermark(watermark=watermark, postgresql_client=postgresql_client, name=job['name'])
+
+            dag.add(stage_name('streaming'), stream, lock='summaries')
+            return
+
+        def extract():
+            # Pulling the newspaper api data
+            with metrics.stage(stage_name('extract'), counters=api_counters) as stage:
+                if settings['catalog_queries'] > 0:
+                    from etl_project.assets.extraction_planner import load_catalog, plan_queries, run_query_plan
+                    queries = plan_queries(load_catalog(), countries=settings['catalog_countries'], max_queries=settings['catalog_queries'])
+                    articles, failed_queries = run_query_plan(news=news, queries=queries, max_pages=max_pages, watermark=watermark)
+                    for failed_query, exception in failed_queries:
+                        print(f"Query {failed_query} failed: {exception}")
+                    stage.update(rows_out=len(articles), queries=len(queries), failed_queries=len(failed_queries))
+                    return articles
+                if not incremental:
+                    pages = [news.get_news()]
+                else:
+                    # pages come newest first, paging stops at the first page without any new article
+                    pages = []
+                    for response in news.iter_pages(max_pages=max_pages):
+                        results = response.get('results') or []
+                        if not results or all(article.get('link') in watermark.seen_links for article in results):
+                            break
+                        pages.append(response)
+                stage['rows_out'] = sum(len(page.get('results') or []) for page in pages)
+                return pages
+
+        def normalize(results):
+            # the catalog extraction returns articles already normalized and filtered
+            if settings['catalog_queries'] > 0:
+                return results[stage_name('extract')]
+            pages = results[stage_name('extract')]
+            with metrics.stage(stage_name('normalize'), rows_in=sum(len(page.get('results') or []) for page in pages)) as stage:
+                articles = normalize_news({'results': [article for page in pages for article in page.get('results') or []]})
+                if watermark is not None:
+                    articles = watermark.filter_new(articles)
+                    watermark.update(articles, next_page=pages[-1].get('nextPage') if pages else None)
+                stage['rows_out'] = len(articles)
+                return articles
+
+        def word_count(results):
+            # Processing the newspaper df using vocabulary by grade level
+            # only the non-zero frequencies are used downstream (see data/SQL/Queries.sql), the readability features
+            # of each article come out of the same counts
+            articles = results[stage_name('normalize')]
+            with metrics.stage(stage_name('word_count'), rows_in=len(articles)) as stage:
+                frequencies, readability = process_articles(word_by_grade_level_df=self.vocabulary, newspaper_articles_df=articles, matcher=self.vocabulary_matcher,
+                                                            sparse=True, cache=self.frequency_cache, executor=self.executor, readability=True)
+                stage['rows_out'] = len(frequencies)
+                return frequencies, readability
+
+        def aggregate(results):
+            # Average grade level per article, merged into the per-category rollups by the load
+            articles, (frequencies, _) = results[stage_name('normalize')], results[stage_name('word_count')]
+            with metrics.stage(stage_name('aggregate'), rows_in=len(frequencies)) as stage:
+                summaries = summarize_articles(frequencies, articles)
+                stage['rows_out'] = len(summaries)
+                return summaries
+
+        def load(results):
+            # Loading everything on one connection, committed once
+            articles, (frequencies, readability), summaries = (results[stage_name('normalize')], results[stage_name('word_count')],
+                                                               results[stage_name('aggregate')])
+            with metrics.stage(stage_name('load'), rows_in=len(articles) + len(frequencies)), postgresql_client.transaction():
+                loaded(df=prepare_news_df(articles), postgresql_client=postgresql_client, table=tables['news'], metadata=metadata, load_method="upsert", bulk=True)
+                loaded(df=frequencies, postgresql_client=postgresql_client, table=tables['frequency'], metadata=metadata, load_method="insert" if incremental else "overwrite", bulk=True)
+
+                # Keeping the average grade level per article and per category up to date
+                summary_tables = self.config['summary_tables']
+                merge_grade_level_summaries(summaries, postgresql_client=postgresql_client, article_table_name=summary_tables['article'],
+                                            category_table_name=summary_tables['category'])
+                merge_readability(readability, postgresql_client=postgresql_client, table_name=summary_tables['readability'])
+
+                if incremental:
+                    save_watermark(watermark=watermark, postgresql_client=postgresql_client, name=job['name'])
+
+        dag.add(stage_name('extract'), extract)
+        dag.add(stage_name('normalize'), normalize, dependencies=[stage_name('extract')])
+        dag.add(stage_name('word_count'), word_count, dependencies=[stage_name('normalize')])
+        dag.add(stage_name('aggregate'), aggregate, dependencies=[stage_name('normalize'), stage_name('word_count')])
+        dag.add(stage_name('load'), load, dependencies=[stage_name('normalize'), stage_name('word_count'), stage_name('aggregate')], lock='summaries')
+
+    def close(self) -> None:
+        """Stops the word counting processes and closes the word frequency cache and the connection pool."""
+        if self.executor is not None:
+            self.executor.shutdown()
+        if self.frequency_cache is not None:
+            self.frequency_cache.close()
+        self.postgresql_client.engine.dispose()
 
 
 if __name__ == "__main__":
-    loads = load_dotenv()
-    API_KEY = os.environ.get("API_KEY")
-    DB_USERNAME = os.environ.get("DB_USERNAME")
-    DB_PASSWORD = os.environ.get("DB_PASSWORD")
-    SERVER_NAME = os.environ.get("SERVER_NAME")
-    DATABASE_NAME = os.environ.get("DATABASE_NAME")
-    PORT = os.environ.get("PORT")
-
-    news = News(api_key=API_KEY, which_news='news', language='en', timeframe=8, size=10, country='us')
-    news_data = news.get_news()
-
-    postgresql_client = PostgreSqlClient(server_name=SERVER_NAME, database_name=DATABASE_NAME, username=DB_USERNAME, password=DB_PASSWORD, port=PORT)
-    metadata = MetaData()
-
-    # Pulling the newspaper api data and then loading it 
-  
-    df_news_data = json_news_to_df(news_data)
-    df_renamed_news_data = rename_and_select_columns_news(df_news_data)
-
-    news_raw_table = Table(
-    'news_raw_table',  
-    metadata,
-    Column('title', String),  
-    Column('article_link', String, primary_key=True),
-    Column('keywords', String),
-    Column('author', String),
-    Column('publish_date', String), 
-    Column('article_contents', Text),
-    Column('category', String),
-    Column('country', String),
-    Column('language', String)
-    )
-
-    loaded(df=df_renamed_news_data, postgresql_client=postgresql_client, table=news_raw_table, metadata=metadata, load_method="upsert")
-    
-    # Processing the newspaper df using vocabulary by grade level, then loading it 
-    df_vocabulary_by_gradelv = download_from_s3(s3_bucket="thesweats-project1", key="vocabulary_by_gradelv.csv")
-    df_processed = process_articles(word_by_grade_level_df=df_vocabulary_by_gradelv, newspaper_articles_df=df_renamed_news_data)
-
-    df_processed.to_sql(name='grade_level_word_frequency', con=postgresql_client.engine, if_exists='replace', index=False)
\ No newline at end of file
+    pipeline = NewsPipeline(settings_from_env())
+    try:
+        pipeline.run()
+    finally:
+        pipeline.close()
@@ -0,0 +1,202 @@
+"""
+Benchmarks of the extract/transform/load hot paths on synthetic NewsData.io payloads.
+
+    PYTHONPATH=app python -m etl_project_benchmark.run_benchmarks --output bench.json
+    PYTHONPATH=app python -m etl_project_benchmark.run_benchmarks --baseline etl_project_benchmark/baseline.json
+
+The database benchmarks run against the PostgreSQL database of the DB_USERNAME, DB_PASSWORD, SERVER_NAME,
+DATABASE_NAME and PORT environment variables (same as the tests), they are skipped when SERVER_NAME is not set.
+With --baseline, the exit code is 1 if a benchmark is slower or uses more memory than the baseline allows.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+import numpy as np
+from dotenv import load_dotenv
+from sqlalchemy import Table, Column, String, Text, MetaData, TIMESTAMP
+from sqlalchemy.dialects.postgresql import ARRAY
+from etl_project.assets.extract_news import json_news_to_df, rename_and_select_columns_news, normalize_news, process_articles
+from etl_project.assets.vocabulary_matcher import VocabularyMatcher
+from etl_project.assets.schema import prepare_news_df
+from etl_project.connectors.postgresql import PostgreSqlClient
+from etl_project_benchmark.synthetic import synthetic_payload, vocabulary_df
+
+
+def measure(function, items: int, repeats: int = 5) -> dict:
+    """
+    Calls function repeats times (plus one untimed warm-up call) and returns its latency percentiles, throughput
+    in items per second at the median latency and the peak memory allocated by one call (traced by tracemalloc).
+    """
+    function()
+    latencies = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        latencies.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        function()
+        _, peak_bytes = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    p50, p95 = np.percentile(latencies, [50, 95])
+    return {
+        'items': items,
+        'repeats': repeats,
+        'p50_seconds': float(p50),
+        'p95_seconds': float(p95),
+        'max_seconds': float(max(latencies)),
+        'items_per_second': items / p50 if p50 > 0 else None,
+        'peak_memory_mb': peak_bytes / 2 ** 20
+    }
+
+def benchmark_table(metadata: MetaData) -> Table:
+    """Same columns as news_raw_table, in a table of its own."""
+    return Table(
+        'benchmark_news_raw_table',
+        metadata,
+        Column('title', String),
+        Column('article_link', String, primary_key=True),
+        Column('keywords', ARRAY(Text)),
+        Column('author', ARRAY(Text)),
+        Column('publish_date', TIMESTAMP(timezone=True)),
+        Column('article_contents', Text),
+        Column('category', String),
+        Column('country', String),
+        Column('language', String)
+    )
+
+def postgresql_client_from_env() -> PostgreSqlClient:
+    load_dotenv()
+    if not os.environ.get("SERVER_NAME"):
+        return None
+    return PostgreSqlClient(
+        server_name=os.environ.get("SERVER_NAME"),
+        database_name=os.environ.get("DATABASE_NAME"),
+        username=os.environ.get("DB_USERNAME"),
+        password=os.environ.get("DB_PASSWORD"),
+        port=os.environ.get("PORT")
+    )
+
+def run_benchmarks(articles: int = 1000, words_per_article: int = 400, repeats: int = 5,
+                   postgresql_client: PostgreSqlClient = None) -> dict:
+    """
+    Runs every benchmark on the same synthetic payload.
+
+    Returns:
+        {'config': ..., 'environment': ..., 'results': {benchmark: measurements}}
+    """
+    word_by_grade_level_df = vocabulary_df()
+    payload = synthetic_payload(n_articles=articles, words_per_article=words_per_article)
+    news_df = normalize_news(payload)
+    matcher = VocabularyMatcher(words=word_by_grade_level_df['Word'])
+
+    benchmarks = {
+        'json_news_to_df': lambda: json_news_to_df(payload),
+        'rename_and_select_columns_news': lambda: rename_and_select_columns_news(json_news_to_df(payload)),
+        'normalize_news': lambda: normalize_news(payload),
+        # a fresh matcher each call, its lookup table would otherwise hold every run of the corpus after the warm-up
+        'process_articles': lambda: process_articles(word_by_grade_level_df, news_df),
+        'process_articles_sparse': lambda: process_articles(word_by_grade_level_df, news_df, sparse=True),
+        'process_articles_sparse_warm_matcher': lambda: process_articles(word_by_grade_level_df, news_df, matcher=matcher, sparse=True),
+        'process_articles_sparse_word': lambda: process_articles(word_by_grade_level_df, news_df, sparse=True, match_mode='word'),
+        'process_articles_sparse_stem': lambda: process_articles(word_by_grade_level_df, news_df, sparse=True, match_mode='stem'),
+        'process_articles_sparse_readability': lambda: process_articles(word_by_grade_level_df, news_df, sparse=True, readability=True),
+    }
+
+    if postgresql_client is not None:
+        metadata = MetaData()
+        table = benchmark_table(metadata)
+        rows_df = prepare_news_df(news_df)
+        rows = [{column: value for column, value in row.items() if column in table.columns}
+                for row in rows_df.loc[:, ~rows_df.columns.duplicated()].to_dict(orient='records')]
+
+        def fresh_table(load):
+            def run():
+                postgresql_client.drop_table(table.name)
+                load()
+            return run
+
+        benchmarks.update({
+            'postgresql_insert': fresh_table(lambda: postgresql_client.insert(data=rows, table=table, metadata=metadata)),
+            'postgresql_upsert': lambda: postgresql_client.upsert(data=rows, table=table, metadata=metadata),
+            'postgresql_bulk_insert': fresh_table(lambda: postgresql_client.bulk_insert(df=rows_df, table=table, metadata=metadata)),
+            'postgresql_bulk_upsert': lambda: postgresql_client.bulk_upsert(df=rows_df, table=table, metadata=metadata),
+            'postgresql_bulk_overwrite': lambda: postgresql_client.bulk_overwrite(df=rows_df, table=table, metadata=metadata),
+        })
+
+    results = {}
+    try:
+        for name, function in benchmarks.items():
+            results[name] = measure(function, items=articles, repeats=repeats)
+            print(f"{name}: p50 {results[name]['p50_seconds'] * 1000:.1f} ms, "
+                  f"{results[name]['items_per_second']:.0f} articles/s, {results[name]['peak_memory_mb']:.1f} MB", file=sys.stderr)
+    finally:
+        if postgresql_client is not None:
+            postgresql_client.drop_table('benchmark_news_raw_table')
+
+    return {
+        'config': {'articles': articles, 'words_per_article': words_per_article, 'repeats': repeats},
+        'environment': {'python': platform.python_version(), 'machine': platform.machine(), 'processor': platform.processor(),
+                        'cpus': os.cpu_count()},
+        'results': results
+    }
+
+def compare(results: dict, baseline: dict, tolerance: float = 0.25, min_seconds: float = 0.005,
+            min_memory_mb: float = 1.0) -> list[str]:
+    """
+    Compares results with a baseline produced with the same config.
+
+    The allowed increase is tolerance or, for the fastest and smallest benchmarks whose timings are mostly noise,
+    min_seconds / min_memory_mb if that is larger.
+
+    Returns:
+        One message per regression: a median latency or a peak memory above what the baseline allows, or a benchmark
+        without a baseline (record it with --output when adding a benchmark)
+    """
+    if results['config'] != baseline['config']:
+        raise Exception(f"The baseline was produced with another config: {baseline['config']}")
+    regressions = [f"{name}: no baseline" for name in results['results'] if name not in baseline['results']]
+    for name, expected in baseline['results'].items():
+        actual = results['results'].get(name)
+        if actual is None:
+            continue
+        for metric, min_increase in [('p50_seconds', min_seconds), ('peak_memory_mb', min_memory_mb)]:
+            if actual[metric] > expected[metric] + max(expected[metric] * tolerance, min_increase):
+                regressions.append(f"{name}: {metric} {actual[metric]:.4g} > {expected[metric]:.4g} + {tolerance:.0%}")
+    return regressions
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--articles', type=int, default=1000)
+    parser.add_argument('--words-per-article', type=int, default=400)
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--output', help='write the results to this JSON file, e.g. to record a new baseline')
+    parser.add_argument('--baseline', help='JSON file of a previous run to compare with')
+    parser.add_argument('--tolerance', type=float, default=0.25)
+    parser.add_argument('--min-seconds', type=float, default=0.005, help='smallest latency increase reported as a regression')
+    parser.add_argument('--skip-db', action='store_true', help='skip the PostgreSQL benchmarks')
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(articles=args.articles, words_per_article=args.words_per_article, repeats=args.repeats,
+                             postgresql_client=None if args.skip_db else postgresql_client_from_env())
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(results, output, indent=2)
+    if args.baseline:
+        with open(args.baseline) as baseline:
+            regressions = compare(results, json.load(baseline), tolerance=args.tolerance, min_seconds=args.min_seconds)
+        for regression in regressions:
+            print(f"Regression {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,60 @@
+import datetime
+import random
+import pandas as pd
+from etl_project.assets.vocabulary import BUNDLED_VOCABULARY_PATH
+
+
+FILLER_WORDS = [
+    'the', 'a', 'of', 'to', 'and', 'in', 'said', 'on', 'for', 'with', 'was', 'by', 'at', 'from', 'that', 'this',
+    'officials', 'state', 'county', 'city', 'president', 'report', 'people', 'year', 'week', 'percent', 'police',
+    'government', 'company', 'market', 'season', 'game', 'team', 'school', 'court', 'election', 'health'
+]
+CATEGORIES = ['top', 'business', 'politics', 'sports', 'science', 'health', 'entertainment']
+
+
+def vocabulary_df() -> pd.DataFrame:
+    """The bundled vocabulary by grade level."""
+    return pd.read_csv(BUNDLED_VOCABULARY_PATH)
+
+def article_text(rng: random.Random, vocabulary: list, words_per_article: int, vocabulary_share: float = 0.1) -> str:
+    """A random article body: filler words with vocabulary_share of vocabulary words, in sentences."""
+    words = [rng.choice(vocabulary) if rng.random() < vocabulary_share else rng.choice(FILLER_WORDS)
+             for _ in range(words_per_article)]
+    sentences = [' '.join(words[start:start + 15]).capitalize() for start in range(0, len(words), 15)]
+    return '. '.join(sentences) + '.'
+
+def synthetic_payload(n_articles: int, words_per_article: int = 400, vocabulary: list = None, seed: int = 0,
+                      start: datetime.datetime = datetime.datetime(2023, 9, 1)) -> dict:
+    """
+    A NewsData.io /news response with n_articles random articles, newest first.
+
+    Args:
+        n_articles: number of articles in results
+        words_per_article: number of words in the content of each article
+        vocabulary: words mixed into the contents, the bundled vocabulary if None
+        seed: seed of the random generator, the same arguments always give the same payload
+        start: publish date of the oldest article, articles are a minute apart
+    """
+    rng = random.Random(seed)
+    vocabulary = vocabulary if vocabulary is not None else vocabulary_df()['Word'].astype(str).tolist()
+    results = []
+    for index in reversed(range(n_articles)):
+        title = ' '.join(rng.choice(FILLER_WORDS + vocabulary) for _ in range(8)).capitalize()
+        results.append({
+            'article_id': f'{seed}-{index}',
+            'title': title,
+            'link': f'https://news.example.com/{seed}/{index}',
+            'keywords': rng.sample(FILLER_WORDS, 3) if rng.random() < 0.7 else None,
+            'creator': [f'author {rng.randrange(200)}'] if rng.random() < 0.6 else None,
+            'video_url': None,
+            'description': title,
+            'content': article_text(rng, vocabulary, words_per_article),
+            'pubDate': (start + datetime.timedelta(minutes=index)).strftime('%Y-%m-%d %H:%M:%S'),
+            'image_url': None,
+            'source_id': f'source{rng.randrange(50)}',
+            'source_priority': rng.randrange(1, 100000),
+            'country': ['united states of america'],
+            'category': [rng.choice(CATEGORIES)],
+            'language': 'english'
+        })
+    return {'status': 'success', 'totalResults': n_articles, 'results': results, 'nextPage': None}
@@ -1,5 +1,6 @@
 from etl_project.assets.extract_news import News
 from etl_project.assets.extract_news import json_news_to_df, rename_and_select_columns_news, download_from_s3, calculate_word_frequency, process_articles
+from etl_project.assets.extract_news import fetch_news_concurrently, normalize_news
 import pandas as pd
 import pytest
 from dotenv import load_dotenv
@@ -144,3 +145,78 @@ def test_process_articles(setup):
     results_df = process_articles(word_by_grade_level_data, newspaper_articles_data)
     assert type(results_df) == pd.DataFrame
     assert len(results_df) == 4  
+
+
+@pytest.fixture
+def stub_news_pages():
+    return 3
+
+def test_iter_pages(stub_news_server):
+    # Assemble
+    base_url, requests_seen = stub_news_server
+    news = News(api_key='test', domainurl='a.com')
+    news.base_url = base_url
+
+    # Act
+    pages = list(news.iter_pages())
+    limited_pages = list(news.iter_pages(max_pages=2))
+
+    # Assert
+    assert len(pages) == 3
+    assert pages[-1]['nextPage'] is None
+    assert len(limited_pages) == 2
+    assert [params.get('page') for params in requests_seen[:3]] == [None, '1', '2']
+
+def test_fetch_all(stub_news_server):
+    # Assemble
+    base_url, _ = stub_news_server
+    news = News(api_key='test', domainurl='a.com')
+    news.base_url = base_url
+
+    # Act
+    response = news.fetch_all(max_articles=3)
+
+    # Assert
+    assert [article['title'] for article in response['results']] == ['a.com 0-0', 'a.com 0-1', 'a.com 1-0']
+    assert response['nextPage'] == '2'
+    assert type(json_news_to_df(response)) == pd.DataFrame
+
+def test_fetch_news_concurrently(stub_news_server):
+    # Assemble
+    base_url, _ = stub_news_server
+    news = News(api_key='test')
+    news.base_url = base_url
+    queries = [{'domainurl': domain} for domain in ['a.com', 'b.com', 'c.com', 'd.com']]
+
+    # Act
+    responses = fetch_news_concurrently(news, queries, max_workers=2)
+
+    # Assert
+    assert len(responses) == 4
+    for query, response in zip(queries, responses):
+        assert len(response['results']) == 6
+        assert all(article['title'].startswith(query['domainurl']) for article in response['results'])
+
+def test_with_params_invalid(setup):
+    news = News(api_key='test')
+    with pytest.raises(TypeError):
+        news.with_params(not_a_param='value')
+
+def test_normalize_news():
+    # Assemble
+    response = {'status': 'success', 'results': [
+        {'title': 'title 1', 'link': 'link1', 'keywords': ['House', 'News'], 'creator': 'someone', 'pubDate': '2023-09-03 03:46:33',
+         'content': 'contents', 'category': ['top'], 'country': ['united states of america'], 'language': 'english', 'image_url': None},
+        {'title': 'title 2', 'link': 'link2', 'keywords': None, 'creator': None, 'pubDate': None}
+    ]}
+
+    # Act
+    df = normalize_news(response)
+
+    # Assert
+    assert list(df.columns) == ['title', 'article_link', 'keywords', 'author', 'publish_date', 'article_contents', 'category', 'country', 'language']
+    assert df['keywords'].tolist() == [['House', 'News'], None]
+    assert df['author'].tolist() == [['someone'], None]
+    assert df['category'].tolist() == [['top'], None]
+    assert df['article_contents'].tolist() == ['contents', None]
+    assert normalize_news({'results': []}).empty
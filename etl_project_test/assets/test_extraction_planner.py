@@ -0,0 +1,109 @@
+from etl_project.assets.extraction_planner import normalize_domain, plan_queries, run_query_plan, load_catalog, MAX_DOMAINS_PER_REQUEST
+from etl_project.assets.extract_news import News, fetch_news_concurrently
+from etl_project.assets.incremental import ExtractionWatermark
+from etl_project.assets.rate_limiter import RequestScheduler
+import pandas as pd
+import pytest
+
+
+@pytest.fixture
+def stub_news_shared_article():
+    return True
+
+def test_normalize_domain():
+    assert normalize_domain('https://www.LATimes.com/news?x=1') == 'latimes.com'
+    assert normalize_domain('revistadoqueijo.com.br') == 'revistadoqueijo.com.br'
+    assert normalize_domain('not a website') is None
+    assert normalize_domain(float('nan')) is None
+
+def test_plan_queries():
+    # Assemble
+    catalog_df = pd.DataFrame({
+        'country': ['united states', 'france', 'united states', 'united states', 'spain', 'united states'],
+        'size': ['1-10', '10001+', '501-1000', '501-1000', '11-50', '51-200'],
+        'website': ['small.com', 'lemonde.fr', 'www.big.com', 'big.com', 'elpais.es', None]
+    })
+
+    # Act
+    queries = plan_queries(catalog_df, countries=['united states', 'france'], max_domains_per_request=2)
+    all_queries = plan_queries(load_catalog())
+
+    # Assert
+    assert queries == [{'domainurl': ['lemonde.fr', 'big.com']}, {'domainurl': ['small.com']}]
+    assert plan_queries(catalog_df, max_domains_per_request=2, max_queries=1) == [{'domainurl': ['lemonde.fr', 'big.com']}]
+    assert all(len(query['domainurl']) == MAX_DOMAINS_PER_REQUEST for query in all_queries[:-1])
+    assert len({domain for query in all_queries for domain in query['domainurl']}) == sum(len(query['domainurl']) for query in all_queries)
+
+def test_run_query_plan(stub_news_server):
+    # Assemble
+    base_url, requests_seen = stub_news_server
+    news = News(api_key='test')
+    news.base_url = base_url
+    queries = [{'domainurl': ['a.com', 'b.com']}, {'domainurl': ['down.com']}, {'domainurl': ['c.com']}]
+
+    # Act
+    articles, failed_queries = run_query_plan(news, queries, max_workers=2)
+
+    # Assert
+    assert len(requests_seen) == 5
+    # the queries run on copies of the client, their bytes count for it
+    assert news.bytes_received > 0
+    assert articles['article_link'].tolist()[:2] == ['https://a.com/0/0', 'https://a.com/0/1']
+    assert len(articles) == 3 * 4 + 1
+    assert articles['article_link'].is_unique
+    assert [query for query, _ in failed_queries] == [{'domainurl': ['down.com']}]
+
+def test_run_query_plan_with_watermark_and_budget(stub_news_server):
+    # Assemble
+    base_url, requests_seen = stub_news_server
+    news = News(api_key='test', scheduler=RequestScheduler(request_budget=2))
+    news.base_url = base_url
+    watermark = ExtractionWatermark(seen_links={'https://a.com/0/0': None, 'https://a.com/0/1': None})
+
+    # Act
+    articles, failed_queries = run_query_plan(news, [{'domainurl': ['a.com']}, {'domainurl': ['c.com']}], max_workers=1,
+                                              watermark=watermark)
+
+    # Assert
+    assert len(requests_seen) == 2
+    assert 'https://a.com/0/0' not in articles['article_link'].tolist()
+    assert set(articles['article_link']) <= set(watermark.seen_links)
+    assert len(failed_queries) == 1
+
+@pytest.mark.parametrize('domain, request_budget', [('flaky.com', None), ('a.com', 1)])
+def test_run_query_plan_failing_on_second_page(stub_news_server, domain, request_budget):
+    # Assemble
+    base_url, _ = stub_news_server
+    news = News(api_key='test', scheduler=RequestScheduler(backoff_base=0.01, request_budget=request_budget))
+    news.base_url = base_url
+    watermark = ExtractionWatermark()
+
+    # Act
+    articles, failed_queries = run_query_plan(news, [{'domainurl': [domain]}], watermark=watermark)
+
+    # Assert
+    # the articles of the first page are returned, and the watermark only records the articles returned
+    assert sorted(articles['article_link']) == [f'https://{domain}/0/0', f'https://{domain}/0/1', 'https://wire.com/shared']
+    assert sorted(watermark.seen_links) == sorted(articles['article_link'])
+    assert [query for query, _ in failed_queries] == [{'domainurl': [domain]}]
+
+def test_copies_count_bytes_for_the_client(stub_news_server):
+    # Assemble
+    base_url, _ = stub_news_server
+    news = News(api_key='test')
+    news.base_url = base_url
+    sequential_news = News(api_key='test')
+    sequential_news.base_url = base_url
+    queries = [{'domainurl': ['a.com']}, {'domainurl': ['b.com', 'c.com']}]
+
+    # Act
+    fetch_news_concurrently(news, queries, max_workers=2)
+    for query in queries:
+        sequential_news.with_params(**query).fetch_all()
+    copy = news.with_params(domainurl=['a.com'])
+    copy.get_news()
+
+    # Assert
+    assert news.bytes_received > 0
+    assert news.bytes_received - copy.bytes_received == sequential_news.bytes_received
+    assert 0 < copy.bytes_received < news.bytes_received
@@ -0,0 +1,99 @@
+from etl_project.assets.frequency_cache import WordFrequencyCache, content_hash
+from etl_project.assets.vocabulary_matcher import VocabularyMatcher
+from etl_project.assets.extract_news import process_articles
+import pandas as pd
+import pytest
+import time
+
+
+@pytest.fixture
+def setup(tmp_path):
+    cache = WordFrequencyCache(path=str(tmp_path / 'cache' / 'word_frequency.sqlite'))
+    yield cache
+    cache.close()
+
+def test_put_and_get(setup):
+    # Assemble
+    cache = setup
+    cache.put_many('v1', {content_hash('a'): ({0: 2, 5: 1}, 7), content_hash('b'): ({}, 0)})
+
+    # Act
+    found = cache.get_many('v1', [content_hash('a'), content_hash('b'), content_hash('c')])
+
+    # Assert
+    assert found == {content_hash('a'): ({0: 2, 5: 1}, 7), content_hash('b'): ({}, 0)}
+    assert cache.stats()['hits'] == 2
+    assert cache.stats()['misses'] == 1
+
+def test_vocabulary_change_invalidates_entries(setup):
+    # Assemble
+    cache = setup
+    cache.put_many('v1', {content_hash('a'): ({0: 2}, 1)})
+
+    # Act
+    cache.put_many('v2', {content_hash('b'): ({0: 1}, 1)})
+
+    # Assert
+    assert cache.get_many('v2', [content_hash('a')]) == {}
+    assert len(cache) == 1
+
+def test_eviction_by_size_and_age(setup):
+    # Assemble
+    cache = setup
+    cache.max_entries = 2
+    cache.evict_every = 1
+    for text in ['a', 'b', 'c']:
+        cache.put_many('v1', {content_hash(text): ({0: 1}, 1)})
+        time.sleep(0.01)
+
+    # Act
+    remaining = cache.get_many('v1', [content_hash(text) for text in ['a', 'b', 'c']])
+    cache.max_age_seconds = 0
+    cache.evict('v1')
+
+    # Assert
+    assert set(remaining) == {content_hash('b'), content_hash('c')}
+    assert len(cache) == 0
+
+def test_eviction_every_n_puts_and_on_close(tmp_path):
+    # Assemble
+    path = str(tmp_path / 'word_frequency.sqlite')
+    cache = WordFrequencyCache(path=path, max_entries=2, evict_every=3)
+    entries = []
+
+    # Act
+    for text in 'abcde':
+        cache.put_many('v1', {content_hash(text): ({0: 1}, 1)})
+        entries.append(len(cache))
+        time.sleep(0.01)
+    cache.close()
+    reopened = WordFrequencyCache(path=path)
+    remaining = reopened.get_many('v1', [content_hash(text) for text in 'abcde'])
+    reopened.close()
+
+    # Assert
+    # the first put of a vocabulary version evicts, then every third put, and the last puts are evicted on close
+    assert entries == [1, 2, 3, 2, 3]
+    assert set(remaining) == {content_hash('d'), content_hash('e')}
+
+def test_process_articles_with_cache(setup):
+    # Assemble
+    cache = setup
+    word_by_grade_level_df = pd.DataFrame({'Word': ['sample', 'text'], 'Grade_Lv': [5, 6]})
+    newspaper_articles_df = pd.DataFrame({
+        'title': ['Article 1', 'Article 2', 'Article 3'],
+        'article_contents': ['This is a sample text.', 'Another sample sample.', 'This is a sample text.'],
+        'article_link': ['link1', 'link2', 'link3']
+    })
+    matcher = VocabularyMatcher(words=word_by_grade_level_df['Word'])
+
+    # Act
+    first = process_articles(word_by_grade_level_df, newspaper_articles_df, matcher=matcher, cache=cache)
+    second = process_articles(word_by_grade_level_df, newspaper_articles_df, matcher=matcher, sparse=True, cache=cache)
+
+    # Assert
+    assert first['frequency'].tolist() == [1, 1, 2, 0, 1, 1]
+    assert second['frequency'].tolist() == [1, 1, 2, 1, 1]
+    assert cache.stats()['hits'] == 3
+    assert cache.stats()['misses'] == 3
+    assert len(cache) == 2
@@ -0,0 +1,64 @@
+from etl_project.assets.grade_level_summary import summarize_articles, merge_grade_level_summaries
+from etl_project.assets.extract_news import process_articles
+import pandas as pd
+import pytest
+
+
+@pytest.fixture
+def postgresql_tables():
+    return ['test_article_grade_level_summary', 'test_category_grade_level_summary']
+
+@pytest.fixture
+def setup():
+    word_by_grade_level_df = pd.DataFrame({'Word': ['sample', 'text', 'words'], 'Grade_Lv': [2, 6, 10]})
+    articles_df = pd.DataFrame({
+        'title': ['Article 1', 'Article 2', 'Article 3'],
+        'article_link': ['link1', 'link2', 'link3'],
+        'category': [['top'], ['top'], ['science', 'top']],
+        'publish_date': ['2023-09-03 01:00:00'] * 3,
+        'author': [None, ['someone'], None],
+        'country': [['united states of america']] * 3,
+        'article_contents': ['a sample text', 'sample sample words', 'nothing to see']
+    })
+    return word_by_grade_level_df, articles_df
+
+def test_summarize_articles(setup):
+    # Assemble
+    word_by_grade_level_df, articles_df = setup
+    frequencies_df = process_articles(word_by_grade_level_df, articles_df, sparse=True)
+
+    # Act
+    summary = summarize_articles(frequencies_df, articles_df)
+
+    # Assert
+    assert summary['article_link'].tolist() == ['link1', 'link2', 'link3']
+    assert summary['weighted_grade_sum'].tolist() == [8.0, 14.0, 0.0]
+    assert summary['frequency_sum'].tolist() == [2, 3, 0]
+    assert summary['avg_grade_level'].tolist()[:2] == [4.0, 14.0 / 3]
+    assert pd.isnull(summary['avg_grade_level'][2])
+
+def test_merge_grade_level_summaries_incrementally(setup, setup_postgresql_client):
+    # Assemble
+    postgresql_client = setup_postgresql_client
+    word_by_grade_level_df, articles_df = setup
+    first_batch = articles_df.iloc[:2]
+    # second batch: article 2 was edited and article 3 is new
+    second_batch = articles_df.iloc[1:].assign(article_contents=['text text', 'nothing to see'])
+
+    # Act
+    for batch in [first_batch, second_batch]:
+        merge_grade_level_summaries(summarize_articles(process_articles(word_by_grade_level_df, batch, sparse=True), batch), postgresql_client,
+                                    article_table_name='test_article_grade_level_summary', category_table_name='test_category_grade_level_summary')
+
+    # Assert
+    articles = {row['article_link']: row for row in postgresql_client.engine.execute('select * from test_article_grade_level_summary')}
+    categories = {row['category']: row for row in postgresql_client.engine.execute('select * from test_category_grade_level_summary')}
+    assert articles['link2']['frequency_sum'] == 2
+    assert articles['link2']['avg_grade_level'] == 6.0
+    assert articles['link2']['author'] == '{someone}'
+    assert categories['{top}']['weighted_grade_sum'] == 20.0
+    assert categories['{top}']['frequency_sum'] == 4
+    assert categories['{top}']['article_count'] == 2
+    assert categories['{top}']['avg_grade_level'] == 5.0
+    assert categories['{science,top}']['article_count'] == 1
+    assert categories['{science,top}']['avg_grade_level'] is None
@@ -0,0 +1,69 @@
+from etl_project.assets.incremental import ExtractionWatermark, save_watermark, load_watermark
+import pandas as pd
+import pytest
+
+
+def make_articles(links, publish_dates):
+    return pd.DataFrame({
+        'title': [f'title {link}' for link in links],
+        'article_link': links,
+        'publish_date': publish_dates,
+        'article_contents': ['contents'] * len(links)
+    })
+
+def test_filter_new_skips_seen_links():
+    # Assemble
+    watermark = ExtractionWatermark()
+    watermark.update(make_articles(['a', 'b'], ['2023-09-03 01:00:00', '2023-09-03 02:00:00']))
+
+    # Act
+    new_df = watermark.filter_new(make_articles(['b', 'c', 'c'], ['2023-09-03 02:00:00', '2023-09-03 03:00:00', '2023-09-03 03:00:00']))
+
+    # Assert
+    assert new_df['article_link'].tolist() == ['c']
+    assert watermark.last_publish_date == '2023-09-03 02:00:00'
+
+def test_update_prunes_links_older_than_retention():
+    # Assemble
+    watermark = ExtractionWatermark(retention_hours=24)
+    watermark.update(make_articles(['old'], ['2023-09-01 00:00:00']))
+
+    # Act
+    watermark.update(make_articles(['new'], ['2023-09-03 00:00:00']))
+    new_df = watermark.filter_new(make_articles(['old', 'late'], ['2023-09-01 00:00:00', '2023-09-02 12:00:00']))
+
+    # Assert
+    assert list(watermark.seen_links) == ['new']
+    assert new_df['article_link'].tolist() == ['late']
+
+def test_save_and_load(tmp_path):
+    # Assemble
+    watermark = ExtractionWatermark()
+    watermark.update(make_articles(['a'], ['2023-09-03 01:00:00']), next_page='123')
+    path = tmp_path / 'state' / 'news.json'
+
+    # Act
+    watermark.save(path)
+    loaded_watermark = ExtractionWatermark.load(path)
+
+    # Assert
+    assert loaded_watermark.to_dict() == watermark.to_dict()
+    assert ExtractionWatermark.load(tmp_path / 'missing.json').seen_links == {}
+
+def test_save_and_load_watermark_from_database(setup_postgresql_client):
+    # Assemble
+    postgresql_client = setup_postgresql_client
+    watermark = ExtractionWatermark()
+    watermark.update(make_articles(['a'], ['2023-09-03 01:00:00']))
+
+    # Act
+    save_watermark(watermark=watermark, postgresql_client=postgresql_client, name='test_news')
+    save_watermark(watermark=watermark, postgresql_client=postgresql_client, name='test_news')
+    loaded_watermark = load_watermark(postgresql_client=postgresql_client, name='test_news')
+    missing_watermark = load_watermark(postgresql_client=postgresql_client, name='missing')
+
+    # Assert
+    assert loaded_watermark.to_dict() == watermark.to_dict()
+    assert missing_watermark.seen_links == {}
+
+    postgresql_client.drop_table('extraction_state')
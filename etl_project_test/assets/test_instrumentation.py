@@ -0,0 +1,115 @@
+from etl_project.assets.instrumentation import RunMetrics, run_metrics_table
+from io import StringIO
+from sqlalchemy import MetaData
+import json
+import pytest
+
+
+@pytest.fixture
+def postgresql_tables():
+    return ['pipeline_run_metrics']
+
+@pytest.fixture
+def setup_metrics():
+    stream = StringIO()
+    metrics = RunMetrics(pipeline='test_etl', run_id='run1', stream=stream)
+    received = {'bytes_transferred': 100, 'retries': 1}
+
+    with metrics.stage('extract', counters=lambda: dict(received)) as stage:
+        received.update(bytes_transferred=1124, retries=3)
+        stage['rows_out'] = 10
+    with pytest.raises(ValueError):
+        with metrics.stage('load', rows_in=10):
+            raise ValueError('database is down')
+    return metrics, stream
+
+def test_stage_records(setup_metrics):
+    # Assemble
+    metrics, stream = setup_metrics
+
+    # Act
+    lines = [json.loads(line) for line in stream.getvalue().splitlines()]
+
+    # Assert
+    assert [line['stage'] for line in lines] == ['extract', 'load']
+    assert lines[0]['run_id'] == 'run1' and lines[0]['pipeline'] == 'test_etl'
+    assert lines[0]['status'] == 'success'
+    assert lines[0]['rows_out'] == 10
+    assert lines[0]['bytes_transferred'] == 1024
+    assert lines[0]['retries'] == 2
+    assert lines[0]['wall_seconds'] >= 0 and lines[0]['cpu_seconds'] >= 0
+    assert lines[0]['peak_rss_mb'] > 0
+    assert lines[1]['status'] == 'failed'
+    assert lines[1]['error'] == 'ValueError: database is down'
+
+def test_cpu_seconds_of_concurrent_stages():
+    # Assemble
+    import threading
+    import time
+    metrics = RunMetrics(pipeline='test_etl', stream=StringIO())
+
+    def busy_stage():
+        with metrics.stage('busy'):
+            deadline = time.perf_counter() + 0.3
+            while time.perf_counter() < deadline:
+                pass
+
+    # Act
+    thread = threading.Thread(target=busy_stage)
+    thread.start()
+    with metrics.stage('idle'):
+        thread.join()
+
+    # Assert
+    stages = {record['stage']: record for record in metrics.stages}
+    assert stages['idle']['wall_seconds'] > 0.2
+    assert stages['idle']['cpu_seconds'] < 0.1
+    assert stages['busy']['cpu_seconds'] > 0.1
+
+def test_instrumented():
+    # Assemble
+    metrics = RunMetrics(pipeline='test_etl', stream=StringIO())
+
+    @metrics.instrumented()
+    def transform(rows):
+        return rows * 2
+
+    # Act
+    result = transform([1, 2])
+
+    # Assert
+    assert result == [1, 2, 1, 2]
+    assert metrics.stages[0]['stage'] == 'transform'
+    assert metrics.stages[0]['rows_out'] == 4
+
+def test_write_prometheus_textfile(setup_metrics, tmp_path):
+    # Assemble
+    metrics, _ = setup_metrics
+    path = tmp_path / 'news_etl.prom'
+
+    # Act
+    metrics.write_prometheus_textfile(str(path))
+
+    # Assert
+    lines = path.read_text().splitlines()
+    assert 'etl_stage_rows_out{pipeline="test_etl",stage="extract",status="success"} 10' in lines
+    assert 'etl_stage_bytes_transferred{pipeline="test_etl",stage="extract",status="success"} 1024' in lines
+    assert 'etl_run_success{pipeline="test_etl"} 0' in lines
+    assert list(tmp_path.iterdir()) == [path]
+
+def test_save(setup_metrics, setup_postgresql_client):
+    # Assemble
+    metrics, _ = setup_metrics
+    postgresql_client = setup_postgresql_client
+
+    # Act
+    metrics.save(postgresql_client)
+    metrics.save(postgresql_client)
+
+    # Assert
+    rows = {row['stage']: row for row in postgresql_client.select_all(table=run_metrics_table(MetaData()))}
+    assert set(rows) == {'extract', 'load'}
+    assert rows['extract']['run_id'] == 'run1'
+    assert rows['extract']['bytes_transferred'] == 1024
+    assert rows['load']['status'] == 'failed'
+    assert rows['load']['rows_in'] == 10
@@ -0,0 +1,96 @@
+from etl_project.assets.landing import LandingZone
+from etl_project.assets.extract_news import normalize_news
+import datetime
+import gzip
+import json
+import pytest
+import boto3
+from moto import mock_s3
+
+
+def make_response(link, next_page=None):
+    return {'status': 'success', 'totalResults': 1, 'nextPage': next_page,
+            'results': [{'title': 'title', 'link': link, 'keywords': None, 'creator': ['author'], 'pubDate': '2023-09-03 01:00:00',
+                         'content': 'sample text', 'category': ['top'], 'country': ['united states of america'],
+                         'language': 'english', 'image_url': 'https://images.com/1.png', 'source_priority': 1}]}
+
+@pytest.fixture
+def s3_client(monkeypatch):
+    monkeypatch.setenv('AWS_ACCESS_KEY_ID', 'testing')
+    monkeypatch.setenv('AWS_SECRET_ACCESS_KEY', 'testing')
+    with mock_s3():
+        s3_client = boto3.client('s3', region_name='us-east-1')
+        s3_client.create_bucket(Bucket='test-bucket')
+        yield s3_client
+
+def test_write_and_replay(tmp_path):
+    # Assemble
+    landing_zone = LandingZone(path=str(tmp_path))
+
+    # Act
+    with landing_zone:
+        landing_zone.write(make_response('link 0', next_page='1'), params={'page': None})
+        landing_zone.write(make_response('link 1'), params={'page': '1'})
+        unclosed_responses = list(landing_zone.replay())
+    responses = list(landing_zone.replay())
+
+    # Assert
+    assert unclosed_responses == []
+    files = landing_zone.landed_files()
+    today = datetime.datetime.now(datetime.timezone.utc).date()
+    assert [path.relative_to(tmp_path).as_posix() for path in files] == [f"date={today.isoformat()}/{landing_zone.run_id}.jsonl.gz"]
+    with gzip.open(files[0], 'rt') as file:
+        assert [json.loads(line)['params'] for line in file] == [{'page': None}, {'page': '1'}]
+    assert [response['nextPage'] for response in responses] == ['1', None]
+    assert 'image_url' not in responses[0]['results'][0]
+    assert normalize_news(responses[0]).equals(normalize_news(make_response('link 0')))
+
+def test_replay_date_range(tmp_path):
+    # Assemble
+    for date in ['2023-09-01', '2023-09-02', '2023-09-03']:
+        directory = tmp_path / f"date={date}"
+        directory.mkdir()
+        with gzip.open(directory / 'run.jsonl.gz', 'wt') as file:
+            file.write(json.dumps({'response': make_response(f'link {date}')}) + '\n')
+    (tmp_path / 'date=2023-09-02' / 'partial.jsonl.gz.tmp').write_bytes(b'')
+
+    # Act
+    responses = list(LandingZone(path=str(tmp_path)).replay(start_date=datetime.date(2023, 9, 2)))
+
+    # Assert
+    assert [response['results'][0]['link'] for response in responses] == ['link 2023-09-02', 'link 2023-09-03']
+
+def test_replay_downloads_from_s3(tmp_path, s3_client):
+    # Assemble
+    landing_zone = LandingZone(path=str(tmp_path / 'writer'), s3_bucket='test-bucket', s3_client=s3_client)
+    with landing_zone:
+        landing_zone.write(make_response('link 0'))
+
+    # Act
+    replay_zone = LandingZone(path=str(tmp_path / 'reader'), s3_bucket='test-bucket', s3_client=s3_client)
+    responses = list(replay_zone.replay())
+
+    # Assert
+    keys = [s3_object['Key'] for s3_object in s3_client.list_objects_v2(Bucket='test-bucket')['Contents']]
+    assert keys == [f"landing/{path.parent.name}/{path.name}" for path in landing_zone.landed_files()]
+    assert [response['results'][0]['link'] for response in responses] == ['link 0']
+    assert len(replay_zone.landed_files()) == 1
+
+def test_delete_older_than(tmp_path):
+    # Assemble
+    for date in ['2023-09-01', '2023-09-02', '2023-09-03']:
+        directory = tmp_path / f"date={date}"
+        directory.mkdir()
+        (directory / 'run.jsonl.gz').write_bytes(b'')
+    (tmp_path / 'other').mkdir()
+    landing_zone = LandingZone(path=str(tmp_path))
+    landing_zone.write(make_response('link 0'))
+
+    # Act
+    deleted = landing_zone.delete_older_than(datetime.date.today() + datetime.timedelta(days=2))
+    landing_zone.close()
+
+    # Assert
+    assert [directory.name for directory in deleted] == ['date=2023-09-01', 'date=2023-09-02', 'date=2023-09-03']
+    assert [path.parent.name for path in landing_zone.landed_files()] == [f"date={datetime.datetime.now(datetime.timezone.utc).date().isoformat()}"]
+    assert (tmp_path / 'other').exists()
@@ -0,0 +1,139 @@
+from etl_project.assets.rate_limiter import TokenBucket, RequestScheduler, RequestBudgetExceeded
+import pytest
+import requests
+
+
+class FakeClock:
+    """Clock whose time only moves when sleep is called."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def clock(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def make_response(status_code, headers=None):
+    response = requests.Response()
+    response.status_code = status_code
+    response.headers.update(headers or {})
+    return response
+
+@pytest.fixture
+def fake_clock():
+    return FakeClock()
+
+def test_token_bucket_waits_for_refill(fake_clock):
+    # Assemble
+    bucket = TokenBucket(rate=2, capacity=2, clock=fake_clock.clock, sleep=fake_clock.sleep)
+
+    # Act
+    waits = [bucket.acquire() for _ in range(4)]
+
+    # Assert
+    assert waits[:2] == [0.0, 0.0]
+    assert waits[2] == pytest.approx(0.5)
+    assert fake_clock.now == pytest.approx(1.0)
+
+def test_scheduler_retries_with_retry_after(fake_clock):
+    # Assemble
+    scheduler = RequestScheduler(requests_per_window=100, window_seconds=1, clock=fake_clock.clock, sleep=fake_clock.sleep)
+    responses = iter([make_response(429, {'Retry-After': '7'}), make_response(503), make_response(200)])
+
+    # Act
+    response = scheduler.send(lambda: next(responses))
+
+    # Assert
+    stats = scheduler.stats()
+    assert response.status_code == 200
+    assert stats['requests_sent'] == 3
+    assert stats['retries'] == 2
+    assert stats['throttled'] == 1
+    assert fake_clock.sleeps[0] == 7.0
+    assert 0 <= fake_clock.sleeps[1] <= 2.0
+    assert stats['backoff_wait_seconds'] == pytest.approx(sum(fake_clock.sleeps))
+
+def test_scheduler_gives_up_after_max_retries(fake_clock):
+    # Assemble
+    scheduler = RequestScheduler(max_retries=2, clock=fake_clock.clock, sleep=fake_clock.sleep)
+
+    # Act
+    response = scheduler.send(lambda: make_response(500))
+
+    # Assert
+    assert response.status_code == 500
+    assert scheduler.stats()['requests_sent'] == 3
+
+def test_scheduler_retries_connection_errors(fake_clock):
+    # Assemble
+    scheduler = RequestScheduler(max_retries=1, clock=fake_clock.clock, sleep=fake_clock.sleep)
+
+    def send_request():
+        raise requests.ConnectionError('connection refused')
+
+    # Act / Assert
+    with pytest.raises(requests.ConnectionError):
+        scheduler.send(send_request)
+    assert scheduler.stats()['retries'] == 1
+
+def test_scheduler_request_budget(fake_clock):
+    # Assemble
+    scheduler = RequestScheduler(request_budget=2, clock=fake_clock.clock, sleep=fake_clock.sleep)
+    scheduler.send(lambda: make_response(200))
+    scheduler.send(lambda: make_response(200))
+
+    # Act / Assert
+    with pytest.raises(RequestBudgetExceeded):
+        scheduler.send(lambda: make_response(200))
+    # every run of a long-running process gets the whole budget
+    scheduler.start_run()
+    scheduler.send(lambda: make_response(200))
+    assert scheduler.stats()['requests_sent'] == 3
+
+def test_scheduler_caps_retry_after(fake_clock):
+    # Assemble
+    scheduler = RequestScheduler(backoff_max=30, clock=fake_clock.clock, sleep=fake_clock.sleep)
+    responses = iter([make_response(429, {'Retry-After': '86400'}), make_response(200)])
+
+    # Act
+    response = scheduler.send(lambda: next(responses))
+
+    # Assert
+    assert response.status_code == 200
+    assert fake_clock.sleeps == [30]
+
+def test_scheduler_waits_for_rate_limit(fake_clock):
+    # Assemble
+    scheduler = RequestScheduler(requests_per_window=2, window_seconds=10, clock=fake_clock.clock, sleep=fake_clock.sleep)
+
+    # Act
+    for _ in range(3):
+        scheduler.send(lambda: make_response(200))
+
+    # Assert
+    assert scheduler.stats()['rate_limit_wait_seconds'] == pytest.approx(5.0)
+
+def test_stalled_server_times_out_and_is_retried(fake_clock):
+    # Assemble
+    import socket
+    from etl_project.assets.extract_news import News
+    # accepts connections but never answers
+    server = socket.socket()
+    server.bind(('127.0.0.1', 0))
+    server.listen(8)
+    scheduler = RequestScheduler(max_retries=1, clock=fake_clock.clock, sleep=fake_clock.sleep)
+    news = News(api_key='test', scheduler=scheduler, timeout=(1, 0.2))
+    news.base_url = f'http://127.0.0.1:{server.getsockname()[1]}/'
+
+    # Act / Assert
+    try:
+        with pytest.raises(requests.Timeout):
+            news.get_news()
+    finally:
+        server.close()
+    assert scheduler.stats()['retries'] == 1
@@ -0,0 +1,74 @@
+from etl_project.assets.readability import merge_readability, article_readability_table
+from etl_project.assets.extract_news import process_articles
+from etl_project.assets.grade_level_summary import summarize_articles
+import numpy as np
+import pandas as pd
+import pytest
+from sqlalchemy import MetaData
+
+
+@pytest.fixture
+def postgresql_tables():
+    return ['test_article_readability']
+
+@pytest.fixture
+def setup():
+    word_by_grade_level_df = pd.DataFrame({'Word': ['sample', 'text', 'words', 'ungraded'], 'Grade_Lv': [2, 6, 10, np.nan]})
+    articles_df = pd.DataFrame({
+        'title': ['Article 1', 'Article 2', 'Article 3', 'Article 4'],
+        'article_link': ['link1', 'link2', 'link3', 'link4'],
+        'category': [['top'], ['top'], ['science', 'top'], ['top']],
+        'article_contents': ['a sample text', 'sample sample words, ungraded', 'nothing to see', None]
+    })
+    return word_by_grade_level_df, articles_df
+
+def test_process_articles_readability(setup):
+    # Assemble
+    word_by_grade_level_df, articles_df = setup
+
+    # Act
+    frequencies_df, readability = process_articles(word_by_grade_level_df, articles_df, sparse=True, readability=True)
+
+    # Assert
+    assert readability['article_link'].tolist() == ['link1', 'link2', 'link3', 'link4']
+    assert readability['token_count'].tolist() == [3, 4, 3, 0]
+    assert readability['vocabulary_hits'].tolist() == [2, 4, 0, 0]
+    assert readability['distinct_vocabulary_hits'].tolist() == [2, 3, 0, 0]
+    assert readability['grade_level_hits'][0] == [0, 1, 0, 0, 0, 1, 0, 0, 0, 0, 0, 0]
+    assert readability['grade_level_hits'][1] == [0, 2, 0, 0, 0, 0, 0, 0, 0, 1, 0, 0]
+    assert sum(readability['grade_level_hits'][2]) == 0
+    # the same average grade level as the summary tables
+    summary = summarize_articles(frequencies_df, articles_df)
+    np.testing.assert_allclose(readability['avg_grade_level'], summary['avg_grade_level'])
+
+def test_dense_and_sparse_readability_match(setup):
+    # Assemble
+    word_by_grade_level_df, articles_df = setup
+
+    # Act
+    _, sparse_readability = process_articles(word_by_grade_level_df, articles_df, sparse=True, readability=True, match_mode='word')
+    _, dense_readability = process_articles(word_by_grade_level_df, articles_df, readability=True, match_mode='word')
+
+    # Assert
+    pd.testing.assert_frame_equal(sparse_readability, dense_readability)
+
+def test_merge_readability(setup_postgresql_client, setup):
+    # Assemble
+    postgresql_client = setup_postgresql_client
+    word_by_grade_level_df, articles_df = setup
+    _, readability = process_articles(word_by_grade_level_df, articles_df, sparse=True, readability=True)
+    updated_articles_df = articles_df.assign(article_contents=['text text text', None, None, None]).head(1)
+    _, updated_readability = process_articles(word_by_grade_level_df, updated_articles_df, sparse=True, readability=True)
+
+    # Act
+    merge_readability(readability, postgresql_client=postgresql_client, table_name='test_article_readability')
+    merge_readability(updated_readability, postgresql_client=postgresql_client, table_name='test_article_readability')
+
+    # Assert
+    table = article_readability_table(MetaData(), name='test_article_readability')
+    rows = {row['article_link']: row for row in postgresql_client.select_all(table=table)}
+    assert len(rows) == 4
+    assert rows['link1']['vocabulary_hits'] == 3
+    assert rows['link1']['grade_level_hits'] == [0, 0, 0, 0, 0, 3, 0, 0, 0, 0, 0, 0]
+    assert rows['link1']['avg_grade_level'] == 6.0
+    assert rows['link3']['avg_grade_level'] is None
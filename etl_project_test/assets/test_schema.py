@@ -0,0 +1,93 @@
+from etl_project.assets.schema import create_schema, ensure_monthly_partitions, delete_news_older_than, prepare_news_df
+from etl_project.assets.extract_news import loaded, process_articles
+from etl_project.assets.grade_level_summary import summarize_articles, merge_grade_level_summaries
+from etl_project.assets.readability import merge_readability
+import datetime
+import pandas as pd
+import pytest
+from sqlalchemy import MetaData
+
+
+TABLES = {'news_table_name': 'test_news_raw_table', 'frequency_table_name': 'test_grade_level_word_frequency'}
+SUMMARY_TABLES = {'article_summary_table_name': 'test_article_grade_level_summary', 'category_summary_table_name': 'test_category_grade_level_summary',
+                  'readability_table_name': 'test_article_readability'}
+
+@pytest.fixture
+def postgresql_tables():
+    return ['test_grade_level_word_frequency', 'test_news_raw_table', *SUMMARY_TABLES.values()]
+
+@pytest.fixture
+def setup_articles():
+    this_month = datetime.datetime.utcnow().replace(day=1, hour=12, minute=0, second=0, microsecond=0)
+    return pd.DataFrame({
+        'title': ['old article', 'new article'],
+        'article_link': ['link1', 'link2'],
+        'keywords': [['House', 'News'], 'single keyword'],
+        'author': [None, ['someone']],
+        'publish_date': ['2020-01-15 03:46:33', this_month.strftime('%Y-%m-%d %H:%M:%S')],
+        'article_contents': ['a sample text', 'sample sample'],
+        'category': [['top'], ['politics']],
+        'country': [['united states of america']] * 2,
+        'language': ['english'] * 2
+    })
+
+def test_prepare_news_df(setup_articles):
+    df = prepare_news_df(setup_articles)
+    assert str(df['publish_date'].dtype) == 'datetime64[ns, UTC]'
+    assert df['keywords'].tolist() == [['House', 'News'], ['single keyword']]
+    assert df['author'].tolist() == [None, ['someone']]
+
+def test_create_schema_and_retention(setup_postgresql_client, setup_articles):
+    # Assemble
+    postgresql_client = setup_postgresql_client
+    metadata = MetaData()
+    tables = create_schema(postgresql_client=postgresql_client, metadata=metadata, **TABLES)
+    frequencies_df, readability = process_articles(pd.DataFrame({'Word': ['sample'], 'Grade_Lv': [5]}), setup_articles, sparse=True, readability=True)
+
+    # Act
+    loaded(df=prepare_news_df(setup_articles), postgresql_client=postgresql_client, table=tables['news'], metadata=metadata, load_method="upsert", bulk=True)
+    loaded(df=frequencies_df, postgresql_client=postgresql_client, table=tables['frequency'], metadata=metadata, load_method="insert", bulk=True)
+    merge_grade_level_summaries(summarize_articles(frequencies_df, setup_articles), postgresql_client, article_table_name='test_article_grade_level_summary',
+                                category_table_name='test_category_grade_level_summary')
+    merge_readability(readability, postgresql_client, table_name='test_article_readability')
+    rows = {row['article_link']: row for row in postgresql_client.select_all(table=tables['news'])}
+    indexes = {row[0] for row in postgresql_client.engine.execute("SELECT indexname FROM pg_indexes WHERE tablename IN ('test_news_raw_table', 'test_grade_level_word_frequency')")}
+    delete_news_older_than(postgresql_client, datetime.datetime(2021, 1, 1), news_table_name='test_news_raw_table',
+                           frequency_table_names=['test_grade_level_word_frequency'], **SUMMARY_TABLES)
+    summary_links = [row[0] for row in postgresql_client.engine.execute("SELECT article_link FROM test_article_grade_level_summary")]
+    readability_links = [row[0] for row in postgresql_client.engine.execute("SELECT article_link FROM test_article_readability")]
+    categories = {row['category']: row for row in postgresql_client.engine.execute("SELECT * FROM test_category_grade_level_summary")}
+
+    # Assert
+    assert rows['link1']['keywords'] == ['House', 'News']
+    assert rows['link1']['publish_date'] == datetime.datetime(2020, 1, 15, 3, 46, 33, tzinfo=datetime.timezone.utc)
+    assert {'ix_test_news_raw_table_title', 'ix_test_news_raw_table_publish_date', 'ix_test_grade_level_word_frequency_article_link'} <= indexes
+    assert [row['article_link'] for row in postgresql_client.select_all(table=tables['news'])] == ['link2']
+    assert [row['article_link'] for row in postgresql_client.select_all(table=tables['frequency'])] == ['link2']
+    # the expired article is subtracted from the rollups, its category has no article left
+    assert summary_links == readability_links == ['link2']
+    assert list(categories) == ['{politics}']
+    assert categories['{politics}']['article_count'] == 1
+    assert categories['{politics}']['frequency_sum'] == 2
+
+def test_partitioned_schema(setup_postgresql_client, setup_articles):
+    # Assemble
+    postgresql_client = setup_postgresql_client
+    metadata = MetaData()
+    tables = create_schema(postgresql_client=postgresql_client, metadata=metadata, partition_by_publish_date=True, **TABLES)
+    ensure_monthly_partitions(postgresql_client, start=datetime.date(2019, 12, 1), months=2, table_name='test_news_raw_table')
+
+    # Act
+    loaded(df=prepare_news_df(setup_articles), postgresql_client=postgresql_client, table=tables['news'], metadata=metadata, load_method="upsert", bulk=True)
+    loaded(df=prepare_news_df(setup_articles), postgresql_client=postgresql_client, table=tables['news'], metadata=metadata, load_method="upsert", bulk=True)
+    partition_of = dict(postgresql_client.engine.execute("SELECT article_link, tableoid::regclass::text FROM test_news_raw_table").all())
+    delete_news_older_than(postgresql_client, datetime.datetime(2020, 2, 1), news_table_name='test_news_raw_table',
+                           frequency_table_names=['test_grade_level_word_frequency'], **SUMMARY_TABLES)
+    remaining_partitions = {row[0] for row in postgresql_client.engine.execute("SELECT relname FROM pg_class WHERE relname LIKE 'test_news_raw_table_%'")}
+
+    # Assert
+    assert partition_of['link1'] == 'test_news_raw_table_2020_01'
+    assert partition_of['link2'] == f"test_news_raw_table_{datetime.datetime.utcnow():%Y_%m}"
+    assert 'test_news_raw_table_2020_01' not in remaining_partitions
+    assert 'test_news_raw_table_default' in remaining_partitions
+    assert [row['article_link'] for row in postgresql_client.select_all(table=tables['news'])] == ['link2']
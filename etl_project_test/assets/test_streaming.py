@@ -0,0 +1,176 @@
+from etl_project.assets.streaming import prefetch, stream_articles, run_streaming
+from etl_project.assets.incremental import ExtractionWatermark
+from etl_project.assets.landing import LandingZone
+import gzip
+import json
+import pandas as pd
+import pytest
+from sqlalchemy import Table, Column, Integer, String, Text, Float, MetaData
+
+
+def make_page(start, count, next_page=None):
+    return {
+        'status': 'success',
+        'results': [{'title': f'title {i}', 'link': f'link {i}', 'keywords': ['news'], 'creator': None,
+                     'pubDate': '2023-09-03 01:00:00', 'content': f'sample text {i}', 'category': ['top'],
+                     'country': ['united states of america'], 'language': 'english'}
+                    for i in range(start, start + count)],
+        'nextPage': next_page
+    }
+
+def test_prefetch_keeps_order():
+    assert list(prefetch(iter(range(10)), max_prefetch=2)) == list(range(10))
+
+def test_prefetch_reraises_errors():
+    def pages():
+        yield 1
+        raise ValueError('request failed')
+
+    with pytest.raises(ValueError):
+        list(prefetch(pages()))
+
+def test_stream_articles_chunks():
+    # Assemble
+    pages = [make_page(0, 3), make_page(3, 0), make_page(3, 4)]
+
+    # Act
+    chunks = list(stream_articles(pages, chunk_size=2))
+
+    # Assert
+    assert [len(chunk) for chunk in chunks] == [2, 2, 2, 1]
+    assert pd.concat(chunks)['article_link'].tolist() == [f'link {i}' for i in range(7)]
+
+def test_run_streaming(setup_postgresql_client):
+    # Assemble
+    postgresql_client = setup_postgresql_client
+    metadata = MetaData()
+    news_table = Table('test_stream_news', metadata,
+                       Column('title', String), Column('article_link', String, primary_key=True), Column('keywords', String),
+                       Column('author', String), Column('publish_date', String), Column('article_contents', Text),
+                       Column('category', String), Column('country', String), Column('language', String))
+    frequency_table = Table('test_stream_frequency', metadata,
+                            Column('title', Text), Column('word', String), Column('frequency', Integer),
+                            Column('grade_level', Float), Column('article_link', String))
+    word_by_grade_level_df = pd.DataFrame({'Word': ['sample', 'text', 'missing'], 'Grade_Lv': [5, 6, 7]})
+    watermark = ExtractionWatermark()
+    watermark.update(pd.DataFrame({'article_link': ['link 0'], 'publish_date': ['2023-09-03 01:00:00']}))
+    postgresql_client.drop_table('test_stream_news')
+    postgresql_client.drop_table('test_stream_frequency')
+
+    # Act
+    counts = run_streaming(pages=iter([make_page(0, 3, '1'), make_page(3, 3)]), word_by_grade_level_df=word_by_grade_level_df,
+                           postgresql_client=postgresql_client, news_table=news_table, frequency_table=frequency_table,
+                           metadata=metadata, chunk_size=2, frequency_load_method="overwrite", watermark=watermark)
+
+    # Assert
+    assert counts == {'chunks': 3, 'articles': 5, 'frequency_rows': 10}
+    assert len(postgresql_client.select_all(table=news_table)) == 5
+    assert len(postgresql_client.select_all(table=frequency_table)) == 10
+    assert len(watermark.seen_links) == 6
+
+    postgresql_client.drop_table('test_stream_news')
+    postgresql_client.drop_table('test_stream_frequency')
+
+def test_run_streaming_stops_at_ingested_articles(setup_postgresql_client):
+    # Assemble
+    postgresql_client = setup_postgresql_client
+    metadata = MetaData()
+    news_table = Table('test_stop_news', metadata,
+                       Column('title', String), Column('article_link', String, primary_key=True), Column('keywords', String),
+                       Column('author', String), Column('publish_date', String), Column('article_contents', Text),
+                       Column('category', String), Column('country', String), Column('language', String))
+    frequency_table = Table('test_stop_frequency', metadata,
+                            Column('title', Text), Column('word', String), Column('frequency', Integer),
+                            Column('grade_level', Float), Column('article_link', String))
+    word_by_grade_level_df = pd.DataFrame({'Word': ['sample', 'text', 'missing'], 'Grade_Lv': [5, 6, 7]})
+    watermark = ExtractionWatermark()
+    watermark.update(pd.DataFrame({'article_link': ['link 2', 'link 3'], 'publish_date': ['2023-09-03 01:00:00'] * 2}))
+    requested = []
+
+    def pages():
+        for page in [make_page(0, 2, '1'), make_page(2, 2, '2'), make_page(4, 2)]:
+            requested.append(page['nextPage'])
+            yield page
+
+    postgresql_client.drop_table('test_stop_news')
+    postgresql_client.drop_table('test_stop_frequency')
+
+    # Act
+    try:
+        counts = run_streaming(pages=pages(), word_by_grade_level_df=word_by_grade_level_df, postgresql_client=postgresql_client,
+                               news_table=news_table, frequency_table=frequency_table, metadata=metadata, chunk_size=2,
+                               watermark=watermark)
+    finally:
+        postgresql_client.drop_table('test_stop_news')
+        postgresql_client.drop_table('test_stop_frequency')
+
+    # Assert
+    # the second page only has ingested articles, the third one is never requested
+    assert requested == ['1', '2']
+    assert counts['articles'] == 2
+    assert watermark.next_page == '1'
+
+def test_run_streaming_replay_is_idempotent(setup_postgresql_client):
+    # Assemble
+    postgresql_client = setup_postgresql_client
+    metadata = MetaData()
+    news_table = Table('test_replay_news', metadata,
+                       Column('title', String), Column('article_link', String, primary_key=True), Column('keywords', String),
+                       Column('author', String), Column('publish_date', String), Column('article_contents', Text),
+                       Column('category', String), Column('country', String), Column('language', String))
+    frequency_table = Table('test_replay_frequency', metadata,
+                            Column('title', Text), Column('word', String), Column('frequency', Integer),
+                            Column('grade_level', Float), Column('article_link', String))
+    word_by_grade_level_df = pd.DataFrame({'Word': ['sample', 'text', 'missing'], 'Grade_Lv': [5, 6, 7]})
+    postgresql_client.drop_table('test_replay_news')
+    postgresql_client.drop_table('test_replay_frequency')
+
+    # Act
+    for _ in range(2):
+        run_streaming(pages=iter([make_page(0, 3, '1'), make_page(3, 2)]), word_by_grade_level_df=word_by_grade_level_df,
+                      postgresql_client=postgresql_client, news_table=news_table, frequency_table=frequency_table,
+                      metadata=metadata, chunk_size=2, replace_frequencies=True)
+
+    # Assert
+    assert len(postgresql_client.select_all(table=news_table)) == 5
+    assert len(postgresql_client.select_all(table=frequency_table)) == 10
+
+    postgresql_client.drop_table('test_replay_news')
+    postgresql_client.drop_table('test_replay_frequency')
+
+@pytest.mark.parametrize('chunk_size', [2, 3])
+def test_run_streaming_replays_overlapping_runs(setup_postgresql_client, tmp_path, chunk_size):
+    # Assemble
+    postgresql_client = setup_postgresql_client
+    metadata = MetaData()
+    news_table = Table('test_overlap_news', metadata,
+                       Column('title', String), Column('article_link', String, primary_key=True), Column('keywords', String),
+                       Column('author', String), Column('publish_date', String), Column('article_contents', Text),
+                       Column('category', String), Column('country', String), Column('language', String))
+    frequency_table = Table('test_overlap_frequency', metadata,
+                            Column('title', Text), Column('word', String), Column('frequency', Integer),
+                            Column('grade_level', Float), Column('article_link', String))
+    word_by_grade_level_df = pd.DataFrame({'Word': ['sample', 'text', 'missing'], 'Grade_Lv': [5, 6, 7]})
+    # two runs landed 'link 2' (and, with chunks of 2, in the same chunk)
+    for date, page in [('2023-09-01', make_page(0, 3)), ('2023-09-02', make_page(2, 3))]:
+        directory = tmp_path / f"date={date}"
+        directory.mkdir()
+        with gzip.open(directory / 'run.jsonl.gz', 'wt') as file:
+            file.write(json.dumps({'response': page}) + '\n')
+    postgresql_client.drop_table('test_overlap_news')
+    postgresql_client.drop_table('test_overlap_frequency')
+
+    # Act
+    try:
+        counts = run_streaming(pages=LandingZone(path=str(tmp_path)).replay(), word_by_grade_level_df=word_by_grade_level_df,
+                               postgresql_client=postgresql_client, news_table=news_table, frequency_table=frequency_table,
+                               metadata=metadata, chunk_size=chunk_size, replace_frequencies=True)
+        frequencies = postgresql_client.select_all(table=frequency_table)
+    finally:
+        postgresql_client.drop_table('test_overlap_news')
+        postgresql_client.drop_table('test_overlap_frequency')
+
+    # Assert
+    assert counts['articles'] == 5
+    assert len(frequencies) == 10
+    assert sum(row['article_link'] == 'link 2' for row in frequencies) == 2
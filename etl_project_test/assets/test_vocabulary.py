@@ -0,0 +1,94 @@
+from etl_project.assets.vocabulary import VocabularyProvider, BUNDLED_VOCABULARY_PATH
+from etl_project.assets.vocabulary_matcher import VocabularyMatcher
+import pandas as pd
+import pytest
+import boto3
+from botocore.config import Config
+from moto import mock_s3
+
+
+@pytest.fixture
+def s3_client(monkeypatch):
+    monkeypatch.setenv('AWS_ACCESS_KEY_ID', 'testing')
+    monkeypatch.setenv('AWS_SECRET_ACCESS_KEY', 'testing')
+    with mock_s3():
+        s3_client = boto3.client('s3', region_name='us-east-1')
+        s3_client.create_bucket(Bucket='test-bucket')
+        s3_client.put_object(Bucket='test-bucket', Key='vocabulary.csv', Body=b'Word,Grade_Lv\nsample,5\ntext,6\n')
+        yield s3_client
+
+def test_load_bundled_vocabulary(tmp_path):
+    # Assemble
+    provider = VocabularyProvider(cache_path=str(tmp_path / 'vocabulary.pickle'))
+
+    # Act
+    df, matcher = provider.load()
+    cached_df, cached_matcher = VocabularyProvider(cache_path=str(tmp_path / 'vocabulary.pickle')).load()
+
+    # Assert
+    assert list(df.columns) == ['Word', 'Grade_Lv']
+    assert len(df) == len(pd.read_csv(BUNDLED_VOCABULARY_PATH))
+    assert isinstance(matcher, VocabularyMatcher)
+    assert cached_matcher.version == matcher.version
+    assert provider.source == str(BUNDLED_VOCABULARY_PATH)
+
+def test_local_change_invalidates_cache(tmp_path):
+    # Assemble
+    local_path = tmp_path / 'vocabulary.csv'
+    local_path.write_text('Word,Grade_Lv\nsample,5\n')
+    VocabularyProvider(local_path=str(local_path), cache_path=str(tmp_path / 'vocabulary.pickle')).load()
+    local_path.write_text('Word,Grade_Lv\nsample,5\ntext,6\n')
+
+    # Act
+    df, matcher = VocabularyProvider(local_path=str(local_path), cache_path=str(tmp_path / 'vocabulary.pickle')).load()
+
+    # Assert
+    assert df['Word'].tolist() == ['sample', 'text']
+    assert matcher.words == ['sample', 'text']
+
+def test_revalidate_against_s3(tmp_path, s3_client):
+    # Assemble
+    cache_path = str(tmp_path / 'vocabulary.pickle')
+    calls = []
+    s3_client.meta.events.register('before-call.s3.GetObject', lambda params, **kwargs: calls.append(dict(params)))
+
+    # Act
+    df, _ = VocabularyProvider(s3_bucket='test-bucket', key='vocabulary.csv', cache_path=cache_path, s3_client=s3_client).load()
+    unchanged_df, _ = VocabularyProvider(s3_bucket='test-bucket', key='vocabulary.csv', cache_path=cache_path, s3_client=s3_client).load()
+    s3_client.put_object(Bucket='test-bucket', Key='vocabulary.csv', Body=b'Word,Grade_Lv\nsample,5\ntext,6\nwords,7\n')
+    changed_df, changed_matcher = VocabularyProvider(s3_bucket='test-bucket', key='vocabulary.csv', cache_path=cache_path, s3_client=s3_client).load()
+
+    # Assert
+    assert df['Word'].tolist() == ['sample', 'text']
+    assert unchanged_df['Word'].tolist() == ['sample', 'text']
+    assert 'If-None-Match' not in calls[0]['headers'] and 'If-None-Match' in calls[1]['headers']
+    assert changed_df['Word'].tolist() == ['sample', 'text', 'words']
+    assert len(changed_matcher) == 3
+
+def test_offline_falls_back_to_local_copy(tmp_path):
+    # Assemble
+    s3_client = boto3.client('s3', region_name='us-east-1', endpoint_url='http://127.0.0.1:1',
+                             aws_access_key_id='testing', aws_secret_access_key='testing',
+                             config=Config(retries={'max_attempts': 0}, connect_timeout=1))
+    provider = VocabularyProvider(s3_bucket='test-bucket', key='vocabulary.csv', cache_path=str(tmp_path / 'vocabulary.pickle'), s3_client=s3_client)
+
+    # Act
+    df, matcher = provider.load()
+
+    # Assert
+    assert len(df) == len(pd.read_csv(BUNDLED_VOCABULARY_PATH))
+    assert provider.source == str(BUNDLED_VOCABULARY_PATH)
+
+def test_match_mode_recompiles_cached_matcher(tmp_path):
+    # Assemble
+    cache_path = str(tmp_path / 'vocabulary.pickle')
+    _, substring_matcher = VocabularyProvider(cache_path=cache_path).load()
+
+    # Act
+    _, word_matcher = VocabularyProvider(cache_path=cache_path, match_mode='word').load()
+    _, cached_matcher = VocabularyProvider(cache_path=cache_path, match_mode='word').load()
+
+    # Assert
+    assert substring_matcher.mode == 'substring'
+    assert word_matcher.mode == cached_matcher.mode == 'word'
+    assert word_matcher.version == cached_matcher.version != substring_matcher.version
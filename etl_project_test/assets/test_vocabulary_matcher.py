@@ -0,0 +1,219 @@
+from etl_project.assets.vocabulary_matcher import VocabularyMatcher, WORD_REGEX, _inflected_forms
+from etl_project.assets.extract_news import calculate_word_frequency, process_articles
+from etl_project.assets.frequency_cache import WordFrequencyCache
+import pandas as pd
+import numpy as np
+import pytest
+
+
+@pytest.fixture
+def setup():
+    words = ['sample', 'text', 'aa', 'non-living', 'worried\xa0', 'Surprise', 'sample']
+    articles = [
+        'This is a sample text. Sample text contains sample words.',
+        'aaaaa and non-living things, SURPRISED and surprises',
+        'I was worried\xa0about it, not worried about it',
+        '',
+        None
+    ]
+    return words, articles
+
+def test_count_matches_calculate_word_frequency(setup):
+    # Assemble
+    words, articles = setup
+    matcher = VocabularyMatcher(words=words)
+
+    # Act
+    result = matcher.count(articles[1])
+
+    # Assert
+    expected = [calculate_word_frequency(articles[1], word) for word in words]
+    assert result.tolist() == expected
+
+def test_count_matrix_shape_and_values(setup):
+    # Assemble
+    words, articles = setup
+    matcher = VocabularyMatcher(words=words)
+
+    # Act
+    matrix = matcher.count_matrix(articles)
+
+    # Assert
+    assert matrix.shape == (len(articles), len(words))
+    assert matrix.dtype == np.int64
+    for row, article in zip(matrix, articles[:4]):
+        assert row.tolist() == [calculate_word_frequency(article, word) for word in words]
+    assert matrix[4].sum() == 0
+
+def test_count_is_stable_across_repeated_articles(setup):
+    # Assemble
+    words, articles = setup
+    matcher = VocabularyMatcher(words=words, max_cached_tokens=2)
+
+    # Act
+    first = matcher.count(articles[0])
+    second = matcher.count(articles[0])
+
+    # Assert
+    assert first.tolist() == second.tolist() == [3, 2, 0, 0, 0, 0, 3]
+
+def test_process_articles_long_format(setup):
+    # Assemble
+    word_by_grade_level_df = pd.DataFrame({'Word': ['sample', 'text'], 'Grade_Lv': [5, 6]})
+    newspaper_articles_df = pd.DataFrame({
+        'title': ['Article 1', 'Article 2'],
+        'article_contents': ['This is a sample text.', 'Another sample sample.'],
+        'article_link': ['link1', 'link2']
+    })
+
+    # Act
+    results_df = process_articles(word_by_grade_level_df, newspaper_articles_df)
+
+    # Assert
+    assert list(results_df.columns) == ['title', 'word', 'frequency', 'grade_level', 'article_link']
+    assert results_df['title'].tolist() == ['Article 1', 'Article 1', 'Article 2', 'Article 2']
+    assert results_df['word'].tolist() == ['sample', 'text', 'sample', 'text']
+    assert results_df['frequency'].tolist() == [1, 1, 2, 0]
+    assert results_df['grade_level'].tolist() == [5.0, 6.0, 5.0, 6.0]
+    assert results_df['article_link'].tolist() == ['link1', 'link1', 'link2', 'link2']
+
+def test_count_sparse_matches_dense(setup):
+    # Assemble
+    words, articles = setup
+    matcher = VocabularyMatcher(words=words)
+
+    # Act
+    article_index, word_index, counts = matcher.count_sparse(articles)
+
+    # Assert
+    dense = matcher.count_matrix(articles)
+    assert counts.dtype == np.int32
+    assert (counts > 0).all()
+    assert list(zip(*np.nonzero(dense))) == list(zip(article_index, word_index))
+    assert dense[article_index, word_index].tolist() == counts.tolist()
+
+def test_process_articles_sparse(setup):
+    # Assemble
+    word_by_grade_level_df = pd.DataFrame({'Word': ['sample', 'text'], 'Grade_Lv': [5, 6]})
+    newspaper_articles_df = pd.DataFrame({
+        'title': ['Article 1', 'Article 2'],
+        'article_contents': ['This is a sample text.', 'Another sample sample.'],
+        'article_link': ['link1', 'link2']
+    })
+
+    # Act
+    results_df = process_articles(word_by_grade_level_df, newspaper_articles_df, sparse=True)
+
+    # Assert
+    assert results_df['title'].tolist() == ['Article 1', 'Article 1', 'Article 2']
+    assert results_df['word'].tolist() == ['sample', 'text', 'sample']
+    assert results_df['frequency'].tolist() == [1, 1, 2]
+    assert results_df['grade_level'].tolist() == [5.0, 6.0, 5.0]
+    assert results_df['word'].dtype == 'category'
+    assert results_df['frequency'].dtype == np.int32
+    assert results_df['grade_level'].dtype == np.float32
+
+def test_process_pool_matches_single_process(setup, tmp_path):
+    # Assemble
+    words, articles = setup
+    matcher = VocabularyMatcher(words=words)
+    many_articles = [f'{article} {index}' if article else article for index in range(100) for article in articles]
+    cache = WordFrequencyCache(path=str(tmp_path / 'cache.sqlite'))
+
+    # Act
+    with matcher.process_pool(max_workers=2) as executor:
+        sparse = matcher.count_sparse(many_articles, executor=executor)
+        dense = matcher.count_matrix(many_articles, cache=cache, executor=executor)
+        with pytest.raises(Exception, match="another vocabulary matcher"):
+            VocabularyMatcher(words=['sample']).count_matrix(many_articles, executor=executor)
+
+    # Assert
+    expected_sparse = matcher.count_sparse(many_articles)
+    assert all((result == expected).all() for result, expected in zip(sparse, expected_sparse))
+    assert (dense == matcher.count_matrix(many_articles)).all()
+    assert cache.stats()['entries'] == len({article or '' for article in many_articles})
+
+def test_word_mode_counts_whole_words(setup):
+    # Assemble
+    words, articles = setup
+    matcher = VocabularyMatcher(words=words, mode='word')
+
+    # Act
+    matrix = matcher.count_matrix(articles)
+
+    # Assert
+    assert matrix[0].tolist() == [3, 2, 0, 0, 0, 0, 3]
+    # 'aa' inside 'aaaaa' and 'surprise' inside 'surprised' are not words of the article
+    assert matrix[1].tolist() == [0, 0, 0, 1, 0, 0, 0]
+    assert matrix[2].tolist() == [0, 0, 0, 0, 2, 0, 0]
+    assert matrix[3:].sum() == 0
+    assert matcher.version != VocabularyMatcher(words=words).version
+
+def test_stem_mode_counts_inflections(setup):
+    # Assemble
+    words, articles = setup
+    matcher = VocabularyMatcher(words=['surprise', 'study', 'stop', 'nation', 'studies'], mode='stem')
+
+    # Act
+    counts = matcher.count("Surprised by surprises, she studied. The nation's studies stopped, stops and startled")
+
+    # Assert
+    # 'studies' is a vocabulary word of its own, it is not counted for 'study'
+    assert counts.tolist() == [2, 1, 2, 1, 1]
+    assert VocabularyMatcher(words=words, mode='stem').count(articles[1]).tolist() == [0, 0, 0, 1, 0, 2, 0]
+
+def test_stem_mode_inflections_do_not_collide():
+    # Assemble
+    matcher = VocabularyMatcher(words=['hop', 'hope', 'plan', 'plane', 'visit', 'do', 'doe'], mode='stem')
+
+    # Act
+    counts = matcher.count("He hoped, hoping she hopped. Hopping planes planed, we planned the planning. "
+                           "Visited, visitted. She does it")
+
+    # Assert
+    # a one-syllable word only doubles, 'does' is an inflection of both 'do' and 'doe'
+    assert counts.tolist() == [2, 2, 2, 2, 2, 0, 0]
+    assert 'hoped' not in _inflected_forms('hop') and 'planed' not in _inflected_forms('plan')
+    assert {'quitted', 'quitting'} <= _inflected_forms('quit')
+
+def test_unknown_match_mode(setup):
+    # Assemble
+    words, _ = setup
+
+    # Act / Assert
+    with pytest.raises(Exception):
+        VocabularyMatcher(words=words, mode='lemma')
+
+def test_process_articles_match_mode(setup):
+    # Assemble
+    _, articles = setup
+    vocabulary = pd.DataFrame({'Word': ['aa', 'surprise'], 'Grade_Lv': [1, 5]})
+    articles_df = pd.DataFrame({'title': ['b'], 'article_contents': [articles[1]], 'article_link': ['link-b']})
+
+    # Act
+    substring_df = process_articles(vocabulary, articles_df, sparse=True)
+    stem_df = process_articles(vocabulary, articles_df, sparse=True, match_mode='stem')
+
+    # Assert
+    assert dict(zip(substring_df['word'].astype(str), substring_df['frequency'])) == {'aa': 2, 'surprise': 2}
+    assert dict(zip(stem_df['word'].astype(str), stem_df['frequency'])) == {'surprise': 2}
+
+@pytest.mark.parametrize('mode', ['substring', 'word', 'stem'])
+def test_token_counts(setup, tmp_path, mode):
+    # Assemble
+    words, articles = setup
+    matcher = VocabularyMatcher(words=words, mode=mode)
+    many_articles = [f'{article} 2023_{index} café' if article else article for index in range(100) for article in articles]
+    cache = WordFrequencyCache(path=str(tmp_path / 'cache.sqlite'))
+
+    # Act
+    *_, token_counts = matcher.count_sparse(many_articles, token_counts=True)
+    _, cached_token_counts = matcher.count_matrix(many_articles, cache=cache, token_counts=True)
+    _, cache_hit_token_counts = matcher.count_matrix(many_articles, cache=cache, token_counts=True)
+    with matcher.process_pool(max_workers=2) as executor:
+        *_, pool_token_counts = matcher.count_sparse(many_articles, executor=executor, token_counts=True)
+
+    # Assert
+    expected = [len(WORD_REGEX.findall(article.lower())) if article else 0 for article in many_articles]
+    assert token_counts.tolist() == cached_token_counts.tolist() == cache_hit_token_counts.tolist() == pool_token_counts.tolist() == expected
+    assert cache.stats()['hits'] == len(many_articles)
@@ -0,0 +1,35 @@
+from etl_project_benchmark.synthetic import synthetic_payload
+from etl_project_benchmark.run_benchmarks import run_benchmarks, compare
+from etl_project.assets.extract_news import json_news_to_df, rename_and_select_columns_news
+import pytest
+
+
+def test_synthetic_payload():
+    # Act
+    payload = synthetic_payload(n_articles=20, words_per_article=50, vocabulary=['sample', 'text'], seed=1)
+    df = rename_and_select_columns_news(json_news_to_df(payload))
+
+    # Assert
+    assert payload == synthetic_payload(n_articles=20, words_per_article=50, vocabulary=['sample', 'text'], seed=1)
+    assert payload['totalResults'] == len(df) == 20
+    assert df['publish_date'].is_monotonic_decreasing
+    assert df['article_link'].is_unique
+    assert all(len(contents.split()) == 50 for contents in df['article_contents'])
+
+def test_run_benchmarks_and_compare():
+    # Act
+    results = run_benchmarks(articles=10, words_per_article=20, repeats=2)
+    slower = {**results, 'results': {name: {**result, 'p50_seconds': result['p50_seconds'] * 2}
+                                     for name, result in results['results'].items()}}
+
+    # Assert
+    assert set(results['results']) >= {'json_news_to_df', 'rename_and_select_columns_news', 'process_articles'}
+    assert all(result['p50_seconds'] <= result['p95_seconds'] <= result['max_seconds'] for result in results['results'].values())
+    assert compare(results, results) == []
+    assert len(compare(slower, results, min_seconds=0)) == len(results['results'])
+    # doubling a sub-millisecond benchmark is within the absolute tolerance
+    assert not any(message.startswith('json_news_to_df:') for message in compare(slower, results))
+    without_baseline = {**results, 'results': {name: result for name, result in results['results'].items() if name != 'normalize_news'}}
+    assert compare(results, without_baseline) == ['normalize_news: no baseline']
+    with pytest.raises(Exception):
+        compare(results, {**results, 'config': {**results['config'], 'articles': 1}})
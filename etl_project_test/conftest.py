@@ -0,0 +1,83 @@
+from etl_project.connectors.postgresql import PostgreSqlClient
+import pytest
+from dotenv import load_dotenv
+import os
+
+
+@pytest.fixture
+def postgresql_tables() -> list:
+    """Tables dropped before and after a test by setup_postgresql_client, override it in a test module or parametrize it."""
+    return []
+
+@pytest.fixture
+def setup_postgresql_client(postgresql_tables):
+    """Client of the PostgreSQL database configured by the environment (.env)."""
+    load_dotenv()
+    postgresql_client = PostgreSqlClient(
+        server_name=os.environ.get("SERVER_NAME"),
+        database_name=os.environ.get("DATABASE_NAME"),
+        username=os.environ.get("DB_USERNAME"),
+        password=os.environ.get("DB_PASSWORD"),
+        port=os.environ.get("PORT")
+    )
+    for table in postgresql_tables:
+        postgresql_client.drop_table(table)
+    yield postgresql_client
+    for table in postgresql_tables:
+        postgresql_client.drop_table(table)
+
+@pytest.fixture
+def stub_news_pages() -> int:
+    """Number of pages of every query of stub_news_server."""
+    return 2
+
+@pytest.fixture
+def stub_news_shared_article() -> bool:
+    """Whether every page of stub_news_server also returns the same syndicated article, https://wire.com/shared."""
+    return False
+
+@pytest.fixture
+def stub_news_server(stub_news_pages, stub_news_shared_article):
+    """
+    Local NewsData.io stand-in: stub_news_pages pages of 2 articles per domain of domainurl (of <category>.com with a
+    category), chained with a nextPage cursor. 'down.com' answers 500, 'flaky.com' on its second page.
+
+    Returns:
+        (base_url, requests_seen): the url to set as News.base_url and the parameters of every request received
+    """
+    import threading
+    import json
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    from urllib.parse import urlparse, parse_qs
+
+    requests_seen = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            params = {key: values[0] for key, values in parse_qs(urlparse(self.path).query).items()}
+            requests_seen.append(params)
+            domains = [f"{params['category']}.com"] if 'category' in params else params.get('domainurl', 'top.com').split(',')
+            page = int(params.get('page', 0))
+            results = [{'title': f'{domain} {page}-{i}', 'link': f'https://{domain}/{page}/{i}', 'keywords': None,
+                        'creator': None, 'pubDate': f'2023-09-03 0{3 - page}:0{i}:00', 'content': 'a surprise suggestion',
+                        'category': [params.get('category', 'top')], 'country': ['united states of america'], 'language': 'english'}
+                       for domain in domains for i in range(2)]
+            if stub_news_shared_article:
+                results.append({**results[0], 'link': 'https://wire.com/shared'})
+            body = {'status': 'success', 'totalResults': len(results) * stub_news_pages, 'results': results,
+                    'nextPage': str(page + 1) if page < stub_news_pages - 1 else None}
+            payload = json.dumps(body).encode()
+            self.send_response(500 if 'down.com' in domains or ('flaky.com' in domains and page > 0) else 200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_address[1]}/', requests_seen
+    server.shutdown()
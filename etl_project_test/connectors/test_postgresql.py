@@ -155,3 +155,253 @@ def test_postgresqlclient_overwrite(setup_postgresql_client, setup_table):
 
     # Drop the table
     postgresql_client.drop_table(table_name)
+
+
+@pytest.fixture
+def setup_df():
+    import pandas as pd
+    df = pd.DataFrame([
+        {   "id":1,
+            "title": "McCarthy travels to Maui after deadly wildfires: 'Sheer devastation",
+            "article_link": "https://thehill.com/homenews/house/4184849-mccarthy-travels-to-maui-after-deadly-wildfires/",
+            "keywords": ["House", "News"],
+            "author": None,
+            "publish_date": "2023-09-03 03:46:33",
+            "article_contents": 'article "contents", with quotes\nand new lines',
+            "category": "",
+            "country": "country",
+            "language": "english"
+        },
+        {   "id":2,
+            "title": "title",
+            "article_link": "link",
+            "keywords": None,
+            "author": "author",
+            "publish_date": "2023-09-04 03:46:33",
+            "article_contents": "article_contents",
+            "category": "category",
+            "country": "country",
+            "language": "english"
+        }
+    ])
+    return df
+
+def test_postgresqlclient_bulk_insert(setup_postgresql_client, setup_table, setup_df):
+    postgresql_client = setup_postgresql_client
+    table, metadata, table_name = setup_table
+    postgresql_client.drop_table(table_name)
+
+    # Insert data with COPY
+    postgresql_client.bulk_insert(df=setup_df, table=table, metadata=metadata)
+
+    # Retrieve data and perform assertions
+    result = sorted(postgresql_client.select_all(table=table), key=lambda row: row["id"])
+    assert len(result) == 2
+    assert result[0]["keywords"] == "{House,News}"
+    assert result[0]["author"] is None
+    assert result[0]["category"] == ""
+    assert result[0]["article_contents"] == 'article "contents", with quotes\nand new lines'
+
+    # Drop the table
+    postgresql_client.drop_table(table_name)
+
+def test_postgresqlclient_bulk_upsert(setup_postgresql_client, setup_table, setup_df):
+    postgresql_client = setup_postgresql_client
+    table, metadata, table_name = setup_table
+    postgresql_client.drop_table(table_name)
+    postgresql_client.bulk_insert(df=setup_df.iloc[:1], table=table, metadata=metadata)
+
+    # Perform the upsert operation with a changed and a new row
+    changed_df = setup_df.assign(title=["new title", "title"])
+    postgresql_client.bulk_upsert(df=changed_df, table=table, metadata=metadata)
+
+    # Retrieve data and perform assertions
+    result = sorted(postgresql_client.select_all(table=table), key=lambda row: row["id"])
+    assert [row["title"] for row in result] == ["new title", "title"]
+
+    # Drop the table
+    postgresql_client.drop_table(table_name)
+
+def test_postgresqlclient_bulk_overwrite(setup_postgresql_client, setup_table, setup_df):
+    postgresql_client = setup_postgresql_client
+    table, metadata, table_name = setup_table
+    postgresql_client.drop_table(table_name)
+    postgresql_client.bulk_insert(df=setup_df, table=table, metadata=metadata)
+
+    # Perform the overwrite operation
+    postgresql_client.bulk_overwrite(df=setup_df.iloc[1:], table=table, metadata=metadata)
+
+    # Retrieve data and perform assertions
+    result = postgresql_client.select_all(table=table)
+    assert len(result) == 1
+
+    # Drop the table
+    postgresql_client.drop_table(table_name)
+
+def test_postgresqlclient_insert_more_rows_than_bind_parameters(setup_postgresql_client, setup_table):
+    postgresql_client = setup_postgresql_client
+    table, metadata, table_name = setup_table
+    postgresql_client.drop_table(table_name)
+
+    # 5000 rows x 10 columns is more than the 32767 bind parameters pg8000 can send in one statement
+    data = [{"id": i, "title": f"title {i}", "article_link": f"link {i}", "keywords": "House,News", "author": "author",
+             "publish_date": "2023-09-03 03:46:33", "article_contents": "article_contents", "category": "category",
+             "country": "country", "language": "english"} for i in range(5000)]
+
+    # Insert, then upsert in small batches
+    postgresql_client.insert(data=data, table=table, metadata=metadata)
+    postgresql_client.upsert(data=data, table=table, metadata=metadata, batch_size=700)
+    postgresql_client.upsert(data=data[:10], table=table, metadata=metadata, max_batch_bytes=300)
+
+    # Retrieve data and perform assertions
+    result = postgresql_client.select_all(table=table)
+    assert len(result) == 5000
+
+    # Drop the table
+    postgresql_client.drop_table(table_name)
+
+def test_postgresqlclient_batches(setup_postgresql_client, setup_table):
+    postgresql_client = setup_postgresql_client
+    table, metadata, table_name = setup_table
+    data = [{"id": i, "title": "x" * 10} for i in range(10)]
+
+    # Act
+    by_rows = list(postgresql_client._batches(data=data, table=table, batch_size=4))
+    by_bytes = list(postgresql_client._batches(data=data, table=table, max_batch_bytes=25))
+
+    # Assert
+    assert [len(batch) for batch in by_rows] == [4, 4, 2]
+    assert [len(batch) for batch in by_bytes] == [2, 2, 2, 2, 2]
+
+def test_postgresqlclient_overwrite_is_atomic(setup_postgresql_client, setup_table, setup_df):
+    postgresql_client = setup_postgresql_client
+    table, metadata, table_name = setup_table
+    postgresql_client.drop_table(table_name)
+    postgresql_client.bulk_insert(df=setup_df, table=table, metadata=metadata)
+    postgresql_client.engine.execute(f"CREATE INDEX ix_{table_name}_title ON {table_name} (title)")
+    rows_seen_during_load = []
+
+    def load(connection, target):
+        # another connection still reads the old rows, without waiting for the load
+        with postgresql_client.engine.connect() as reader:
+            reader.execute("SET lock_timeout = '2s'")
+            rows_seen_during_load.append(reader.execute(f"SELECT count(*) FROM {table_name}").scalar())
+        postgresql_client.copy_from_df(connection.connection.cursor(), setup_df.iloc[1:], target.name, ["id", "title"])
+
+    # Overwrite, then overwrite with duplicated primary keys
+    postgresql_client._overwrite(table=table, metadata=metadata, load=load)
+    with pytest.raises(Exception):
+        postgresql_client.bulk_overwrite(df=setup_df.assign(id=[3, 3]), table=table, metadata=metadata)
+
+    # Retrieve data and perform assertions
+    indexes = {row[0] for row in postgresql_client.engine.execute(f"SELECT indexname FROM pg_indexes WHERE tablename = '{table_name}'")}
+    assert rows_seen_during_load == [2]
+    assert [row["id"] for row in postgresql_client.select_all(table=table)] == [2]
+    assert indexes == {f"{table_name}_pkey", f"ix_{table_name}_title"}
+
+    # Drop the table
+    postgresql_client.drop_table(table_name)
+
+def test_postgresqlclient_overwrite_referenced_tables(setup_postgresql_client):
+    import pandas as pd
+    from etl_project.assets.schema import create_schema
+    postgresql_client = setup_postgresql_client
+    postgresql_client.drop_table("grade_level_word_frequency")
+    postgresql_client.drop_table("news_raw_table")
+    metadata = MetaData()
+    tables = create_schema(postgresql_client=postgresql_client, metadata=metadata)
+    news_df = pd.DataFrame({"article_link": ["link1", "link2"], "title": ["title 1", "title 2"]})
+    frequency_df = pd.DataFrame({"article_link": ["link1", "link2"], "word": ["word", "word"], "frequency": [1, 2]})
+    postgresql_client.bulk_insert(df=news_df, table=tables["news"], metadata=metadata)
+    postgresql_client.bulk_insert(df=frequency_df, table=tables["frequency"], metadata=metadata)
+
+    # Swap the frequency table, then overwrite the news table it references
+    postgresql_client.bulk_overwrite(df=frequency_df.assign(frequency=[3, 4]), table=tables["frequency"], metadata=metadata)
+    frequencies = [row["frequency"] for row in postgresql_client.select_all(table=tables["frequency"])]
+    postgresql_client.bulk_overwrite(df=news_df.iloc[1:], table=tables["news"], metadata=metadata)
+
+    # Retrieve data and perform assertions
+    foreign_keys = postgresql_client.engine.execute(
+        "SELECT count(*) FROM pg_constraint WHERE conrelid = 'grade_level_word_frequency'::regclass AND contype = 'f'").scalar()
+    indexes = {row[0] for row in postgresql_client.engine.execute("SELECT indexname FROM pg_indexes WHERE tablename = 'grade_level_word_frequency'")}
+    assert foreign_keys == 1
+    assert indexes == {"ix_grade_level_word_frequency_article_link", "ix_grade_level_word_frequency_title"}
+    assert frequencies == [3, 4]
+    # the news table is emptied with DELETE, which cascades to the frequencies
+    assert [row["article_link"] for row in postgresql_client.select_all(table=tables["news"])] == ["link2"]
+    assert postgresql_client.select_all(table=tables["frequency"]) == []
+
+    # Drop the tables
+    postgresql_client.drop_table("grade_level_word_frequency")
+    postgresql_client.drop_table("news_raw_table")
+
+def test_postgresqlclient_transaction(setup_postgresql_client, setup_table, setup_df):
+    postgresql_client = setup_postgresql_client
+    table, metadata, table_name = setup_table
+    postgresql_client.drop_table(table_name)
+    postgresql_client.create_table(metadata)
+
+    # Commit two loads at once, then roll back a block that fails halfway
+    with postgresql_client.transaction() as connection:
+        postgresql_client.bulk_insert(df=setup_df.iloc[:1], table=table, metadata=metadata)
+        postgresql_client.bulk_upsert(df=setup_df, table=table, metadata=metadata)
+        postgresql_client.bulk_upsert(df=setup_df, table=table, metadata=metadata)
+        backend_pids = {connection.execute("SELECT pg_backend_pid()").scalar()}
+        with postgresql_client.transaction() as nested_connection:
+            backend_pids.add(nested_connection.execute("SELECT pg_backend_pid()").scalar())
+    with pytest.raises(Exception):
+        with postgresql_client.transaction():
+            postgresql_client.drop_table(table_name)
+            raise Exception("failed load")
+
+    # Retrieve data and perform assertions
+    assert len(backend_pids) == 1
+    assert len(postgresql_client.select_all(table=table)) == 2
+
+    # Drop the table
+    postgresql_client.drop_table(table_name)
+
+def test_postgresqlclient_statement_timeout():
+    postgresql_client = PostgreSqlClient(
+        server_name=os.environ.get("SERVER_NAME"),
+        database_name=os.environ.get("DATABASE_NAME"),
+        username=os.environ.get("DB_USERNAME"),
+        password=os.environ.get("DB_PASSWORD"),
+        port=os.environ.get("PORT"),
+        pool_size=1,
+        statement_timeout_ms=100
+    )
+
+    with postgresql_client.transaction() as connection:
+        timeout = connection.execute("SHOW statement_timeout").scalar()
+    with pytest.raises(Exception, match="statement timeout"):
+        with postgresql_client.transaction() as connection:
+            connection.execute("SELECT pg_sleep(1)")
+
+    assert timeout == "100ms"
+    assert postgresql_client.engine.pool.size() == 1
+
+def test_postgresqlclient_advisory_lock(setup_postgresql_client):
+    # Assemble
+    postgresql_client = setup_postgresql_client
+    other_client = PostgreSqlClient(
+        server_name=os.environ.get("SERVER_NAME"),
+        database_name=os.environ.get("DATABASE_NAME"),
+        username=os.environ.get("DB_USERNAME"),
+        password=os.environ.get("DB_PASSWORD"),
+        port=os.environ.get("PORT")
+    )
+
+    # Act
+    with postgresql_client.advisory_lock('test_lock') as acquired:
+        with other_client.advisory_lock('test_lock') as acquired_elsewhere, other_client.advisory_lock('test_other_lock') as other_acquired:
+            pass
+        with postgresql_client.transaction() as connection:
+            open_transactions = connection.execute("SELECT count(*) FROM pg_stat_activity WHERE state = 'idle in transaction'").scalar()
+    with other_client.advisory_lock('test_lock') as acquired_after_release:
+        pass
+
+    # Assert
+    assert acquired and other_acquired and acquired_after_release
+    assert not acquired_elsewhere
+    assert open_transactions == 0
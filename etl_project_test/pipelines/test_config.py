@@ -0,0 +1,65 @@
+from etl_project.pipelines.config import load_config, CONFIG_PATH
+import pytest
+
+
+def test_load_config(tmp_path):
+    # Assemble
+    config_path = tmp_path / 'pipeline.yaml'
+    config_path.write_text(
+        "name: news_etl\n"
+        "config:\n"
+        "  vocabulary_s3_bucket: bucket\n"
+        "  vocabulary_s3_key: vocabulary.csv\n"
+        "  max_workers: 2\n"
+        "  summary_tables:\n"
+        "    readability: business_readability\n"
+        "schedule:\n"
+        "  run_seconds: 1800\n"
+        "jobs:\n"
+        "  - name: news\n"
+        "    params:\n"
+        "      country: us\n"
+        "  - name: business\n"
+        "    run_seconds: 3600\n"
+        "    max_pages: 2\n"
+        "    params:\n"
+        "      category: business\n"
+        "    tables:\n"
+        "      news: business_news\n"
+        "      frequency: business_frequency\n"
+    )
+
+    # Act
+    config = load_config(config_path)
+
+    # Assert
+    assert config == {
+        'name': 'news_etl', 'vocabulary_s3_bucket': 'bucket', 'vocabulary_s3_key': 'vocabulary.csv', 'max_workers': 2,
+        'summary_tables': {'article': 'article_grade_level_summary', 'category': 'category_grade_level_summary',
+                           'readability': 'business_readability'},
+        'jobs': [
+            {'name': 'news', 'params': {'country': 'us'}, 'run_seconds': 1800, 'max_pages': None,
+             'tables': {'news': 'news_raw_table', 'frequency': 'grade_level_word_frequency'}},
+            {'name': 'business', 'params': {'category': 'business'}, 'run_seconds': 3600, 'max_pages': 2,
+             'tables': {'news': 'business_news', 'frequency': 'business_frequency'}}
+        ]
+    }
+
+def test_bundled_config():
+    config = load_config(CONFIG_PATH)
+
+    assert [job['name'] for job in config['jobs']] == ['news']
+    assert config['jobs'][0]['params'] == {'which_news': 'news', 'language': 'en', 'timeframe': 8, 'size': 10, 'country': 'us'}
+    assert config['vocabulary_s3_bucket'] == 'thesweats-project1'
+
+@pytest.mark.parametrize('jobs, message', [
+    ("  - name: news\n  - name: news\n", "unique"),
+    ("  - params:\n      country: us\n", "no name"),
+    ("  - name: a\n    tables:\n      news: a_news\n  - name: b\n", "news tables"),
+])
+def test_invalid_config(tmp_path, jobs, message):
+    config_path = tmp_path / 'pipeline.yaml'
+    config_path.write_text("jobs:\n" + jobs)
+
+    with pytest.raises(Exception, match=message):
+        load_config(config_path)
@@ -0,0 +1,48 @@
+from etl_project.pipelines.daemon import schedule_jobs, run_forever
+import threading
+
+
+class RecordingPipeline:
+    """Stands in for NewsPipeline, records the runs instead of running them."""
+
+    def __init__(self, fail_jobs=()):
+        self.runs = []
+        self.partitions_ensured = 0
+        self.fail_jobs = fail_jobs
+
+    def run(self, jobs=None, name=None):
+        self.runs.append((jobs, name))
+        if set(jobs) & set(self.fail_jobs):
+            raise Exception(f"{jobs} failed")
+
+    def ensure_partitions(self):
+        self.partitions_ensured += 1
+
+def test_run_forever_keeps_running_after_a_failed_run():
+    # Assemble
+    pipeline = RecordingPipeline(fail_jobs={'news'})
+    jobs = [{'name': 'news', 'run_seconds': 1800}, {'name': 'sports', 'run_seconds': 1800},
+            {'name': 'business', 'run_seconds': 3600}]
+    scheduler = schedule_jobs(pipeline, jobs)
+    stop = threading.Event()
+    stop.set()
+
+    # Act
+    run_forever(scheduler, stop)
+
+    # Assert
+    assert pipeline.runs == [(['news', 'sports'], 'every_1800s'), (['business'], 'every_3600s')]
+    assert pipeline.partitions_ensured == 1
+    assert sorted(job.interval for job in scheduler.jobs) == [1, 1800, 3600]
+    assert all(job.next_run is not None for job in scheduler.jobs)
+
+def test_single_cadence_runs_are_unnamed():
+    # Assemble
+    pipeline = RecordingPipeline()
+    scheduler = schedule_jobs(pipeline, [{'name': 'news', 'run_seconds': 1800}])
+
+    # Act
+    scheduler.run_all()
+
+    # Assert
+    assert pipeline.runs == [(['news'], None)]
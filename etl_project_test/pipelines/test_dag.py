@@ -0,0 +1,87 @@
+from etl_project.pipelines.dag import Dag
+import threading
+import time
+import pytest
+
+
+def test_dag_runs_tasks_after_their_dependencies():
+    # Assemble
+    dag = Dag()
+    dag.add('extract', lambda: [1, 2, 3])
+    dag.add('count', lambda results: len(results['extract']), dependencies=['extract'])
+    dag.add('total', lambda results: sum(results['extract']) * results['count'], dependencies=['extract', 'count'])
+
+    # Act
+    results, failed = dag.run(max_workers=2)
+
+    # Assert
+    assert results == {'extract': [1, 2, 3], 'count': 3, 'total': 18}
+    assert failed == {}
+
+def test_dag_runs_independent_tasks_concurrently():
+    # Assemble
+    barrier = threading.Barrier(2, timeout=5)
+    dag = Dag()
+    dag.add('a', lambda: barrier.wait())
+    dag.add('b', lambda: barrier.wait())
+
+    # Act
+    results, failed = dag.run(max_workers=2)
+
+    # Assert
+    assert failed == {}
+    assert sorted(results.values()) == [0, 1]
+
+def test_dag_tasks_sharing_a_lock_do_not_overlap():
+    # Assemble
+    running = []
+    overlaps = []
+
+    def load(name):
+        def run():
+            running.append(name)
+            overlaps.append(len(running))
+            time.sleep(0.05)
+            running.remove(name)
+        return run
+
+    dag = Dag()
+    for name in ['a', 'b', 'c']:
+        dag.add(name, load(name), lock='summaries')
+    dag.add('d', lambda: None)
+
+    # Act
+    results, failed = dag.run(max_workers=3)
+
+    # Assert
+    assert failed == {}
+    assert overlaps == [1, 1, 1]
+    assert set(results) == {'a', 'b', 'c', 'd'}
+
+def test_dag_failure_skips_downstream_tasks_only():
+    # Assemble
+    def fail():
+        raise Exception('API down')
+
+    dag = Dag()
+    dag.add('a.extract', fail)
+    dag.add('a.load', lambda results: None, dependencies=['a.extract'])
+    dag.add('b.extract', lambda: 'articles')
+    dag.add('b.load', lambda results: results['b.extract'], dependencies=['b.extract'])
+
+    # Act
+    results, failed = dag.run()
+
+    # Assert
+    assert results == {'b.extract': 'articles', 'b.load': 'articles'}
+    assert str(failed['a.extract']) == 'API down'
+    assert 'a.extract failed' in str(failed['a.load'])
+
+def test_dag_add_errors():
+    dag = Dag()
+    dag.add('a', lambda: None)
+
+    with pytest.raises(Exception, match="already"):
+        dag.add('a', lambda: None)
+    with pytest.raises(Exception, match="added first"):
+        dag.add('b', lambda results: None, dependencies=['c'])
@@ -0,0 +1,39 @@
+import os
+import subprocess
+import sys
+import pytest
+
+
+HEAVY_MODULES = ['pandas', 'numpy', 'sqlalchemy', 'boto3', 'botocore', 'requests']
+# cumulative import time of the module in a fresh interpreter, in microseconds; about 15 ms on a laptop
+IMPORT_TIME_BUDGET_US = 150_000
+
+
+def import_in_fresh_interpreter(module: str) -> tuple:
+    """Imports module with -X importtime in a new interpreter, returns (its cumulative import time, loaded modules)."""
+    code = f"import sys, {module}; print(','.join(sys.modules))"
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], capture_output=True, text=True, check=True,
+                            env={**os.environ, 'PYTHONPATH': os.pathsep.join(path for path in sys.path if path)})
+    cumulative_us = None
+    for line in result.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        fields = [field.strip() for field in line[len('import time:'):].split('|')]
+        if line.startswith('import time:') and fields[-1] == module:
+            cumulative_us = int(fields[1])
+    return cumulative_us, set(result.stdout.strip().split(','))
+
+@pytest.mark.parametrize('module', ['etl_project.pipelines.pipeline', 'etl_project.pipelines.daemon'])
+def test_entry_point_import_time(module):
+    # Act
+    cumulative_us, modules = import_in_fresh_interpreter(module)
+
+    # Assert
+    assert [heavy for heavy in HEAVY_MODULES if heavy in modules] == []
+    assert cumulative_us < IMPORT_TIME_BUDGET_US
+
+def test_landing_does_not_import_pandas_or_boto3():
+    # Act
+    _, modules = import_in_fresh_interpreter('etl_project.assets.landing')
+
+    # Assert
+    assert [heavy for heavy in HEAVY_MODULES if heavy in modules] == []
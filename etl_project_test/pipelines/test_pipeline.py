@@ -0,0 +1,167 @@
+from etl_project.pipelines.pipeline import NewsPipeline
+from etl_project.assets.extract_news import News
+from etl_project.assets.rate_limiter import RequestScheduler
+from etl_project.assets.incremental import extraction_state_table
+from sqlalchemy import MetaData
+from dotenv import load_dotenv
+import datetime
+import os
+import pytest
+
+
+# the pipeline tests merge into these instead of the summary tables of the configured database
+SUMMARY_TABLES = {'article': 'test_article_grade_level_summary', 'category': 'test_category_grade_level_summary',
+                  'readability': 'test_article_readability'}
+
+@pytest.fixture
+def settings(tmp_path, monkeypatch):
+    load_dotenv()
+    # the vocabulary cache is written relative to the working directory
+    monkeypatch.chdir(tmp_path)
+    return {
+        'api_key': 'test', 'db_username': os.environ.get("DB_USERNAME"), 'db_password': os.environ.get("DB_PASSWORD"),
+        'server_name': os.environ.get("SERVER_NAME"), 'database_name': os.environ.get("DATABASE_NAME"), 'port': os.environ.get("PORT"),
+        'incremental': True, 'frequency_cache_path': str(tmp_path / 'word_frequency.sqlite'), 'streaming': False, 'max_pages': 10,
+        'chunk_size': 500, 'workers': 1, 'match_mode': 'substring', 'catalog_queries': 0, 'catalog_countries': None, 'partition_by_publish_date': False,
+        'db_pool_size': 5, 'statement_timeout_ms': None, 'metrics_textfile': None, 'metrics_table': False,
+        'landing': True, 'landing_path': str(tmp_path / 'landing'), 'landing_s3_bucket': None, 'landing_retention_days': None, 'replay': False, 'replay_from': None, 'replay_to': None,
+        'vocabulary_refresh_seconds': 3600, 'http_connect_timeout_seconds': 10, 'http_read_timeout_seconds': 30,
+        'request_budget': None, 'retention_days': None
+    }
+
+def test_run_jobs(stub_news_server, settings):
+    # Assemble
+    tables = ['test_jobs_sports_frequency', 'test_jobs_business_frequency', 'test_jobs_sports_news', 'test_jobs_business_news',
+              *SUMMARY_TABLES.values()]
+    config = {
+        'name': 'test_news_etl', 'vocabulary_s3_bucket': None, 'vocabulary_s3_key': None, 'max_workers': 4, 'summary_tables': SUMMARY_TABLES,
+        'jobs': [{'name': f'test_jobs_{category}', 'params': {'category': category}, 'run_seconds': 1800, 'max_pages': None,
+                  'tables': {'news': f'test_jobs_{category}_news', 'frequency': f'test_jobs_{category}_frequency'}}
+                 for category in ['sports', 'business']]
+    }
+    pipeline = NewsPipeline(settings, config=config)
+    # 2 pages per job: the first run uses the whole budget, the second one gets it again
+    pipeline.news = News(api_key='test', scheduler=RequestScheduler(requests_per_window=100, window_seconds=1, request_budget=4))
+    pipeline.news.base_url = stub_news_server[0]
+    for table in tables:
+        pipeline.postgresql_client.drop_table(table)
+    state_metadata = MetaData()
+    state_table = extraction_state_table(state_metadata)
+    with pipeline.postgresql_client.transaction() as connection:
+        state_metadata.create_all(connection)
+        connection.execute(state_table.delete().where(state_table.c.name.like('test_jobs_%')))
+
+    # Act
+    try:
+        metrics = pipeline.run()
+        second_metrics = pipeline.run(jobs=['test_jobs_sports'])
+        with pipeline.postgresql_client.transaction() as connection:
+            counts = {table: connection.execute(f"SELECT count(*) FROM {table}").scalar() for table in tables}
+    finally:
+        for table in tables:
+            pipeline.postgresql_client.drop_table(table)
+        pipeline.close()
+
+    # Assert
+    stages = {record['stage']: record for record in metrics.stages}
+    assert all(record['status'] == 'success' for record in metrics.stages)
+    assert [stage for stage in stages if stage.startswith('test_jobs_sports.')] == [
+        f'test_jobs_sports.{stage}' for stage in ['extract', 'normalize', 'word_count', 'aggregate', 'load']]
+    assert stages['test_jobs_business.normalize']['rows_out'] == 4
+    assert counts['test_article_readability'] == counts['test_article_grade_level_summary'] == 8
+    assert counts['test_jobs_sports_news'] == counts['test_jobs_business_news'] == 4
+    assert counts['test_jobs_sports_frequency'] == counts['test_jobs_business_frequency'] == stages['test_jobs_sports.word_count']['rows_out'] > 0
+    # the watermark of the job stops the second run at its first page
+    assert {record['stage']: record.get('rows_out') for record in second_metrics.stages}['test_jobs_sports.normalize'] == 0
+
+def test_setup_jobs_sharing_news_table(settings):
+    # Assemble
+    tables = ['test_shared_sports_frequency', 'test_shared_business_frequency', 'test_shared_news']
+    config = {
+        'name': 'test_news_etl', 'vocabulary_s3_bucket': None, 'vocabulary_s3_key': None, 'max_workers': 4, 'summary_tables': SUMMARY_TABLES,
+        'jobs': [{'name': f'test_shared_{category}', 'params': {'category': category}, 'run_seconds': 1800, 'max_pages': None,
+                  'tables': {'news': 'test_shared_news', 'frequency': f'test_shared_{category}_frequency'}}
+                 for category in ['sports', 'business']]
+    }
+    pipeline = NewsPipeline(settings, config=config)
+    for table in tables:
+        pipeline.postgresql_client.drop_table(table)
+
+    # Act
+    try:
+        pipeline.setup(config['jobs'])
+    finally:
+        for table in tables:
+            pipeline.postgresql_client.drop_table(table)
+        pipeline.close()
+
+    # Assert
+    sports_tables = pipeline.tables[('test_shared_news', 'test_shared_sports_frequency')]
+    business_tables = pipeline.tables[('test_shared_news', 'test_shared_business_frequency')]
+    assert sports_tables['news'] is business_tables['news']
+    assert sports_tables['frequency'] is not business_tables['frequency']
+
+def test_retention(stub_news_server, settings):
+    # Assemble
+    tables = ['test_retention_sports_frequency', 'test_retention_business_frequency', 'test_retention_news', *SUMMARY_TABLES.values()]
+    config = {
+        'name': 'test_news_etl', 'vocabulary_s3_bucket': None, 'vocabulary_s3_key': None, 'max_workers': 4, 'summary_tables': SUMMARY_TABLES,
+        'jobs': [{'name': f'test_retention_{category}', 'params': {'category': category}, 'run_seconds': 1800, 'max_pages': None,
+                  'tables': {'news': 'test_retention_news', 'frequency': f'test_retention_{category}_frequency'}}
+                 for category in ['sports', 'business']]
+    }
+    # the stub articles are from 2023, partitioned news tables have no foreign key deleting the frequencies
+    pipeline = NewsPipeline({**settings, 'incremental': False, 'partition_by_publish_date': True, 'retention_days': 365}, config=config)
+    pipeline.news = News(api_key='test', scheduler=RequestScheduler(requests_per_window=100, window_seconds=1))
+    pipeline.news.base_url = stub_news_server[0]
+    for table in tables:
+        pipeline.postgresql_client.drop_table(table)
+
+    # Act
+    try:
+        metrics = pipeline.run()
+        with pipeline.postgresql_client.transaction() as connection:
+            counts = {table: connection.execute(f"SELECT count(*) FROM {table}").scalar() for table in tables}
+    finally:
+        for table in tables:
+            pipeline.postgresql_client.drop_table(table)
+        pipeline.close()
+
+    # Assert
+    stages = {record['stage']: record for record in metrics.stages}
+    assert stages['test_retention_sports.load']['status'] == stages['retention']['status'] == 'success'
+    assert counts == {table: 0 for table in tables}
+
+def test_landing_settings(stub_news_server, settings, tmp_path):
+    # Assemble
+    config = {
+        'name': 'test_news_etl', 'vocabulary_s3_bucket': None, 'vocabulary_s3_key': None, 'max_workers': 4, 'summary_tables': SUMMARY_TABLES,
+        'jobs': [{'name': 'test_landing_sports', 'params': {'category': 'sports'}, 'run_seconds': 1800, 'max_pages': None,
+                  'tables': {'news': 'test_landing_news', 'frequency': 'test_landing_frequency'}}]
+    }
+    old_partition = tmp_path / 'landing' / 'date=2023-09-01'
+    old_partition.mkdir(parents=True)
+    (old_partition / 'run.jsonl.gz').write_bytes(b'')
+    unlanded_pipeline = NewsPipeline({**settings, 'incremental': False, 'landing': False, 'landing_retention_days': 30}, config=config)
+    landed_pipeline = NewsPipeline({**settings, 'incremental': False, 'landing_retention_days': 30}, config=config)
+    for pipeline in [unlanded_pipeline, landed_pipeline]:
+        pipeline.news = News(api_key='test', scheduler=RequestScheduler(requests_per_window=100, window_seconds=1))
+        pipeline.news.base_url = stub_news_server[0]
+
+    # Act
+    try:
+        unlanded_metrics = unlanded_pipeline.run()
+        unlanded_partitions = sorted(path.name for path in (tmp_path / 'landing').iterdir())
+        landed_metrics = landed_pipeline.run()
+    finally:
+        for table in ['test_landing_frequency', 'test_landing_news', *SUMMARY_TABLES.values()]:
+            landed_pipeline.postgresql_client.drop_table(table)
+        unlanded_pipeline.close()
+        landed_pipeline.close()
+
+    # Assert
+    assert unlanded_partitions == ['date=2023-09-01']
+    assert 'landing_retention' not in {record['stage'] for record in unlanded_metrics.stages}
+    assert {record['stage']: record for record in landed_metrics.stages}['landing_retention']['partitions'] == 1
+    today = datetime.datetime.now(datetime.timezone.utc).date()
+    assert [path.name for path in (tmp_path / 'landing').iterdir()] == [f"date={today.isoformat()}"]